@@ -0,0 +1,227 @@
+import gc
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import warnings
+import contextlib
+import numpy as np
+import pandas as pd
+
+# Run from a directory holding fraud_model.pkl and fraudTrain.csv (realtime/ or streamlit/)
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from fraud_detection import config, mqtt_io, subscriber, tracing  # noqa: E402
+from fraud_detection.dedup import DuplicateFilter  # noqa: E402
+from fraud_detection.features import categorical_cols, selected_features, engineer_features  # noqa: E402
+from fraud_detection.parity import LegacyPreprocessor  # noqa: E402
+from fraud_detection.scoring import FraudScorer  # noqa: E402
+from fraud_detection.simulation import build_simulation_profile, generate_transactions  # noqa: E402
+
+warnings.filterwarnings("ignore")
+
+BATCH_SIZES = (1, 4, 16, 64, 256, 1024, 4096, 16384, 65536)
+UNSTABLE_SPREAD = 0.10  # relative interquartile range above which a result is marked unstable
+
+
+def allocations(fn, calls):
+    """Peak bytes allocated during one call and blocks still allocated after it, averaged over ``calls``.
+
+    CPython has no counter of total allocations, so the peak (tracemalloc's
+    high-water mark above the starting point) stands in for the allocation
+    volume, and retained blocks show what a call leaves behind (a small
+    negative number means a call released cached objects; a steady positive
+    one is a leak).
+    """
+    tracemalloc.start()
+    try:
+        fn()
+        peaks = []
+        gc.collect()
+        blocks_before = sys.getallocatedblocks()
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            fn()
+            peaks.append(tracemalloc.get_traced_memory()[1] - start)
+        gc.collect()
+        retained = (sys.getallocatedblocks() - blocks_before) / calls
+    finally:
+        tracemalloc.stop()
+    return int(np.median(peaks)), round(retained, 2)
+
+
+def measure(fn, min_time=0.1, repeat=7, warmup=0.05, alloc_calls=20):
+    """Median per-call time of ``fn`` over ``repeat`` timed runs, after warming up.
+
+    Each run loops ``fn`` enough times to last ``min_time`` with the garbage
+    collector off, like timeit; the spread is the interquartile range of the
+    runs relative to the median.
+    """
+    deadline = time.perf_counter() + warmup
+    fn()
+    while time.perf_counter() < deadline:
+        fn()
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - started >= min_time / 2:
+            break
+        loops *= 2
+    runs = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter_ns()
+            for _ in range(loops):
+                fn()
+            runs.append((time.perf_counter_ns() - started) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    median = float(np.median(runs))
+    q1, q3 = np.percentile(runs, [25, 75])
+    peak_bytes, retained_blocks = allocations(fn, min(alloc_calls, loops * repeat))
+    return {
+        "median_us": round(median / 1000, 3),
+        "min_us": round(min(runs) / 1000, 3),
+        "spread": round((q3 - q1) / median, 4),
+        "loops": loops,
+        "peak_bytes": peak_bytes,
+        "retained_blocks": retained_blocks,
+    }
+
+
+def build_benchmarks(args, workdir):
+    """(name, rows per call, fn) for every component of the subscriber's per-message path"""
+    scorer = FraudScorer(args.model, args.train_data)
+    legacy = LegacyPreprocessor(args.train_data)
+    profile = build_simulation_profile(args.train_data, nrows=config.ENCODER_SAMPLE_ROWS)
+    frame = generate_transactions(profile, max(BATCH_SIZES), fraud_probability=0.05, rng=np.random.default_rng(args.seed))
+    transaction = {key: value.item() if isinstance(value, np.generic) else value
+                   for key, value in frame.iloc[0].to_dict().items()}
+    payload = mqtt_io.encode_transaction(tracing.stamp(dict(transaction), 0)).encode()
+    row = engineer_features(pd.DataFrame([transaction]))
+    legacy_row = pd.DataFrame({key: [transaction[key]] for key in selected_features})
+    X_row = scorer.encode(row)
+    encoded = scorer.encode(frame)
+    legacy_encoded = pd.DataFrame(encoded, columns=selected_features)
+    model = scorer.model
+
+    benchmarks = [
+        ("decode: json.loads payload", 1, lambda: mqtt_io.decode_transaction(payload)),
+        ("frame: DataFrame + engineer_features", 1, lambda: engineer_features(pd.DataFrame([transaction]))),
+    ]
+    for col in categorical_cols:
+        encoder = legacy.label_encoders[col]
+        benchmarks.append((f"legacy: LabelEncoder.transform[{col}]", 1,
+                           lambda encoder=encoder, col=col: encoder.transform(legacy_row[col].astype(str))))
+    for col in categorical_cols:
+        vocabulary = scorer.vocabularies[col]
+        benchmarks.append((f"encode: get_indexer[{col}]", 1,
+                           lambda vocabulary=vocabulary, col=col: vocabulary.get_indexer(row[col].astype(str))))
+    benchmarks += [
+        ("encode: FraudScorer.encode", 1, lambda: scorer.encode(row)),
+        ("legacy: preprocess_transaction", 1, lambda: legacy.preprocess_transaction(transaction)),
+    ]
+    for size in (1, 1024, 65536):
+        benchmarks.append((f"legacy: StandardScaler.transform x{size}", size,
+                           lambda size=size: legacy.scaler.transform(legacy_encoded.iloc[:size])))
+        benchmarks.append((f"scale: FraudScorer.scale x{size}", size,
+                           lambda size=size: scorer.scale(encoded[:size].copy())))
+    X_batches = {size: scorer.scale(encoded[:size].copy()) for size in BATCH_SIZES}
+    for size in BATCH_SIZES:
+        benchmarks.append((f"predict: predict_proba x{size}", size, lambda X=X_batches[size]: model.predict_proba(X)))
+    X_scaled_row = scorer.scale(X_row.copy())
+    benchmarks.append(("predict: predict_proba row + [0, 1]", 1, lambda: float(model.predict_proba(X_scaled_row)[0, 1])))
+
+    # The CSV sink as on_message calls it, with its prints discarded and its logs/CSV under ``workdir``
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        subscriber.setup_logging()
+        service = subscriber.FraudDetectionService(scorer, fraud_csv_path=os.path.join(workdir, "detected_frauds.csv"))
+    finally:
+        os.chdir(cwd)
+    devnull = io.StringIO()
+
+    def sink(probability):
+        devnull.seek(0)
+        with contextlib.redirect_stdout(devnull):
+            service.handle_verdict(transaction, probability)
+
+    dedup = DuplicateFilter(config.DEDUP_CAPACITY, config.DEDUP_ERROR_RATE)
+    keys = iter(range(10**12))
+    benchmarks += [
+        ("dedup: DuplicateFilter.seen new id", 1, lambda: dedup.seen(f"{next(keys):032x}")),
+        ("dedup: DuplicateFilter.seen duplicate", 1, lambda: dedup.seen(transaction["trans_num"])),
+        ("sink: handle_verdict legitimate", 1, lambda: sink(0.01)),
+        ("sink: handle_verdict fraud (CSV + log)", 1, lambda: sink(0.99)),
+    ]
+
+    class Message:
+        topic = config.MQTT_TOPIC
+        qos = 0
+
+    message = Message()
+    message.payload = payload
+
+    def process_message():
+        devnull.seek(0)
+        with contextlib.redirect_stdout(devnull):
+            service.process_message(message)
+
+    def process_batch(messages):
+        devnull.seek(0)
+        with contextlib.redirect_stdout(devnull):
+            service.process_batch(messages)
+
+    benchmarks.append(("total: FraudDetectionService.process_message", 1, process_message))
+    for size in (64, 1024, 4096):
+        benchmarks.append((f"total: process_batch x{size} (catch-up)", size, lambda messages=[message] * size: process_batch(messages)))
+    return benchmarks, service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark each component of the subscriber's scoring path")
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--train-data", default=config.TRAIN_DATA_PATH)
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per timed run")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="hotpath-") as workdir:
+        benchmarks, service = build_benchmarks(args, workdir)
+        results = {}
+        print(f"{'benchmark':46} {'median µs':>11} {'µs/row':>9} {'spread':>7} {'peak KiB':>9} {'blocks':>7}")
+        for name, rows, fn in benchmarks:
+            if args.filter not in name:
+                continue
+            result = measure(fn, min_time=args.min_time, repeat=args.repeat)
+            result["rows"] = rows
+            result["per_row_us"] = round(result["median_us"] / rows, 4)
+            results[name] = result
+            flag = "  unstable" if result["spread"] > UNSTABLE_SPREAD else ""
+            print(f"{name:46} {result['median_us']:11.2f} {result['per_row_us']:9.3f} {result['spread']:7.1%} "
+                  f"{result['peak_bytes'] / 1024:9.1f} {result['retained_blocks']:7.2f}{flag}")
+        service.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": sys.version.split()[0], "numpy": np.__version__, "pandas": pd.__version__,
+                       "benchmarks": results}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
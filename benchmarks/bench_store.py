@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from fraud_detection.store import INSERT, TransactionStore  # noqa: E402
+
+CATEGORIES = ["grocery_pos", "gas_transport", "shopping_net", "misc_pos", "entertainment", "food_dining", "travel"]
+
+
+def fill(store, rows, cards, merchants, days, seed, batch=200000):
+    """Insert ``rows`` synthetic verdicts spread over the last ``days`` days, bypassing add() for speed"""
+    rng = np.random.default_rng(seed)
+    now = time.time()
+    for offset in range(0, rows, batch):
+        n = min(batch, rows - offset)
+        scored_at = np.sort(now - rng.random(n) * days * 86400)
+        fraud = rng.random(n) < 0.01
+        probability = np.where(fraud, 0.5 + rng.random(n) / 2, rng.random(n) / 2)
+        card = rng.integers(0, cards, n) + 4000000000000000
+        merchant = rng.integers(0, merchants, n)
+        category = rng.integers(0, len(CATEGORIES), n)
+        amt = np.round(rng.lognormal(3.5, 1.2, n), 2)
+        with store.write_connection:
+            store.write_connection.executemany(INSERT, (
+                (float(scored_at[i]), f"t{offset + i:012d}", None, int(card[i]), f"fraud_Merchant {merchant[i]}",
+                 CATEGORIES[category[i]], float(amt[i]), None, None, None, None, None,
+                 float(probability[i]), int(fraud[i]))
+                for i in range(n)))
+        print(f"\r  inserted {offset + n:,}/{rows:,}", end="", flush=True)
+    print()
+
+
+def timed(label, fn, repeat):
+    times, counts = [], []
+    for i in range(repeat):
+        started = time.perf_counter()
+        counts.append(len(fn(i)))
+        times.append((time.perf_counter() - started) * 1000)
+    print(f"  {label:44} median {np.median(times):8.2f} ms  p95 {np.percentile(times, 95):8.2f} ms  "
+          f"rows/query {np.mean(counts):8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill a transaction store and time the investigation queries")
+    parser.add_argument("--path", default="bench_transactions.db")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--cards", type=int, default=1_000_000)
+    parser.add_argument("--merchants", type=int, default=50_000)
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="reuse an existing --path instead of refilling it")
+    args = parser.parse_args()
+
+    if not args.keep:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.path + suffix):
+                os.remove(args.path + suffix)
+    store = TransactionStore(args.path, retention_seconds=args.days * 86400)
+    count = store.write_connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    if count == 0:
+        started = time.perf_counter()
+        fill(store, args.rows, args.cards, args.merchants, args.days, args.seed)
+        print(f"filled {args.rows:,} rows in {time.perf_counter() - started:.1f}s")
+        count = args.rows
+    print(f"{count:,} rows, {store.stats()['size_mb']} MB")
+
+    rng = np.random.default_rng(args.seed + 1)
+    cards = rng.integers(0, args.cards, args.repeat) + 4000000000000000
+    merchants = rng.integers(0, args.merchants, args.repeat)
+    day_ago = time.time() - 86400
+    timed("card, last 24 h", lambda i: store.query(cc_num=int(cards[i]), since=day_ago), args.repeat)
+    timed("card, all retained history", lambda i: store.query(cc_num=int(cards[i])), args.repeat)
+    timed("merchant, last 24 h (limit 1000)", lambda i: store.query(merchant=f"fraud_Merchant {merchants[i]}", since=day_ago), args.repeat)
+    timed("predicted frauds, last 24 h (limit 100)", lambda i: store.query(since=day_ago, fraud_only=True, limit=100), args.repeat)
+    timed("latest 100", lambda i: store.query(limit=100), args.repeat)
+
+    # Subscriber write path: add() per verdict, one executemany per batch
+    transaction = {"trans_num": "x", "cc_num": 4000000000000001, "merchant": "fraud_Merchant 1", "category": "travel",
+                   "amt": 12.5, "gender": "F", "city": "Austin", "state": "TX", "job": "Engineer", "is_fraud": 0}
+    rows = 100_000
+    started = time.perf_counter()
+    for _ in range(rows):
+        store.add(transaction, 0.01, 0)
+        if len(store.pending) >= store.batch_size:
+            store.flush()
+    store.flush()
+    print(f"  add()+flush: {rows / (time.perf_counter() - started):,.0f} rows/s into a {count:,}-row table")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
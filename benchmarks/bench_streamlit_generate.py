@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import argparse
+import warnings
+
+# Run from the streamlit/ directory (needs fraud_model.pkl and fraudTrain.csv there)
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "streamlit"))
+import dashboard_resources  # noqa: E402
+from fraud_detection import simulation  # noqa: E402
+
+warnings.filterwarnings("ignore")
+
+
+def run_uncached(count):
+    """What "Generate Transactions" used to do: re-read fraudTrain.csv for every transaction"""
+    scorer = dashboard_resources.build_scoring_resources()
+    for _ in range(count):
+        profile = dashboard_resources.build_simulation_profile()
+        scorer.score_transaction(simulation.generate_transaction(profile, fraud_probability=0.1))
+
+
+def run_cached(count, scorer, profile):
+    for _ in range(count):
+        scorer.score_transaction(simulation.generate_transaction(profile, fraud_probability=0.1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's Generate Transactions button")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    before = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        run_uncached(args.count)
+        before.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    scorer = dashboard_resources.build_scoring_resources()
+    profile = dashboard_resources.build_simulation_profile()
+    cold_load = time.perf_counter() - started
+
+    after = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        run_cached(args.count, scorer, profile)
+        after.append(time.perf_counter() - started)
+
+    print(f"Generate {args.count} transactions (interval excluded), best of {args.repeat}:")
+    print(f"  before (CSV parsed per transaction): {min(before) * 1000:9.1f} ms")
+    print(f"  after  (cached resources):           {min(after) * 1000:9.1f} ms")
+    print(f"  one-off cache fill per process:      {cold_load * 1000:9.1f} ms")
+    print(f"  speedup: {min(before) / min(after):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+import os
+import sys
+import json
+import time
+import socket
+import signal
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import multiprocessing
+import urllib.error
+import urllib.request
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Run from a directory holding fraud_model.pkl and fraudTrain.csv (realtime/ or streamlit/)
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from fraud_detection import config, mqtt_io, tracing  # noqa: E402
+from fraud_detection.simulation import build_simulation_profile, generate_transactions  # noqa: E402
+from fraud_detection.supervisor import free_port, process_usage  # noqa: E402
+
+SCENARIOS = ("steady", "burst", "ramp", "replay")
+TICK = 0.001  # resolution of the send schedule, seconds
+BURST_PERIOD = 5.0
+BURST_LENGTH = 1.0
+SATURATION_RATIO = 0.9  # a second where a subscriber keeps up with less than this share of the offered rate is saturated
+
+# (metric, direction): +1 higher is better, -1 lower is better
+CHECKS = (
+    ("throughput_msgs_per_s", 1),
+    ("latency_ms.p50", -1),
+    ("latency_ms.p99", -1),
+    ("latency_ms.p999", -1),
+    ("drop_rate", -1),
+    ("cpu_ms_per_message", -1),
+    ("peak_rss_mb", -1),
+)
+# Changes smaller than these are noise whatever the relative change
+ABSOLUTE_FLOOR = {"latency_ms.p50": 0.05, "latency_ms.p99": 0.2, "latency_ms.p999": 0.5, "drop_rate": 0.001, "peak_rss_mb": 5.0}
+
+
+def offered_rates(scenario, rate, duration, burst_factor, ramp_factor):
+    """Offered message rate (msg/s) for every TICK of the run"""
+    t = np.arange(0, duration, TICK)
+    if scenario == "burst":
+        return np.where(t % BURST_PERIOD < BURST_LENGTH, rate * burst_factor, rate)
+    if scenario == "ramp":
+        return rate + (rate * ramp_factor - rate) * t / duration
+    return np.full(len(t), float(rate))
+
+
+def send_schedule(rates):
+    """Due time, in seconds from the start, of every message of an open-loop schedule"""
+    cumulative = np.cumsum(rates * TICK)
+    return np.searchsorted(cumulative, np.arange(1, int(cumulative[-1]) + 1)) * TICK
+
+
+def load_records(scenario, args, count):
+    if scenario == "replay":
+        df = pd.read_csv(args.replay_file, nrows=count)
+        df = df.drop(columns=[c for c in df.columns if c.startswith("Unnamed")])
+    else:
+        profile = build_simulation_profile(args.train_data, nrows=config.ENCODER_SAMPLE_ROWS)
+        df = generate_transactions(profile, count, fraud_probability=0.05, rng=np.random.default_rng(args.seed))
+    return df.to_dict("records")
+
+
+def run_publisher(index, publishers, broker, port, topic, qos, records, schedule, start_at, results):
+    """Publish every ``publishers``-th message of ``schedule`` from its due time, independent of send completion.
+
+    The trace is stamped with the due time rather than the actual send time, so
+    a publisher that falls behind shows up as latency instead of silently
+    lowering the offered load.
+    """
+    client = mqtt_io.create_client(client_id=f"loadtest-pub-{index}-{os.getpid()}")
+    mqtt_io.connect(client, broker, port)
+    client.loop_start()
+    lag = tracing.LatencyHistogram()
+    wall_offset = time.time_ns() - time.monotonic_ns()
+    sent = failed = 0
+    info = None
+    for seq in range(index, len(schedule), publishers):
+        due_ns = int((start_at + schedule[seq]) * 1e9)
+        now = time.monotonic_ns()
+        if due_ns > now:
+            time.sleep((due_ns - now) / 1e9)
+        lag.record(max(time.monotonic_ns() - due_ns, 0))
+        transaction = tracing.stamp(dict(records[seq % len(records)]), seq)
+        transaction["trans_num"] = f"loadtest-{start_at:.0f}-{seq}"  # the pool is cycled; each message must stay distinct
+        transaction[tracing.TRACE_KEY].update(mono_ns=due_ns, wall_ns=due_ns + wall_offset)
+        info = client.publish(topic, mqtt_io.encode_transaction(transaction), qos=qos)
+        if info.rc == 0:
+            sent += 1
+        else:
+            failed += 1
+    if info is not None and qos:
+        try:
+            info.wait_for_publish(timeout=60)
+        except (RuntimeError, ValueError):
+            pass
+    client.loop_stop()
+    client.disconnect()
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    results.put({
+        "index": index,
+        "sent": sent,
+        "failed": failed,
+        "cpu_seconds": round(usage.ru_utime + usage.ru_stime, 2),
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "schedule_lag_ms": lag.summary(),
+    })
+
+
+class Subscriber:
+    """A ``fraud_detection.subscriber`` child process with its /metrics endpoint"""
+
+    def __init__(self, index, broker, port, args, pythonpath, workdir, client_id=None):
+        self.metrics_port = free_port()
+        self.baseline = 0  # messages received before the run (warm-up probes)
+        self.cpu_baseline = 0.0  # startup CPU: model load and encoder fitting
+        self.workdir = os.path.join(workdir, f"subscriber-{index}")
+        os.makedirs(self.workdir, exist_ok=True)
+        self.stderr = open(os.path.join(self.workdir, "stderr.log"), "a")
+        command = [sys.executable, "-m", "fraud_detection.subscriber", "--broker", broker, "--port", str(port),
+                   "--topic", args.topic, "--model", os.path.abspath(args.model), "--train-data", os.path.abspath(args.train_data),
+                   "--metrics-port", str(self.metrics_port), "--summary-interval", "0"]
+        with open(os.path.join(pythonpath, "fraud_detection", "subscriber.py")) as f:
+            has_sessions = "--client-id" in f.read()  # revisions before persistent sessions lack the options
+        if has_sessions:
+            # Subscribers sharing a client id would take each other's session over
+            command += ["--client-id", client_id or f"loadtest-sub-{index}-{os.getpid()}"]
+            if client_id is None:
+                command.append("--clean-session")
+        self.process = subprocess.Popen(command, cwd=self.workdir, env={**os.environ, "PYTHONPATH": pythonpath},
+                                        stdout=subprocess.DEVNULL, stderr=self.stderr)
+
+    def metrics(self):
+        with urllib.request.urlopen(f"http://127.0.0.1:{self.metrics_port}/metrics", timeout=5) as response:
+            return json.load(response)
+
+    def received(self, metrics=None):
+        metrics = metrics or self.metrics()
+        return metrics["stages"].get("decode", {}).get("count", 0) - self.baseline
+
+    def reset(self):
+        request = urllib.request.Request(f"http://127.0.0.1:{self.metrics_port}/metrics/reset", method="POST")
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+        except urllib.error.HTTPError:
+            pass  # revisions before /metrics/reset keep the warm-up samples
+
+    def wait_ready(self, timeout=120):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"subscriber exited with {self.process.returncode}, see {self.stderr.name}")
+            try:
+                return self.metrics()
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError(f"subscriber metrics not up after {timeout}s")
+
+    def stop(self, sig=signal.SIGINT):
+        usage = process_usage(self.process.pid)
+        if usage:
+            usage["cpu_seconds"] = round(usage["cpu_seconds"] - self.cpu_baseline, 2)
+        self.process.send_signal(sig)
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.stderr.close()
+        return usage
+
+
+def start_broker(args, workdir):
+    """The external broker from --broker, or a fraud_detection.broker child process"""
+    if args.broker:
+        host, _, port = args.broker.partition(":")
+        return None, host, int(port or config.MQTT_PORT)
+    port = free_port()
+    process = subprocess.Popen([sys.executable, "-m", "fraud_detection.broker", "--host", "127.0.0.1", "--port", str(port)],
+                               cwd=workdir, env={**os.environ, "PYTHONPATH": ROOT}, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, "127.0.0.1", port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("embedded broker did not start")
+
+
+def warm_up(subscribers, broker, port, args, record, timeout=60):
+    """Publish probes until every subscriber has scored one, then clear their histograms"""
+    client = mqtt_io.create_client(client_id=f"loadtest-probe-{os.getpid()}")
+    mqtt_io.connect(client, broker, port)
+    client.loop_start()
+    deadline = time.monotonic() + timeout
+    try:
+        while not all(subscriber.received() for subscriber in subscribers):
+            if time.monotonic() > deadline:
+                raise RuntimeError("subscribers did not receive warm-up messages")
+            probe = dict(record, trans_num=f"loadtest-probe-{time.time_ns()}")
+            client.publish(args.topic, mqtt_io.encode_transaction(probe), qos=1).wait_for_publish(5)
+            time.sleep(0.2)
+    finally:
+        client.loop_stop()
+        client.disconnect()
+    for subscriber in subscribers:
+        subscriber.reset()
+        subscriber.baseline += subscriber.received()
+        subscriber.cpu_baseline = process_usage(subscriber.process.pid).get("cpu_seconds", 0.0)
+
+
+def worst(summaries, key):
+    values = [summary[key] for summary in summaries if key in summary]
+    return max(values) if values else None
+
+
+def run_scenario(scenario, args, pythonpath, workdir):
+    rates = offered_rates(scenario, args.rate, args.duration, args.burst_factor, args.ramp_factor)
+    schedule = send_schedule(rates)
+    records = load_records(scenario, args, min(len(schedule), args.pool_size))
+    broker_process, host, port = start_broker(args, workdir)
+    subscribers = [Subscriber(i, host, port, args, pythonpath, workdir) for i in range(args.subscribers)]
+    try:
+        for subscriber in subscribers:
+            subscriber.wait_ready()
+        warm_up(subscribers, host, port, args, records[0])
+
+        context = multiprocessing.get_context("fork") if hasattr(os, "fork") else multiprocessing.get_context()
+        results = context.Queue()
+        start_at = time.monotonic() + 2.0  # publishers connect before the first message is due
+        publishers = [context.Process(target=run_publisher, args=(i, args.publishers, host, port, args.topic, args.qos,
+                                                                  records, schedule, start_at, results))
+                      for i in range(args.publishers)]
+        for process in publishers:
+            process.start()
+
+        # Per-second delivery timeline while publishing, then drain until nothing new arrives
+        timeline, previous = [], [0] * len(subscribers)
+        expected = len(schedule) * len(subscribers)
+        last_progress = time.monotonic()
+        while True:
+            time.sleep(1.0)
+            counts = [subscriber.received() for subscriber in subscribers]
+            now = time.monotonic()
+            elapsed = now - start_at
+            if elapsed > 0:
+                window = (np.arange(len(rates)) * TICK >= elapsed - 1.0) & (np.arange(len(rates)) * TICK < elapsed)
+                timeline.append({
+                    "t": round(elapsed, 1),
+                    "offered_per_s": round(float(rates[window].mean()), 1) if window.any() else 0.0,
+                    "received_per_s": [c - p for c, p in zip(counts, previous)],
+                })
+            if counts != previous:
+                last_progress = now
+            previous = counts
+            publishing = any(process.is_alive() for process in publishers)
+            if not publishing and (sum(counts) >= expected or now - last_progress > args.drain_idle
+                                   or elapsed > args.duration + args.drain_timeout):
+                break
+        publisher_results = sorted((results.get(timeout=30) for _ in publishers), key=lambda r: r["index"])
+        for process in publishers:
+            process.join()
+        active_seconds = max(last_progress - start_at, 1e-9)
+
+        metrics = [subscriber.metrics() for subscriber in subscribers]
+    finally:
+        usages = [subscriber.stop() for subscriber in subscribers]
+        broker_usage = {}
+        if broker_process is not None:
+            broker_usage = process_usage(broker_process.pid)
+            broker_process.terminate()
+            broker_process.wait(timeout=10)
+
+    sent = sum(r["sent"] for r in publisher_results)
+    received = [subscriber.received(m) for subscriber, m in zip(subscribers, metrics)]
+    end_to_end = [m["stages"].get("end_to_end", {}) for m in metrics]
+    subscriber_cpu = sum(u.get("cpu_seconds", 0) for u in usages)
+    saturated = [s for s in timeline if s["offered_per_s"] and min(s["received_per_s"]) < SATURATION_RATIO * s["offered_per_s"]]
+    return {
+        "offered": {
+            "messages": len(schedule),
+            "duration_s": args.duration,
+            "mean_rate": round(len(schedule) / args.duration, 1),
+            "peak_rate": round(float(rates.max()), 1),
+        },
+        "sent": sent,
+        "publish_failures": sum(r["failed"] for r in publisher_results),
+        "received": sum(received),
+        "expected": sent * len(subscribers),
+        "dropped": sent * len(subscribers) - sum(received),
+        "drop_rate": round(1 - sum(received) / max(sent * len(subscribers), 1), 6),
+        "throughput_msgs_per_s": round(sum(received) / active_seconds, 1),
+        "latency_ms": {key: worst(end_to_end, key) for key in ("p50", "p99", "p999", "max")},
+        "stages_p99_ms": {stage: worst([m["stages"].get(stage, {}) for m in metrics], "p99")
+                          for stage in ("decode", "encode", "scale", "predict", "sink")},
+        "cpu_ms_per_message": round(subscriber_cpu * 1000 / max(sum(received), 1), 4) if usages and usages[0] else None,
+        "peak_rss_mb": worst(usages, "peak_rss_mb"),
+        "saturation": {
+            "saturated": bool(saturated),
+            "first_saturated_offered_rate": saturated[0]["offered_per_s"] if saturated else None,
+            "max_received_per_s": max((min(s["received_per_s"]) for s in timeline), default=0),
+        },
+        "subscribers": [{"received": r, "end_to_end_ms": e, **u} for r, e, u in zip(received, end_to_end, usages)],
+        "publishers": publisher_results,
+        "broker": broker_usage,
+        "timeline": timeline,
+    }
+
+
+def git_commit(path):
+    try:
+        commit = subprocess.check_output(["git", "-C", path, "rev-parse", "HEAD"], text=True).strip()
+        dirty = subprocess.run(["git", "-C", path, "diff", "--quiet", "HEAD", "--", "fraud_detection"]).returncode != 0
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("-dirty" if dirty else "")
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    code_path = ROOT
+    if args.rev:
+        # Score with the fraud_detection package of another commit; the harness and broker stay on this tree
+        code_path = os.path.join(workdir, "tree")
+        subprocess.check_call(["git", "-C", ROOT, "worktree", "add", "--detach", code_path, args.rev], stdout=subprocess.DEVNULL)
+    try:
+        output = {
+            "meta": {
+                "commit": git_commit(code_path),
+                "rev": args.rev,
+                "started": datetime.now().isoformat(timespec="seconds"),
+                "host": platform.node(),
+                "python": platform.python_version(),
+                "cpus": os.cpu_count(),
+                "broker": args.broker or "embedded",
+                "config": {key: getattr(args, key) for key in ("publishers", "subscribers", "rate", "duration", "qos",
+                                                               "burst_factor", "ramp_factor", "pool_size", "seed")},
+            },
+            "scenarios": {},
+        }
+        for scenario in args.scenarios:
+            print(f"▶ {scenario}: {args.publishers} publisher(s), {args.subscribers} subscriber(s), "
+                  f"{args.rate} msg/s base for {args.duration}s")
+            result = run_scenario(scenario, args, code_path, workdir)
+            output["scenarios"][scenario] = result
+            latency = result["latency_ms"]
+            print(f"  sent {result['sent']}  received {result['received']}/{result['expected']}  dropped {result['dropped']}  "
+                  f"{result['throughput_msgs_per_s']:.0f} msg/s  p50 {latency['p50']} ms  p99 {latency['p99']} ms  "
+                  f"p99.9 {latency['p999']} ms  rss {result['peak_rss_mb']} MB")
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+    finally:
+        if args.rev:
+            subprocess.call(["git", "-C", ROOT, "worktree", "remove", "--force", code_path])
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def lookup(result, metric):
+    value = result
+    for key in metric.split("."):
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    print(f"base {base['meta'].get('commit')}  vs  head {head['meta'].get('commit')}  (tolerance {args.tolerance:.0%})")
+    regressions = []
+    for scenario in base["scenarios"]:
+        if scenario not in head["scenarios"]:
+            continue
+        print(f"\n{scenario}")
+        for metric, direction in CHECKS:
+            old = lookup(base["scenarios"][scenario], metric)
+            new = lookup(head["scenarios"][scenario], metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else (0.0 if new == old else float("inf"))
+            worse = (old - new) if direction > 0 else (new - old)
+            regressed = worse > abs(old) * args.tolerance and worse > ABSOLUTE_FLOOR.get(metric, 0)
+            print(f"  {'✗' if regressed else ' '} {metric:24} {old:>12g} → {new:<12g} {change:+.1%}")
+            if regressed:
+                regressions.append(f"{scenario}.{metric}")
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+        raise SystemExit(1)
+    print("\n✅ No regressions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the MQTT publisher → broker → subscriber pipeline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run scenarios and write a JSON results file")
+    run_parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    run_parser.add_argument("--publishers", type=int, default=1)
+    run_parser.add_argument("--subscribers", type=int, default=1)
+    run_parser.add_argument("--rate", type=float, default=200.0, help="base offered rate, messages/s over all publishers")
+    run_parser.add_argument("--duration", type=float, default=20.0, help="seconds of publishing per scenario")
+    run_parser.add_argument("--burst-factor", type=float, default=10.0, help="burst: rate multiplier for 1 s in every 5 s")
+    run_parser.add_argument("--ramp-factor", type=float, default=10.0, help="ramp: final rate as a multiple of --rate")
+    run_parser.add_argument("--qos", type=int, choices=[0, 1, 2], default=1)
+    run_parser.add_argument("--topic", default="loadtest/transactions")
+    run_parser.add_argument("--broker", help="host[:port] of a running broker (default: start fraud_detection.broker)")
+    run_parser.add_argument("--model", default=config.MODEL_PATH)
+    run_parser.add_argument("--train-data", default=config.TRAIN_DATA_PATH)
+    run_parser.add_argument("--replay-file", default=config.TRAIN_DATA_PATH, help="CSV replayed by the replay scenario")
+    run_parser.add_argument("--pool-size", type=int, default=20000, help="distinct transactions cycled by the publishers")
+    run_parser.add_argument("--drain-idle", type=float, default=3.0, help="stop waiting after this long without deliveries")
+    run_parser.add_argument("--drain-timeout", type=float, default=60.0)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--rev", help="git revision whose fraud_detection package the subscribers run")
+    run_parser.add_argument("--output", default="loadtest-results.json")
+
+    compare_parser = commands.add_parser("compare", help="flag regressions between two results files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument("--tolerance", type=float, default=0.10, help="relative change allowed before flagging")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
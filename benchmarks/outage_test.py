@@ -0,0 +1,163 @@
+import os
+import sys
+import json
+import time
+import signal
+import sqlite3
+import argparse
+import tempfile
+import threading
+import numpy as np
+
+# Run from a directory holding fraud_model.pkl and fraudTrain.csv (realtime/ or streamlit/)
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from fraud_detection import config, mqtt_io, tracing  # noqa: E402
+from fraud_detection.simulation import build_simulation_profile, generate_transactions  # noqa: E402
+from load_test import Subscriber, start_broker, warm_up  # noqa: E402
+
+CLIENT_ID = "outage-test-subscriber"
+
+
+class Publisher(threading.Thread):
+    """Publishes ``rate`` traced transactions per second with ids outage-<seq> until stopped"""
+
+    def __init__(self, broker, port, topic, records, rate, duration, qos=1):
+        super().__init__(daemon=True)
+        self.client = mqtt_io.create_client(client_id=f"outage-test-pub-{os.getpid()}")
+        mqtt_io.connect(self.client, broker, port)
+        self.client.loop_start()
+        self.topic, self.records, self.rate, self.duration, self.qos = topic, records, rate, duration, qos
+        self.sent = 0
+        self.started = None
+
+    def run(self):
+        self.started = time.monotonic()
+        info = None
+        for seq in range(int(self.rate * self.duration)):
+            delay = self.started + seq / self.rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            transaction = tracing.stamp(dict(self.records[seq % len(self.records)]), seq)
+            transaction["trans_num"] = f"outage-{seq}"
+            info = self.client.publish(self.topic, mqtt_io.encode_transaction(transaction), qos=self.qos)
+            self.sent += 1
+        if info is not None:
+            info.wait_for_publish(timeout=60)
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+def stored_ids(workdir):
+    """trans_num of every outage-test verdict in the subscriber's store, with repeats"""
+    connection = sqlite3.connect(os.path.join(workdir, "transactions.db"))
+    try:
+        return [row[0] for row in connection.execute("SELECT trans_num FROM transactions WHERE trans_num LIKE 'outage-%'")]
+    finally:
+        connection.close()
+
+
+def run(args, workdir):
+    profile = build_simulation_profile(args.train_data, nrows=config.ENCODER_SAMPLE_ROWS)
+    records = generate_transactions(profile, 2000, fraud_probability=0.05, rng=np.random.default_rng(args.seed)).to_dict("records")
+    broker_process, host, port = start_broker(args, workdir)
+    subscriber = Subscriber(0, host, port, args, ROOT, workdir, client_id=CLIENT_ID)
+    publisher = None
+    timeline = []
+    try:
+        subscriber.wait_ready()
+        warm_up([subscriber], host, port, args, records[0])
+        publisher = Publisher(host, port, args.topic, records, args.rate, args.duration)
+        publisher.start()
+
+        time.sleep(args.outage_at)
+        print(f"💥 Stopping the subscriber ({'SIGKILL' if args.kill else 'SIGINT'}) after {publisher.sent} messages")
+        subscriber.stop(signal.SIGKILL if args.kill else signal.SIGINT)
+        stopped_at, sent_at_stop = time.monotonic(), publisher.sent
+        time.sleep(args.outage_seconds)
+        backlog = publisher.sent - sent_at_stop
+        print(f"🔁 Restarting it; {backlog} messages were published while it was down")
+        subscriber = Subscriber(0, host, port, args, ROOT, workdir, client_id=CLIENT_ID)
+        subscriber.wait_ready()
+        restarted_at = time.monotonic()
+
+        # Poll the consumer stats until publishing is over and the backlog is gone
+        caught_up_at = None
+        while True:
+            time.sleep(args.poll)
+            consumer = subscriber.metrics()["consumer"]
+            now = time.monotonic()
+            timeline.append({"t": round(now - restarted_at, 2), **{key: consumer[key] for key in
+                                                                 ("mode", "lag_seconds", "drain_rate", "processed", "waiting")}})
+            if caught_up_at is None and consumer["catchups"]:
+                caught_up_at = now
+            if not publisher.is_alive() and consumer["waiting"] == 0 and consumer["mode"] == "live":
+                time.sleep(args.poll)  # the last verdicts reach the store on close
+                break
+            if now - restarted_at > args.duration + args.timeout:
+                print("⚠️ Timed out waiting for the backlog to drain")
+                break
+        consumer = subscriber.metrics()["consumer"]
+    finally:
+        subscriber.stop()
+        if broker_process is not None:
+            broker_process.terminate()
+            broker_process.wait(timeout=10)
+
+    ids = stored_ids(subscriber.workdir)
+    unique = set(ids)
+    missing = publisher.sent - len(unique)
+    catchup = consumer["catchups"][0] if consumer["catchups"] else None
+    return {
+        "published": publisher.sent,
+        "published_during_outage": backlog,
+        "stored": len(ids),
+        "missing": missing,
+        "duplicates": len(ids) - len(unique),
+        "restart_seconds": round(restarted_at - stopped_at, 2),
+        "catchup": catchup,
+        "time_to_live_after_restart_s": round(caught_up_at - restarted_at, 2) if caught_up_at else None,
+        "max_lag_seconds": consumer["max_lag_seconds"],
+        "timeline": timeline,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stop a persistent-session subscriber mid-stream, restart it, and check it catches up without losing a transaction")
+    parser.add_argument("--rate", type=float, default=50.0, help="messages/s, below the subscriber's one-at-a-time capacity")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of publishing")
+    parser.add_argument("--outage-at", type=float, default=10.0, help="seconds into publishing when the subscriber stops")
+    parser.add_argument("--outage-seconds", type=float, default=20.0, help="how long it stays down")
+    parser.add_argument("--kill", action="store_true",
+                        help="SIGKILL instead of SIGINT: verdicts not yet flushed are lost and redeliveries are not deduplicated")
+    parser.add_argument("--topic", default="outagetest/transactions")
+    parser.add_argument("--broker", help="host[:port] of a running broker (default: start fraud_detection.broker)")
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--train-data", default=config.TRAIN_DATA_PATH)
+    parser.add_argument("--poll", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=120.0, help="extra seconds allowed for the backlog to drain")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="outage-results.json")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="outage-") as workdir:
+        result = run(args, workdir)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    catchup = result["catchup"]
+    if catchup:
+        print(f"⏩ Catch-up: {catchup['messages']} messages in {catchup['seconds']}s ({catchup['drain_rate']} msg/s), "
+              f"lag {catchup['start_lag_seconds']}s → {catchup['end_lag_seconds']}s")
+    else:
+        print("⚠️ The subscriber never entered catch-up mode")
+    print(f"📊 Published {result['published']}, stored {result['stored']}: {result['missing']} missing, "
+          f"{result['duplicates']} duplicate(s); live again {result['time_to_live_after_restart_s']}s after restart")
+    print(f"💾 Results written to {args.output}")
+    if result["missing"] or result["duplicates"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import multiprocessing
+import numpy as np
+
+# Run from a directory holding fraud_model.pkl and fraudTrain.csv (realtime/ or streamlit/)
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from fraud_detection import config, mqtt_io, tracing  # noqa: E402
+from fraud_detection.partitions import partition_of  # noqa: E402
+from fraud_detection.publisher import TransactionPublisher  # noqa: E402
+from fraud_detection.simulation import build_simulation_profile, generate_transactions  # noqa: E402
+from fraud_detection.supervisor import process_usage  # noqa: E402
+from load_test import start_broker  # noqa: E402
+
+MODES = ("threads", "processes")
+WINDOW_POLL = 0.0002  # seconds between checks of a full in-flight window
+
+
+def encoded_messages(args):
+    """(partition or None, payload) pairs, partitioned as the publisher's generator does"""
+    profile = build_simulation_profile(args.train_data, nrows=config.ENCODER_SAMPLE_ROWS)
+    df = generate_transactions(profile, args.messages, fraud_probability=0.05, rng=np.random.default_rng(args.seed))
+    return [(partition_of(record["cc_num"], args.partitions) if args.partitions else None,
+             mqtt_io.encode_transaction(tracing.stamp(record, seq))) for seq, record in enumerate(df.to_dict("records"))]
+
+
+def saturate(index, connections, messages, broker, port, args, start_at, results):
+    """Publish ``messages`` as fast as the in-flight windows of ``connections`` connections allow"""
+    clients = [mqtt_io.create_client(client_id=f"scaling-pub-{index}-{c}-{os.getpid()}") for c in range(connections)]
+    publisher = TransactionPublisher(clients, None, topic=args.topic, qos=args.qos, spool=None,
+                                     max_inflight=args.max_inflight, partitions=args.partitions)
+    for client in clients:
+        client.max_inflight_messages_set(args.max_inflight)
+        client.on_connect = publisher.on_connect
+        mqtt_io.connect(client, broker, port)
+        client.loop_start()
+    while not all(connected.is_set() for connected in publisher.connected):
+        time.sleep(0.01)
+    time.sleep(max(start_at - time.time(), 0))
+    started = time.monotonic()
+    for partition, message in messages:
+        route = publisher.route(message, partition)
+        while not publisher.can_publish(route[0]):
+            time.sleep(WINDOW_POLL)
+        publisher.publish(message, route)
+    deadline = time.monotonic() + 120
+    while publisher.stats()["acknowledged"] < publisher.published and time.monotonic() < deadline:
+        time.sleep(WINDOW_POLL)
+    elapsed = time.monotonic() - started
+    for client in clients:
+        client.disconnect()
+        client.loop_stop()
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    results.put({"index": index, "published": publisher.published, "acknowledged": publisher.stats()["acknowledged"],
+                 "elapsed": elapsed, "cpu_seconds": usage.ru_utime + usage.ru_stime})
+
+
+def run_case(mode, connections, messages, args, workdir):
+    """One broker, and either one process with ``connections`` connections or that many single-connection processes"""
+    broker_process, host, port = start_broker(args, workdir)
+    broker_cpu = process_usage(broker_process.pid).get("cpu_seconds", 0.0) if broker_process else 0.0
+    processes = connections if mode == "processes" else 1
+    results = multiprocessing.Queue()
+    start_at = time.time() + 1.0 + 0.1 * processes
+    children = [multiprocessing.Process(target=saturate, args=(i, connections // processes, messages[i::processes],
+                                                              host, port, args, start_at, results))
+                for i in range(processes)]
+    try:
+        for child in children:
+            child.start()
+        reports = [results.get(timeout=300) for _ in children]
+        for child in children:
+            child.join()
+        if broker_process:
+            broker_cpu = process_usage(broker_process.pid).get("cpu_seconds", 0.0) - broker_cpu
+    finally:
+        if broker_process:
+            broker_process.terminate()
+            broker_process.wait()
+    elapsed = max(report["elapsed"] for report in reports)
+    acknowledged = sum(report["acknowledged"] for report in reports)
+    return {
+        "mode": mode,
+        "connections": connections,
+        "processes": processes,
+        "published": sum(report["published"] for report in reports),
+        "acknowledged": acknowledged,
+        "seconds": round(elapsed, 3),
+        "msgs_per_s": round(acknowledged / elapsed, 1),
+        "publisher_cpu_ms_per_message": round(1000 * sum(r["cpu_seconds"] for r in reports) / max(acknowledged, 1), 4),
+        "broker_cpu_ms_per_message": round(1000 * broker_cpu / max(acknowledged, 1), 4) if broker_process else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish throughput against a local broker as the number of publisher connections grows")
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--mode", choices=(*MODES, "both"), default="both",
+                        help="K connections in one publisher process (threads), or K single-connection processes")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--qos", type=int, choices=[0, 1, 2], default=1)
+    parser.add_argument("--max-inflight", type=int, default=100, help="in-flight window of each connection")
+    parser.add_argument("--partitions", type=int, default=0, help="route by card partition instead of round-robin")
+    parser.add_argument("--broker", default="", help="host[:port] of an external broker; default runs fraud_detection.broker")
+    parser.add_argument("--topic", default="benchmarks/publisher_scaling")
+    parser.add_argument("--train-data", default=config.TRAIN_DATA_PATH)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    messages = encoded_messages(args)
+    modes = MODES if args.mode == "both" else (args.mode,)
+    print(f"🔹 {len(messages)} messages, QoS {args.qos}, {os.cpu_count()} CPU(s), "
+          f"{'partitioned' if args.partitions else 'round-robin'} over the connections")
+    print(f"{'mode':10} {'K':>3} {'msgs/s':>9} {'speedup':>8} {'seconds':>8} {'pub ms/msg':>11} {'broker ms/msg':>14}")
+    results = []
+    with tempfile.TemporaryDirectory(prefix="publisher-scaling-") as workdir:
+        for mode in modes:
+            baseline = None
+            for connections in args.connections:
+                result = run_case(mode, connections, messages, args, workdir)
+                baseline = baseline or result["msgs_per_s"]
+                result["speedup"] = round(result["msgs_per_s"] / baseline, 2)
+                results.append(result)
+                broker_cpu = "-" if result["broker_cpu_ms_per_message"] is None else f"{result['broker_cpu_ms_per_message']:.4f}"
+                print(f"{mode:10} {connections:3d} {result['msgs_per_s']:9.0f} {result['speedup']:7.2f}x {result['seconds']:8.2f} "
+                      f"{result['publisher_cpu_ms_per_message']:11.4f} {broker_cpu:>14}")
+                if result["acknowledged"] < result["published"]:
+                    print(f"⚠️ {result['published'] - result['acknowledged']} publishes were never acknowledged")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": sys.version.split()[0], "machine": platform.machine(), "cpus": os.cpu_count(),
+                       "messages": len(messages), "qos": args.qos, "results": results}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
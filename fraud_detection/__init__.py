@@ -0,0 +1,12 @@
+"""Shared fraud detection library used by the realtime/ and streamlit/ entry points.
+
+- ``config``: file paths, MQTT settings and the decision threshold
+- ``features``: feature engineering and the model's feature layout
+- ``scoring``: encoders/scaler fitting and vectorized model scoring
+- ``simulation``: random transactions shaped like fraudTrain.csv rows
+- ``mqtt_io``: MQTT client construction and payload encoding
+- ``publisher`` / ``subscriber`` / ``training``: the MQTT publisher, the
+  fraud detection service and the model training script
+- ``tracing``: trace stamping and latency histograms
+- ``broker``: a minimal MQTT broker for hosts without mosquitto
+"""
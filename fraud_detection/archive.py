@@ -0,0 +1,275 @@
+"""Hourly-partitioned Parquet archive of every scored transaction.
+
+Each verdict is stored with the raw transaction fields, the engineered features,
+the probability, the prediction and the model version. Layout (Hive style, UTC
+hours):
+
+    <root>/date=2026-10-18/hour=23/part-<ns>-<pid>.parquet
+
+pyarrow.dataset therefore prunes whole partitions from a time filter, and
+pushes column filters down to row-group statistics. The subscriber flushes its
+buffer into one file per hour touched. compact() merges the finished hours'
+small files into a single file. Every compacted file lists its sources in its
+metadata, so a crash between writing it and deleting them is repaired by the
+next compaction instead of leaving duplicates.
+"""
+import os
+import glob
+import json
+import time
+import logging
+import argparse
+import threading
+from datetime import datetime, timezone
+import pandas as pd
+from . import config
+from .features import engineer_features
+
+# Raw fraudTrain.csv fields, engineered features and the verdict, with their archive types
+RAW_FIELDS = (
+    ("trans_date_trans_time", "string"), ("cc_num", "int64"), ("merchant", "string"), ("category", "string"),
+    ("amt", "float64"), ("first", "string"), ("last", "string"), ("gender", "string"), ("street", "string"),
+    ("city", "string"), ("state", "string"), ("zip", "int64"), ("lat", "float64"), ("long", "float64"),
+    ("city_pop", "int64"), ("job", "string"), ("dob", "string"), ("trans_num", "string"), ("unix_time", "int64"),
+    ("merch_lat", "float64"), ("merch_long", "float64"), ("is_fraud", "int64"),
+)
+FEATURE_FIELDS = (
+    ("geo_distance", "float64"), ("transaction_hour", "int64"), ("transaction_day", "int64"),
+    ("transaction_month", "int64"), ("age", "int64"),
+)
+VERDICT_FIELDS = (
+    ("scored_at", "timestamp"), ("fraud_probability", "float64"), ("is_fraud_predicted", "int64"), ("model_version", "string"),
+)
+FIELDS = RAW_FIELDS + FEATURE_FIELDS + VERDICT_FIELDS
+RAW_COLUMNS = [name for name, _ in RAW_FIELDS]
+FEATURE_COLUMNS = [name for name, _ in FEATURE_FIELDS]
+COMPACTED_FROM = b"compacted_from"
+
+
+def archive_schema():
+    import pyarrow as pa
+    types = {"string": pa.string(), "int64": pa.int64(), "float64": pa.float64(), "timestamp": pa.timestamp("ms", tz="UTC")}
+    return pa.schema([(name, types[kind]) for name, kind in FIELDS])
+
+
+def to_table(rows):
+    """Arrow table in the archive schema; unknown keys are dropped, missing or malformed values become null"""
+    import pyarrow as pa
+    df = pd.DataFrame.from_records(rows)
+    try:
+        df = engineer_features(df)
+    except (ValueError, TypeError) as e:
+        logging.warning(f"Archive: could not derive features for a batch: {e}")
+    df = df.reindex(columns=[name for name, _ in FIELDS])
+    for name, kind in FIELDS:
+        if kind == "string":
+            df[name] = df[name].astype("string")
+        elif kind == "int64":
+            df[name] = pd.to_numeric(df[name], errors="coerce").round().astype("Int64")
+        elif kind == "float64":
+            df[name] = pd.to_numeric(df[name], errors="coerce")
+        else:
+            df[name] = pd.to_datetime(df[name], unit="s", utc=True).dt.floor("ms")
+    return pa.Table.from_pandas(df, schema=archive_schema(), preserve_index=False)
+
+
+def partition_dir(root, scored_at):
+    hour = datetime.fromtimestamp(scored_at, tz=timezone.utc)
+    return os.path.join(root, f"date={hour:%Y-%m-%d}", f"hour={hour.hour:02d}")
+
+
+def write_part(directory, table, metadata=None, suffix=""):
+    """Write ``table`` under a hidden temporary name, then rename it into place"""
+    import pyarrow.parquet as pq
+    os.makedirs(directory, exist_ok=True)
+    name = f"part-{time.time_ns()}-{os.getpid()}{suffix}.parquet"
+    temporary = os.path.join(directory, f".{name}.tmp")  # dotfiles are ignored by pyarrow.dataset
+    if metadata:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    pq.write_table(table, temporary, compression="zstd")
+    os.replace(temporary, os.path.join(directory, name))
+    return os.path.join(directory, name)
+
+
+def _visible_parts(partition):
+    return sorted(glob.glob(os.path.join(partition, "part-*.parquet")))
+
+
+def _partition_end(partition):
+    date = os.path.basename(os.path.dirname(partition)).split("=", 1)[1]
+    hour = int(os.path.basename(partition).split("=", 1)[1])
+    return datetime.strptime(f"{date} {hour}", "%Y-%m-%d %H").replace(tzinfo=timezone.utc).timestamp() + 3600
+
+
+def _remove_compacted_sources(partition):
+    """Finish an interrupted compaction: delete sources already merged into a compacted file"""
+    import pyarrow.parquet as pq
+    for path in glob.glob(os.path.join(partition, "part-*-compacted.parquet")):
+        metadata = pq.read_schema(path).metadata or {}
+        for name in json.loads(metadata.get(COMPACTED_FROM, b"[]")):
+            source = os.path.join(partition, name)
+            if source != path and os.path.exists(source):
+                os.remove(source)
+
+
+def compact_archive(root=config.ARCHIVE_DIR, now=None, min_files=2):
+    """Merge the files of every finished hour that has at least ``min_files`` into one; returns files removed"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    now = now or time.time()
+    removed = 0
+    for partition in sorted(glob.glob(os.path.join(root, "date=*", "hour=*"))):
+        if _partition_end(partition) > now:
+            continue  # still receiving verdicts
+        _remove_compacted_sources(partition)
+        parts = _visible_parts(partition)
+        if len(parts) < min_files:
+            continue
+        table = pa.concat_tables([pq.ParquetFile(path).read() for path in parts], promote_options="default")
+        table = table.sort_by("scored_at").replace_schema_metadata(None)
+        write_part(partition, table, {COMPACTED_FROM: json.dumps([os.path.basename(p) for p in parts]).encode()}, suffix="-compacted")
+        for path in parts:
+            os.remove(path)
+        removed += len(parts)
+    return removed
+
+
+def read_archive(root=config.ARCHIVE_DIR, start=None, end=None, columns=None, filter=None):
+    """Archived verdicts between ``start`` and ``end`` (UTC "YYYY-mm-dd HH:MM:SS" or anything pd.Timestamp takes).
+
+    Partitions outside the range are never opened; ``filter`` is an extra
+    pyarrow.dataset expression, e.g. ``ds.field("is_fraud") == 1``.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    partitioning = ds.partitioning(pa.schema([("date", pa.string()), ("hour", pa.int32())]), flavor="hive")
+    dataset = ds.dataset(root, format="parquet", partitioning=partitioning)
+    expression = filter
+    for bound, inclusive in ((start, True), (end, False)):
+        if bound is None:
+            continue
+        moment = pd.Timestamp(bound)
+        moment = (moment.tz_localize("UTC") if moment.tzinfo is None else moment.tz_convert("UTC")).floor("ms")
+        day, hour = moment.strftime("%Y-%m-%d"), moment.hour
+        scored_at = pa.scalar(moment.to_pydatetime(), pa.timestamp("ms", tz="UTC"))
+        if inclusive:
+            clause = (ds.field("date") > day) | ((ds.field("date") == day) & (ds.field("hour") >= hour))
+            clause = clause & (ds.field("scored_at") >= scored_at)
+        else:
+            clause = (ds.field("date") < day) | ((ds.field("date") == day) & (ds.field("hour") <= hour))
+            clause = clause & (ds.field("scored_at") < scored_at)
+        expression = clause if expression is None else expression & clause
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+class TransactionArchiver:
+    """Buffers verdicts and writes them to the archive from a background thread.
+
+    A row counts as archived once a flush() that took it has returned. When a
+    flush fails, the rows of the hours not yet written are queued again, and
+    hours already written are not rewritten.
+
+    Finished hours are compacted every ``compact_interval`` seconds. Compaction
+    takes no lock, so when several processes write to one archive, only one
+    of them may compact; the others pass ``compact_interval=0``.
+    """
+
+    def __init__(self, root=config.ARCHIVE_DIR, model_version=None, flush_rows=50000, flush_interval=300.0, compact_interval=3600.0):
+        archive_schema()  # fail at startup, not at the first flush, when pyarrow is missing
+        self.root = root
+        self.model_version = model_version
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.pending = []
+        self.pending_lock = threading.Lock()
+        self.flush_lock = threading.Lock()  # one flush at a time, so a requeued hour is never written twice
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.written = 0
+        self.files = 0
+
+    def add(self, transaction, fraud_probability, prediction):
+        row = dict(transaction)
+        row["scored_at"] = time.time()
+        row["fraud_probability"] = float(fraud_probability)
+        row["is_fraud_predicted"] = int(prediction)
+        row["model_version"] = self.model_version
+        with self.pending_lock:
+            self.pending.append(row)
+            full = len(self.pending) >= self.flush_rows
+        if full:
+            self.wake.set()
+
+    def flush(self):
+        """Write the buffered rows, one file per hour touched; returns the number of rows written"""
+        with self.flush_lock:
+            with self.pending_lock:
+                rows, self.pending = self.pending, []
+            partitions = {}
+            for row in rows:
+                partitions.setdefault(partition_dir(self.root, row["scored_at"]), []).append(row)
+            written = 0
+            try:
+                while partitions:
+                    directory, partition_rows = next(iter(partitions.items()))
+                    write_part(directory, to_table(partition_rows))
+                    del partitions[directory]
+                    self.files += 1
+                    self.written += len(partition_rows)
+                    written += len(partition_rows)
+            except Exception:
+                with self.pending_lock:
+                    self.pending[:0] = [row for partition_rows in partitions.values() for row in partition_rows]
+                raise
+            return written
+
+    def _run(self):
+        next_compaction = time.monotonic() + self.compact_interval
+        while not self.stopped.is_set():
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            try:
+                self.flush()
+                if self.compact_interval and time.monotonic() >= next_compaction:
+                    removed = compact_archive(self.root)
+                    if removed:
+                        logging.info(f"Archive: compacted {removed} files")
+                    next_compaction = time.monotonic() + self.compact_interval
+            except Exception as e:
+                logging.error(f"Archive write failed: {e}")
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True, name="transaction-archiver")
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.stopped.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join(timeout=30)
+        self.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain or inspect the scored-transaction archive")
+    parser.add_argument("command", choices=["compact", "summary"])
+    parser.add_argument("--root", default=config.ARCHIVE_DIR)
+    parser.add_argument("--min-files", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    if args.command == "compact":
+        print(f"🗜️ Compacted {compact_archive(args.root, min_files=args.min_files)} files")
+        return
+    import pyarrow.parquet as pq
+    for partition in sorted(glob.glob(os.path.join(args.root, "date=*", "hour=*"))):
+        parts = _visible_parts(partition)
+        rows = sum(pq.ParquetFile(path).metadata.num_rows for path in parts)
+        size = sum(os.path.getsize(path) for path in parts)
+        print(f"{os.path.relpath(partition, args.root):24} {len(parts):4} files {rows:10,} rows {size / 2**20:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+"""Minimal in-process MQTT 3.1.1 broker.
+
+Enough of the protocol for load tests and headless runs on machines without
+mosquitto: CONNECT, PUBLISH at QoS 0/1/2, SUBSCRIBE/UNSUBSCRIBE with ``+`` and
+``#`` wildcards, PINGREQ and DISCONNECT. Clients connecting with
+clean_session=0 get a persistent session: subscriptions survive a disconnect,
+QoS 1/2 messages are queued while the client is away (up to ``max_queued``),
+and unacknowledged ones are resent on reconnect. At most ``max_inflight``
+QoS 1/2 messages are unacknowledged per client; the rest wait in the same
+queue. A ``$share/<group>/<filter>`` subscription (as in mosquitto) shares
+the matching messages among the group's members, round-robin over the
+connected ones. Retained messages, wills, authentication and keepalive
+enforcement are not implemented.
+"""
+import time
+import struct
+import asyncio
+import argparse
+import threading
+from collections import deque
+from . import config
+
+CONNECT, CONNACK, PUBLISH, PUBACK, PUBREC, PUBREL, PUBCOMP = range(1, 8)
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK, PINGREQ, PINGRESP, DISCONNECT = range(8, 15)
+
+
+def _encode_length(length):
+    encoded = bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        encoded.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(encoded)
+
+
+def _packet(packet_type, flags, body=b""):
+    return bytes([packet_type << 4 | flags]) + _encode_length(len(body)) + body
+
+
+def _string(data):
+    return struct.pack("!H", len(data)) + data
+
+
+def _read_string(body, pos):
+    length = struct.unpack_from("!H", body, pos)[0]
+    return body[pos + 2:pos + 2 + length], pos + 2 + length
+
+
+def topic_matches(topic_filter, topic):
+    """MQTT topic filter matching: ``+`` is one level, a trailing ``#`` any number of levels"""
+    filter_levels = topic_filter.split("/")
+    topic_levels = topic.split("/")
+    if topic.startswith("$") and filter_levels[0] in ("+", "#"):
+        return False
+    for i, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if i >= len(topic_levels) or (level != "+" and level != topic_levels[i]):
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+def shared_subscription(topic_filter):
+    """(group, filter) for ``$share/<group>/<filter>``, else (None, topic_filter)"""
+    if topic_filter.startswith("$share/"):
+        _, group, real_filter = topic_filter.split("/", 2)
+        return group, real_filter
+    return None, topic_filter
+
+
+async def _read_packet(reader):
+    first = (await reader.readexactly(1))[0]
+    length, multiplier = 0, 1
+    while True:
+        byte = (await reader.readexactly(1))[0]
+        length += (byte & 0x7F) * multiplier
+        if not byte & 0x80:
+            break
+        multiplier *= 128
+    body = await reader.readexactly(length) if length else b""
+    return first >> 4, first & 0x0F, body
+
+
+class _Session:
+    """State of one client id: subscriptions, unacknowledged deliveries and the queue behind them.
+
+    A clean session ends with its connection; a persistent one outlives it.
+    """
+
+    def __init__(self, client_id, clean):
+        self.client_id = client_id
+        self.clean = clean
+        self.connection = None
+        self.subscriptions = {}
+        self.inflight = {}  # packet id -> [topic, payload, qos, released] awaiting PUBACK/PUBCOMP, in send order
+        self.queue = deque()  # (topic, payload, qos) waiting for a connection or a free in-flight slot
+        self.inbound_qos2 = set()  # packet ids delivered but not yet released
+        self.next_id = 0
+
+    def _packet_id(self):
+        for _ in range(65535):
+            self.next_id = self.next_id % 65535 + 1
+            if self.next_id not in self.inflight:
+                return self.next_id
+        return None
+
+    def publish(self, topic, payload, qos):
+        packet_id = self._packet_id()
+        self.inflight[packet_id] = [topic, payload, qos, False]
+        self.connection.send(_packet(PUBLISH, qos << 1, _string(topic) + struct.pack("!H", packet_id) + payload))
+
+    def resend(self):
+        """Retransmit every unacknowledged delivery after a reconnect, with the DUP flag"""
+        for packet_id, (topic, payload, qos, released) in self.inflight.items():
+            if released:
+                self.connection.send(_packet(PUBREL, 2, struct.pack("!H", packet_id)))
+            else:
+                self.connection.send(_packet(PUBLISH, 0x08 | qos << 1, _string(topic) + struct.pack("!H", packet_id) + payload))
+
+
+class _Connection:
+    """One open socket, attached to a session by CONNECT"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.session = None
+
+    def send(self, data):
+        self.writer.write(data)
+
+
+class MQTTBroker:
+    """asyncio MQTT broker, run on a daemon thread with start() or in the foreground with serve_forever()"""
+
+    def __init__(self, host="127.0.0.1", port=config.MQTT_PORT, max_buffer_bytes=64 * 2**20, max_inflight=1000, max_queued=100000):
+        self.host = host
+        self.port = port
+        self.max_buffer_bytes = max_buffer_bytes
+        self.max_inflight = min(max_inflight, 65535)
+        self.max_queued = max_queued
+        self.sessions = {}
+        self.routes = {}  # topic -> ([(session, granted QoS)], [(share group, members)]), rebuilt when subscriptions change
+        self.share_turns = {}  # share group -> deliveries so far, for round-robin
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.started = time.time()
+        self.loop = None
+        self.server = None
+        self.thread = None
+
+    def stats(self):
+        return {
+            "clients": sum(1 for session in self.sessions.values() if session.connection is not None),
+            "sessions": len(self.sessions),
+            "queued": sum(len(session.queue) for session in self.sessions.values()),
+            "inflight": sum(len(session.inflight) for session in self.sessions.values()),
+            "received": self.received,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "uptime_seconds": round(time.time() - self.started, 1),
+        }
+
+    def _targets(self, topic):
+        targets = self.routes.get(topic)
+        if targets is None:
+            direct, groups = [], {}
+            for session in self.sessions.values():
+                granted = []
+                for topic_filter, qos in session.subscriptions.items():
+                    group, topic_filter = shared_subscription(topic_filter)
+                    if not topic_matches(topic_filter, topic):
+                        continue
+                    if group is None:
+                        granted.append(qos)
+                    else:
+                        groups.setdefault(group, []).append((session, qos))
+                if granted:
+                    direct.append((session, max(granted)))
+            targets = self.routes[topic] = (direct, list(groups.items()))
+        return targets
+
+    def _share_member(self, group, members):
+        """Next member of a shared subscription, round-robin over the connected ones"""
+        turn = self.share_turns.get(group, 0)
+        self.share_turns[group] = turn + 1
+        connected = [member for member in members if member[0].connection is not None]
+        candidates = connected or members  # all away: queue in a persistent member's session
+        return candidates[turn % len(candidates)]
+
+    def route(self, topic, payload, qos):
+        self.received += 1
+        topic_bytes = topic.encode()
+        direct, groups = self._targets(topic)
+        for session, granted in direct:
+            self.deliver(session, topic_bytes, payload, min(qos, granted))
+        for group, members in groups:
+            session, granted = self._share_member(group, members)
+            self.deliver(session, topic_bytes, payload, min(qos, granted))
+
+    def deliver(self, session, topic, payload, qos):
+        """Send a PUBLISH to ``session`` or queue it.
+
+        QoS 0 is dropped while the client is away or its socket buffer is over
+        the limit. QoS 1/2 waits in the session queue while the client is away
+        or has ``max_inflight`` unacknowledged messages, and is dropped beyond
+        ``max_queued``.
+        """
+        connection = session.connection
+        if qos == 0:
+            if connection is None or connection.writer.transport.get_write_buffer_size() > self.max_buffer_bytes:
+                self.dropped += 1
+                return
+            connection.send(_packet(PUBLISH, 0, _string(topic) + payload))
+        elif connection is None or session.queue or len(session.inflight) >= self.max_inflight:
+            if len(session.queue) >= self.max_queued:
+                self.dropped += 1
+            else:
+                session.queue.append((topic, payload, qos))
+            return
+        else:
+            session.publish(topic, payload, qos)
+        self.delivered += 1
+
+    def _pump(self, session):
+        """Move queued messages into free in-flight slots"""
+        while session.queue and session.connection is not None and len(session.inflight) < self.max_inflight:
+            session.publish(*session.queue.popleft())
+            self.delivered += 1
+
+    def _handle(self, connection, packet_type, flags, body):
+        session = connection.session
+        if packet_type == PUBLISH:
+            qos = flags >> 1 & 3
+            topic, pos = _read_string(body, 0)
+            packet_id = None
+            if qos:
+                packet_id = struct.unpack_from("!H", body, pos)[0]
+                pos += 2
+            if qos < 2:
+                self.route(topic.decode(), body[pos:], qos)
+                if qos == 1:
+                    connection.send(_packet(PUBACK, 0, struct.pack("!H", packet_id)))
+            else:
+                if packet_id not in session.inbound_qos2:
+                    session.inbound_qos2.add(packet_id)
+                    self.route(topic.decode(), body[pos:], qos)
+                connection.send(_packet(PUBREC, 0, struct.pack("!H", packet_id)))
+        elif packet_type == PUBACK or packet_type == PUBCOMP:
+            session.inflight.pop(struct.unpack_from("!H", body)[0], None)
+            self._pump(session)
+        elif packet_type == PUBREC:
+            delivery = session.inflight.get(struct.unpack_from("!H", body)[0])
+            if delivery is not None:
+                delivery[3] = True
+            connection.send(_packet(PUBREL, 2, body[:2]))
+        elif packet_type == PUBREL:
+            session.inbound_qos2.discard(struct.unpack_from("!H", body)[0])
+            connection.send(_packet(PUBCOMP, 0, body[:2]))
+        elif packet_type == SUBSCRIBE:
+            packet_id, pos, granted = body[:2], 2, bytearray()
+            while pos < len(body):
+                topic_filter, pos = _read_string(body, pos)
+                qos = min(body[pos], 2)
+                pos += 1
+                session.subscriptions[topic_filter.decode()] = qos
+                granted.append(qos)
+            self.routes.clear()
+            connection.send(_packet(SUBACK, 0, packet_id + bytes(granted)))
+        elif packet_type == UNSUBSCRIBE:
+            pos = 2
+            while pos < len(body):
+                topic_filter, pos = _read_string(body, pos)
+                session.subscriptions.pop(topic_filter.decode(), None)
+            self.routes.clear()
+            connection.send(_packet(UNSUBACK, 0, body[:2]))
+        elif packet_type == PINGREQ:
+            connection.send(_packet(PINGRESP, 0))
+
+    def _connect(self, connection, body):
+        _, pos = _read_string(body, 0)  # protocol name
+        clean = bool(body[pos + 1] & 0x02)
+        pos += 4  # level, flags, keepalive
+        client_id, pos = _read_string(body, pos)
+        client_id = client_id.decode() or f"auto-{id(connection):x}"
+        session = self.sessions.get(client_id)
+        if session is not None and session.connection is not None:
+            session.connection.writer.close()  # a new connection with the same id takes over
+        present = session is not None and not clean
+        if not present:
+            session = self.sessions[client_id] = _Session(client_id, clean)
+        session.clean = clean
+        session.connection = connection
+        connection.session = session
+        self.routes.clear()
+        connection.send(_packet(CONNACK, 0, bytes([1 if present else 0, 0])))
+        if present:
+            session.resend()
+            self._pump(session)
+
+    def _disconnect(self, connection):
+        session = connection.session
+        if session is None or session.connection is not connection:
+            return  # never connected, or taken over by a newer connection
+        session.connection = None
+        if session.clean:
+            del self.sessions[session.client_id]
+            self.routes.clear()
+
+    async def _serve(self, reader, writer):
+        connection = _Connection(writer)
+        try:
+            packet_type, _, body = await _read_packet(reader)
+            if packet_type != CONNECT:
+                return
+            self._connect(connection, body)
+            while True:
+                packet_type, flags, body = await _read_packet(reader)
+                if packet_type == DISCONNECT:
+                    break
+                self._handle(connection, packet_type, flags, body)
+                if writer.transport.get_write_buffer_size() > self.max_buffer_bytes:
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, struct.error, IndexError):
+            pass
+        finally:
+            self._disconnect(connection)
+            writer.close()
+
+    async def _start_server(self):
+        self.server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    def start(self):
+        """Listen from a daemon thread; returns once the port is bound (``port=0`` picks a free one)"""
+        ready = threading.Event()
+        failure = []
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            try:
+                self.loop.run_until_complete(self._start_server())
+            except OSError as e:
+                failure.append(e)
+                ready.set()
+                return
+            ready.set()
+            self.loop.run_forever()
+            self.loop.close()
+
+        self.thread = threading.Thread(target=run, daemon=True, name="mqtt-broker")
+        self.thread.start()
+        ready.wait()
+        if failure:
+            raise failure[0]
+        return self
+
+    async def _shutdown(self):
+        self.server.close()
+        # Closing the sockets ends each connection's task at its next read; only stragglers are cancelled
+        for session in self.sessions.values():
+            if session.connection is not None:
+                session.connection.writer.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        done, pending = await asyncio.wait(tasks, timeout=2) if tasks else (set(), set())
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    def stop(self):
+        if self.loop is not None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=5)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=5)
+
+    def serve_forever(self):
+        async def run():
+            server = await self._start_server()
+            async with server:
+                await server.serve_forever()
+
+        asyncio.run(run())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a minimal MQTT broker (for hosts without mosquitto)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=config.MQTT_PORT)
+    parser.add_argument("--max-inflight", type=int, default=1000, help="unacknowledged QoS 1/2 messages per client")
+    parser.add_argument("--max-queued", type=int, default=100000, help="messages queued per persistent session")
+    parser.add_argument("--stats-interval", type=float, default=0, help="seconds between stats lines (0 disables)")
+    args = parser.parse_args(argv)
+
+    broker = MQTTBroker(args.host, args.port, max_inflight=args.max_inflight, max_queued=args.max_queued)
+    if args.stats_interval > 0:
+        def report():
+            while True:
+                time.sleep(args.stats_interval)
+                print(f"📊 {broker.stats()}", flush=True)
+
+        threading.Thread(target=report, daemon=True, name="broker-stats").start()
+    print(f"✅ MQTT broker listening on {args.host}:{args.port}", flush=True)
+    try:
+        broker.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⛔ Broker stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import os
+
+# Paths are relative to the working directory, like the scripts have always used them
+MODEL_PATH = os.environ.get("FRAUD_MODEL_PATH", "fraud_model.pkl")
+TRAIN_DATA_PATH = os.environ.get("FRAUD_TRAIN_DATA_PATH", "fraudTrain.csv")
+ENCODER_SAMPLE_ROWS = 10000
+FRAUD_THRESHOLD = 0.5
+# SQLite history of every verdict written by the subscriber (fraud_detection/store.py)
+STORE_PATH = os.environ.get("FRAUD_STORE_PATH", "transactions.db")
+STORE_RETENTION_SECONDS = float(os.environ.get("FRAUD_STORE_RETENTION_SECONDS", 7 * 24 * 3600))
+# Hourly Parquet archive of every verdict, kept indefinitely (fraud_detection/archive.py)
+ARCHIVE_DIR = os.environ.get("FRAUD_ARCHIVE_DIR", "archive")
+# Redelivered transactions (same trans_num) are dropped if seen within the window (fraud_detection/dedup.py)
+DEDUP_WINDOW_SECONDS = float(os.environ.get("FRAUD_DEDUP_WINDOW_SECONDS", 3600))
+DEDUP_CAPACITY = 1_000_000
+DEDUP_ERROR_RATE = 1e-6
+# Publisher spill queue for broker outages (fraud_detection/spool.py)
+SPOOL_DIR = os.environ.get("FRAUD_SPOOL_DIR", "publisher_spool")
+
+MQTT_BROKER = os.environ.get("MQTT_BROKER", "localhost")
+MQTT_PORT = int(os.environ.get("MQTT_PORT", 1883))
+MQTT_TOPIC = os.environ.get("MQTT_TOPIC", "credit_card/transactions")
+MQTT_KEEPALIVE = 60
+# Partitioned topics <MQTT_TOPIC>/<p>, p = crc32(cc_num) mod MQTT_PARTITIONS; 0 keeps the single topic (fraud_detection/partitions.py)
+MQTT_PARTITIONS = int(os.environ.get("MQTT_PARTITIONS", 0))
+# Heartbeats of the subscriber workers dividing the partitions among themselves
+MQTT_MEMBERSHIP_TOPIC = os.environ.get("MQTT_MEMBERSHIP_TOPIC", "credit_card/workers")
+# Stable subscriber id, so the broker keeps its session and queues transactions while it is down
+MQTT_CLIENT_ID = os.environ.get("MQTT_CLIENT_ID", "fraud-subscriber")
+# Operational commands such as {"command": "profile", "seconds": 30}
+MQTT_ADMIN_TOPIC = os.environ.get("MQTT_ADMIN_TOPIC", "credit_card/admin")
@@ -0,0 +1,160 @@
+"""Suppression of redelivered transactions.
+
+QoS 1 delivers at least once, QoS 2 is exactly-once only within one session,
+and the publisher re-queues a message whose publish failed, so the same
+transaction can arrive twice. DuplicateFilter remembers the ids (trans_num) of
+recent transactions in two rotating Bloom filters. Each id is added to the
+current filter, and a lookup checks the current and the previous one. When the
+current filter reaches ``capacity`` ids or ``window_seconds`` of age, it becomes
+the previous one and the oldest is discarded.
+
+The cost of this is fixed: an id is remembered for at least one window (or one
+filter's capacity), memory is two fixed-size bit arrays, and a check is one
+hash plus k bit probes. False positives make a new transaction look like a
+duplicate. Each filter is sized for half the configured rate, and stats()
+reports the rate implied by the bits actually set.
+"""
+import os
+import json
+import math
+import time
+import hashlib
+import threading
+
+HEADER_END = b"\n"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter for string keys, with double hashing over one blake2b digest"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0  # keys added that were not already (apparently) present
+        self.set_bits = 0
+
+    def positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def __contains__(self, key):
+        return self.contains_positions(self.positions(key))
+
+    def contains_positions(self, positions):
+        bits = self.bits
+        for p in positions:
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    def add(self, key, positions=None):
+        """Add ``key``; True if it was (probably) present already"""
+        bits = self.bits
+        present = True
+        for p in positions or self.positions(key):
+            mask = 1 << (p & 7)
+            if not bits[p >> 3] & mask:
+                bits[p >> 3] |= mask
+                self.set_bits += 1
+                present = False
+        if not present:
+            self.count += 1
+        return present
+
+    def false_positive_rate(self):
+        """Probability that a key never added is reported present, given the bits set now"""
+        return (self.set_bits / self.size) ** self.hashes
+
+
+class DuplicateFilter:
+    """Time- and memory-bounded seen-set of transaction ids; thread-safe"""
+
+    def __init__(self, capacity=1_000_000, error_rate=1e-6, window_seconds=3600.0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.window_seconds = window_seconds
+        self.lock = threading.Lock()
+        self.current = BloomFilter(capacity, error_rate / 2)
+        self.previous = BloomFilter(capacity, error_rate / 2)
+        self.rotated_at = time.time()
+        self.checked = 0
+        self.duplicates = 0
+        self.rotations = 0
+
+    def _rotate_if_due(self):
+        age = time.time() - self.rotated_at
+        if self.current.count < self.capacity and age < self.window_seconds:
+            return
+        # After two idle windows both generations have expired
+        self.previous = self.current if age < 2 * self.window_seconds else BloomFilter(self.capacity, self.error_rate / 2)
+        self.current = BloomFilter(self.capacity, self.error_rate / 2)
+        self.rotated_at = time.time()
+        self.rotations += 1
+
+    def seen(self, key):
+        """True if ``key`` was seen within the window (or collides with one that was); otherwise remember it"""
+        with self.lock:
+            self._rotate_if_due()
+            self.checked += 1
+            positions = self.current.positions(key)  # both generations have the same size and hash count
+            duplicate = self.previous.contains_positions(positions)
+            if self.current.add(key, positions):  # also refreshes ids found only in the previous generation
+                duplicate = True
+            if duplicate:
+                self.duplicates += 1
+            return duplicate
+
+    def stats(self):
+        with self.lock:
+            current, previous = self.current.false_positive_rate(), self.previous.false_positive_rate()
+            return {
+                "checked": self.checked,
+                "duplicates": self.duplicates,
+                "rotations": self.rotations,
+                "window_seconds": self.window_seconds,
+                "capacity": self.capacity,
+                "keys": {"current": self.current.count, "previous": self.previous.count},
+                "memory_bytes": len(self.current.bits) + len(self.previous.bits),
+                "hashes": self.current.hashes,
+                "configured_fp_rate": self.error_rate,
+                "estimated_fp_rate": 1 - (1 - current) * (1 - previous),
+            }
+
+    def save(self, path):
+        """Write both generations to ``path`` (atomically), so a restart keeps suppressing redeliveries"""
+        with self.lock:
+            header = {
+                "capacity": self.capacity, "error_rate": self.error_rate, "window_seconds": self.window_seconds,
+                "rotated_at": self.rotated_at,
+                "generations": [{"count": f.count, "set_bits": f.set_bits} for f in (self.current, self.previous)],
+            }
+            temporary = f"{path}.tmp"
+            with open(temporary, "wb") as f:
+                f.write(json.dumps(header).encode() + HEADER_END)
+                f.write(self.current.bits)
+                f.write(self.previous.bits)
+            os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            dedup = cls(header["capacity"], header["error_rate"], header["window_seconds"])
+            for bloom, generation in zip((dedup.current, dedup.previous), header["generations"]):
+                bloom.bits = bytearray(f.read(len(bloom.bits)))
+                bloom.count = generation["count"]
+                bloom.set_bits = generation["set_bits"]
+        dedup.rotated_at = header["rotated_at"]
+        return dedup
+
+
+def transaction_key(transaction):
+    """Id used for duplicate suppression, or None when the message has none"""
+    key = transaction.get("trans_num")
+    return None if key is None else str(key)
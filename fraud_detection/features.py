@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+categorical_cols = ['merchant', 'category', 'gender', 'city', 'state', 'job']
+selected_features = ['amt', 'geo_distance', 'transaction_hour', 'transaction_day',
+                     'transaction_month', 'age', 'city_pop', 'merchant', 'category',
+                     'gender', 'city', 'state', 'job']
+drop_cols = ['trans_date_trans_time', 'dob', 'Unnamed: 0', 'first', 'last', 'street', 'trans_num', 'unix_time', 'cc_num']
+
+
+def engineer_features(df):
+    """Add the derived columns from the training script that are not already present"""
+    if 'trans_date_trans_time' in df.columns:
+        trans_time = pd.to_datetime(df['trans_date_trans_time'])
+        if 'transaction_hour' not in df.columns:
+            df['transaction_hour'] = trans_time.dt.hour
+        if 'transaction_day' not in df.columns:
+            df['transaction_day'] = trans_time.dt.day
+        if 'transaction_month' not in df.columns:
+            df['transaction_month'] = trans_time.dt.month
+        if 'age' not in df.columns and 'dob' in df.columns:
+            df['age'] = trans_time.dt.year - pd.to_datetime(df['dob']).dt.year
+    if 'geo_distance' not in df.columns and {'lat', 'long', 'merch_lat', 'merch_long'}.issubset(df.columns):
+        df['geo_distance'] = np.sqrt((df['lat'] - df['merch_lat'])**2 + (df['long'] - df['merch_long'])**2)
+    return df
+
+
+def prepare_training_frame(df):
+    """Clean, engineer and drop identifier columns the way the model was trained"""
+    df = df.dropna()
+    df = engineer_features(df.copy())
+    return df.drop(columns=drop_cols, errors='ignore')
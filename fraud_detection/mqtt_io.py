@@ -0,0 +1,63 @@
+import json
+import threading
+import numpy as np
+import paho.mqtt.client as mqtt
+from .config import MQTT_BROKER, MQTT_PORT, MQTT_KEEPALIVE
+
+
+def create_client(on_connect=None, on_message=None, on_disconnect=None, client_id="", clean_session=None, manual_ack=False):
+    """A paho client on the v2 callback API with the given callbacks attached.
+
+    ``clean_session=False`` with a fixed ``client_id`` keeps the subscriptions
+    and queued messages across disconnects; with ``manual_ack`` a QoS 1/2
+    message is acknowledged only by ``client.ack(mid, qos)``.
+    """
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id, clean_session=clean_session, manual_ack=manual_ack)
+    if on_connect is not None:
+        client.on_connect = on_connect
+    if on_message is not None:
+        client.on_message = on_message
+    if on_disconnect is not None:
+        client.on_disconnect = on_disconnect
+    return client
+
+
+def connect(client, broker=MQTT_BROKER, port=MQTT_PORT, keepalive=MQTT_KEEPALIVE):
+    client.connect(broker, port, keepalive)
+    return client
+
+
+def _json_default(value):
+    # Rows from the vectorized generators carry numpy scalars
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_transaction(transaction):
+    return json.dumps(transaction, default=_json_default)
+
+
+def decode_transaction(payload):
+    return json.loads(payload.decode() if isinstance(payload, (bytes, bytearray)) else payload)
+
+
+def probe_broker(broker=MQTT_BROKER, port=MQTT_PORT, timeout=2.0):
+    """True if the broker accepts a connection within ``timeout`` seconds.
+
+    Socket errors (nothing listening, unknown host) propagate to the caller.
+    """
+    accepted = threading.Event()
+
+    def on_connect(client, userdata, flags, rc, properties=None):
+        if rc == 0:
+            accepted.set()
+
+    client = create_client(on_connect=on_connect)
+    client.connect(broker, port, 5)
+    client.loop_start()
+    try:
+        return accepted.wait(timeout)
+    finally:
+        client.loop_stop()
+        client.disconnect()
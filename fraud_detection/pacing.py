@@ -0,0 +1,187 @@
+"""Open-loop send schedule for the publisher.
+
+The due time of every transaction comes from a rate profile on the monotonic
+clock, not from how long the previous one took to generate and send. The next
+arrival comes when the rate integrated since the last one reaches 1
+(``fixed``) or an exponentially distributed amount with mean 1 (``poisson``,
+a Poisson process with the profile's rate). Ramps are followed exactly,
+including ramps from a rate of 0. A producer that falls behind issues the overdue
+arrivals at once, without sleeping. They are the tokens of a bucket: with
+``burst`` > 0, overdue arrivals beyond ``burst`` are counted as ``missed``
+and skipped. They are never silently absorbed into a slower rate.
+
+Each transaction is stamped with its due time, so the time it spent waiting
+to be generated or sent counts as latency downstream. Without this, a slow
+publisher would quietly lower the offered load and hide its own tail latency
+(coordinated omission).
+
+A rate profile is a JSON file::
+
+    {"arrivals": "poisson", "seed": 1, "burst": 100, "repeat": true,
+     "phases": [{"seconds": 60, "rate": 10},
+                {"seconds": 120, "rate": 10, "to_rate": 200},
+                {"seconds": 5, "rate": 500},
+                {"seconds": 55, "rate": 10}]}
+
+A phase holds ``rate`` msg/s for ``seconds``, or ramps linearly to
+``to_rate`` over them. After the last phase the profile starts again if
+``repeat`` is set, otherwise its last rate is held.
+"""
+import json
+import math
+import time
+import random
+import threading
+from collections import deque
+
+ARRIVALS = ("fixed", "poisson")
+MAX_WAIT = 0.5  # seconds; the longest sleep before the stop flag is checked again
+
+
+class RateProfile:
+    """Offered rate (msg/s) as a function of the seconds since the start"""
+
+    def __init__(self, phases, arrivals="fixed", repeat=False, burst=0, seed=None):
+        if arrivals not in ARRIVALS:
+            raise ValueError(f"arrivals must be one of {ARRIVALS}, not {arrivals!r}")
+        if not phases:
+            raise ValueError("a rate profile needs at least one phase")
+        self.phases = []
+        for phase in phases:
+            seconds, rate = float(phase["seconds"]), float(phase["rate"])
+            to_rate = float(phase.get("to_rate", rate))
+            if seconds <= 0 or rate < 0 or to_rate < 0:
+                raise ValueError(f"invalid phase {phase}: seconds must be positive and rates non-negative")
+            self.phases.append((seconds, rate, to_rate))
+        if not any(rate or to_rate for _, rate, to_rate in self.phases):
+            raise ValueError("a rate profile must have a non-zero rate somewhere")
+        self.arrivals = arrivals
+        self.repeat = repeat
+        self.burst = int(burst)
+        self.seed = seed
+        self.duration = sum(seconds for seconds, _, _ in self.phases)
+
+    @classmethod
+    def constant(cls, rate, arrivals="fixed", burst=0, seed=None):
+        if rate <= 0:
+            raise ValueError("the rate must be positive")
+        return cls([{"seconds": 3600, "rate": rate}], arrivals=arrivals, repeat=True, burst=burst, seed=seed)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            spec = json.load(f)
+        return cls(spec["phases"], arrivals=spec.get("arrivals", "fixed"), repeat=spec.get("repeat", False),
+                   burst=spec.get("burst", 0), seed=spec.get("seed"))
+
+    def _phase_at(self, t):
+        """(phase start, seconds, rate, to_rate) of the phase running ``t`` seconds in, else None once held"""
+        if self.repeat:
+            t %= self.duration
+        elif t >= self.duration:
+            return None
+        start = 0.0
+        for seconds, rate, to_rate in self.phases:
+            if t < start + seconds:
+                return start, seconds, rate, to_rate
+            start += seconds
+        return None
+
+    def rate_at(self, t):
+        phase = self._phase_at(t)
+        if phase is None:
+            return self.phases[-1][2]
+        start, seconds, rate, to_rate = phase
+        return rate + (to_rate - rate) * (self._offset(t) - start) / seconds
+
+    def _offset(self, t):
+        return t % self.duration if self.repeat else t
+
+    def advance(self, t, arrivals):
+        """Seconds from the start at which the rate integrated from ``t`` reaches ``arrivals``; None if it never does"""
+        while True:
+            phase = self._phase_at(t)
+            if phase is None:  # past the end: the last rate is held
+                rate = self.phases[-1][2]
+                return t + arrivals / rate if rate > 0 else None
+            start, seconds, rate, to_rate = phase
+            slope = (to_rate - rate) / seconds
+            offset = self._offset(t)
+            rate += slope * (offset - start)
+            left = start + seconds - offset
+            area = rate * left + slope * left ** 2 / 2  # arrivals expected in the rest of the phase
+            if 0 < arrivals <= area:
+                # The root of rate*dt + slope*dt**2/2 = arrivals, in a form that is stable when slope is ~0
+                return t + min(2 * arrivals / (rate + math.sqrt(max(rate ** 2 + 2 * slope * arrivals, 0.0))), left)
+            arrivals -= area
+            t += max(left, 1e-9)
+
+    def describe(self):
+        if len(self.phases) == 1 and self.phases[0][1] == self.phases[0][2]:
+            shape = f"{self.phases[0][1]:g} msg/s"
+        else:
+            shape = f"{len(self.phases)} phases over {self.duration:g} s" + (", repeating" if self.repeat else "")
+        return f"{self.arrivals} arrivals at {shape}" + (f", burst {self.burst}" if self.burst else "")
+
+
+class ArrivalSchedule:
+    """Due times (monotonic ns) of successive transactions under a RateProfile, released through a token bucket"""
+
+    def __init__(self, profile, start_ns=None):
+        self.profile = profile
+        self.random = random.Random(profile.seed)
+        self.start_ns = time.monotonic_ns() if start_ns is None else start_ns
+        self.last_ns = None  # due time of the latest arrival drawn
+        self.pending = deque()  # arrivals already drawn and not yet issued
+        self.issued = 0
+        self.missed = 0
+        self.lock = threading.Lock()
+
+    def _draw(self):
+        """Due time of the arrival after the latest one, or None if the profile has ended at a zero rate"""
+        arrivals = self.random.expovariate(1.0) if self.profile.arrivals == "poisson" else 1.0
+        if self.last_ns is None and self.profile.rate_at(0.0) > 0:
+            t = 0.0  # the first transaction goes out right away
+        else:
+            t = self.profile.advance(0.0 if self.last_ns is None else (self.last_ns - self.start_ns) / 1e9, arrivals)
+        if t is None:
+            return None
+        self.last_ns = self.start_ns + round(t * 1e9)
+        return self.last_ns
+
+    def take(self, now_ns=None):
+        """Due time of the next transaction to issue; overdue ones beyond the burst are skipped as missed"""
+        with self.lock:
+            if not self.pending:
+                due = self._draw()
+                if due is None:
+                    return None
+                self.pending.append(due)
+            if self.profile.burst:
+                now_ns = time.monotonic_ns() if now_ns is None else now_ns
+                while self.pending[-1] <= now_ns:
+                    due = self._draw()
+                    if due is None:
+                        break
+                    self.pending.append(due)
+                overdue = sum(1 for due in self.pending if due <= now_ns)
+                for _ in range(max(overdue - self.profile.burst, 0)):
+                    self.pending.popleft()
+                    self.missed += 1
+            self.issued += 1
+            return self.pending.popleft()
+
+    def wait(self, running):
+        """Sleep until the next transaction is due and return its due time, or None once ``running`` is cleared"""
+        due = self.take()
+        while due is not None and running.is_set():
+            delay = (due - time.monotonic_ns()) / 1e9
+            if delay <= 0:
+                return due
+            time.sleep(min(delay, MAX_WAIT))
+        return None
+
+    def stats(self):
+        with self.lock:
+            t = (time.monotonic_ns() - self.start_ns) / 1e9
+            return {"offered_rate": round(self.profile.rate_at(t), 3), "issued": self.issued, "missed": self.missed}
@@ -0,0 +1,102 @@
+"""Scoring parity check across every entry point's scoring path.
+
+Run from a directory holding fraud_model.pkl and fraudTrain.csv:
+
+    python -m fraud_detection.parity --rows 2000
+
+The reference is the per-row preprocessing the original mqtt_subscriber.py and
+fraud_dashboard.py each carried (LabelEncoder + StandardScaler, one DataFrame
+per transaction). Exits non-zero if any path disagrees with it.
+"""
+import sys
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from . import config
+from .features import categorical_cols, selected_features, prepare_training_frame, engineer_features
+from .scoring import FraudScorer, score_frame, score_records
+from .simulation import build_simulation_profile, generate_transactions
+
+
+class LegacyPreprocessor:
+    """The pre-refactor per-row path, kept verbatim as the parity reference"""
+
+    def __init__(self, train_data_path, nrows=config.ENCODER_SAMPLE_ROWS):
+        df = prepare_training_frame(pd.read_csv(train_data_path, nrows=nrows))
+        self.label_encoders = {}
+        for col in categorical_cols:
+            self.label_encoders[col] = LabelEncoder()
+            self.label_encoders[col].fit(df[col].astype(str))
+        df_encoded = df.copy()
+        for col in categorical_cols:
+            df_encoded[col] = self.label_encoders[col].transform(df_encoded[col].astype(str))
+        self.scaler = StandardScaler()
+        self.scaler.fit(df_encoded[selected_features])
+
+    def preprocess_transaction(self, transaction):
+        data = {}
+        for key in selected_features:
+            if key in transaction:
+                data[key] = [transaction[key]]
+            else:
+                return None
+        df_trans = pd.DataFrame(data)
+        for col in categorical_cols:
+            try:
+                df_trans[col] = self.label_encoders[col].transform(df_trans[col].astype(str))
+            except ValueError:
+                df_trans[col] = -1
+        X_scaled = self.scaler.transform(df_trans[selected_features])
+        return pd.DataFrame(X_scaled, columns=selected_features)
+
+
+def sample_transactions(train_data_path, rows, seed):
+    """Simulated rows, real rows past the encoder sample, and rows with unseen categories"""
+    rng = np.random.default_rng(seed)
+    profile = build_simulation_profile(train_data_path, nrows=config.ENCODER_SAMPLE_ROWS)
+    simulated = generate_transactions(profile, rows, fraud_probability=0.2, rng=rng)
+    real = engineer_features(pd.read_csv(train_data_path, skiprows=range(1, config.ENCODER_SAMPLE_ROWS + 1), nrows=rows))
+    unseen = simulated.head(max(rows // 10, 1)).copy()
+    unseen["merchant"] = "fraud_Parity Check Merchant"
+    unseen["job"] = "Parity checker"
+    frame = pd.concat([simulated, real, unseen], ignore_index=True)
+    return frame.reindex(columns=sorted(set(frame.columns) - {"is_fraud"})).to_dict("records")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that every scoring path matches the original per-row one")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--train-data", default=config.TRAIN_DATA_PATH)
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore")
+
+    scorer = FraudScorer(args.model, args.train_data)
+    legacy = LegacyPreprocessor(args.train_data)
+    transactions = sample_transactions(args.train_data, args.rows, args.seed)
+
+    reference = np.array([scorer.model.predict_proba(legacy.preprocess_transaction(t))[0, 1] for t in transactions])
+    paths = {
+        "subscriber (per message)": np.array([scorer.score_transaction(t) for t in transactions]),
+        "batch scorer / score API": scorer.predict_proba(pd.DataFrame(transactions)),
+        "dashboard bulk (score_frame)": score_frame(scorer, pd.DataFrame(transactions))[0],
+        "dashboard MQTT (score_records)": score_records(scorer, transactions)[0],
+    }
+
+    failed = False
+    print(f"{len(transactions)} transactions, reference: original per-row preprocessing")
+    for name, probabilities in paths.items():
+        max_diff = float(np.max(np.abs(probabilities - reference)))
+        flips = int(np.sum((probabilities > config.FRAUD_THRESHOLD) != (reference > config.FRAUD_THRESHOLD)))
+        ok = max_diff <= args.tolerance and flips == 0
+        failed |= not ok
+        print(f"  {'OK  ' if ok else 'FAIL'} {name:32s} max |diff| {max_diff:.2e}  verdict flips {flips}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""Transaction topics partitioned by card, and their division among subscriber workers.
+
+With P partitions the publisher sends each transaction to ``<topic>/<p>``,
+p = crc32(cc_num) mod P, so every transaction of a card travels the same
+topic in publish order. Each worker of a group owns a set of partitions and
+scores their messages on one thread, so a card is always scored by a single
+owner, in order.
+
+Each partition is consumed through its own persistent MQTT session (client
+id ``<membership topic>-p<p>``), whichever worker owns it. While a partition
+changes hands the broker queues its messages in that session, and the next
+owner resumes right after the last acknowledged one.
+
+Workers find each other on a membership topic, at QoS 0 since a lost
+heartbeat is covered by the next one. Every ``heartbeat_interval`` each worker
+publishes its id and the partitions whose sessions it holds. A worker not
+heard from within ``member_timeout`` is gone; a draining worker announces
+that it is leaving. Partitions are dealt round-robin over the
+sorted ids of the live workers, so every worker computes the same assignment,
+and it is recomputed whenever a worker joins or leaves:
+
+- A revoked partition's session is closed after the messages already scored
+  are acknowledged; messages received but not yet scored are left
+  unacknowledged for the next owner.
+- A gained partition's session is opened once no other live worker holds it.
+
+A new worker listens for two heartbeats before claiming anything, so that it
+knows what the others hold.
+"""
+import json
+import time
+import zlib
+import logging
+import threading
+from . import config, mqtt_io
+
+
+def partition_of(cc_num, partitions):
+    """Partition of a card number; stable across processes and Python versions"""
+    return zlib.crc32(str(cc_num).encode()) % partitions
+
+
+def partition_topic(topic, partition):
+    return f"{topic}/{partition}"
+
+
+def topic_partition(topic):
+    """Partition number from the last level of a partition topic, else None"""
+    last = topic.rpartition("/")[2]
+    return int(last) if last.isdigit() else None
+
+
+def assign(members, partitions):
+    """{member: [partitions]}, dealt round-robin over the sorted member ids"""
+    members = sorted(members)
+    assignment = {member: [] for member in members}
+    for partition in range(partitions if members else 0):
+        assignment[members[partition % len(members)]].append(partition)
+    return assignment
+
+
+class PartitionMember:
+    """One worker's share of a partitioned topic: group membership, owned partitions and their sessions.
+
+    ``received(p)`` must be called for every message of partition ``p`` as it
+    arrives and ``done(p)`` once it has been acknowledged or discarded. Only
+    messages of partitions that are ``consuming(p)`` may be scored and
+    acknowledged (through ``client_for(p)``). ``release_revoked()`` must be
+    called between batches by the thread that acknowledges.
+    """
+
+    def __init__(self, member_id, topic=config.MQTT_TOPIC, partitions=8, membership_topic=config.MQTT_MEMBERSHIP_TOPIC,
+                 qos=1, heartbeat_interval=1.0, member_timeout=10.0):
+        self.member_id = member_id
+        self.topic = topic
+        self.partitions = partitions
+        self.membership_topic = membership_topic
+        self.session_prefix = f"{membership_topic.replace('/', '-')}-p"
+        self.qos = qos
+        self.heartbeat_interval = heartbeat_interval
+        self.member_timeout = member_timeout
+        self.lock = threading.RLock()
+        self.client = None
+        self.on_message = None
+        self.broker, self.port = config.MQTT_BROKER, config.MQTT_PORT
+        self.members = {}  # other member id -> {"seen": monotonic, "held": set, "leaving": bool}
+        self.owned = set()  # assigned to this worker
+        self.sessions = {}  # partition -> paho client consuming its session
+        self.revoked = set()  # sessions to close once the acknowledgements sent so far are out
+        self.in_hand = [0] * partitions  # messages received and not yet acknowledged or discarded
+        self.joined_at = None
+        self.leaving = False
+        self.rebalances = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self, client, on_message, broker=config.MQTT_BROKER, port=config.MQTT_PORT):
+        """Listen to the group through ``client``; partition messages go to ``on_message``"""
+        self.client, self.on_message, self.broker, self.port = client, on_message, broker, port
+        client.message_callback_add(self.membership_topic, self.on_membership)
+        self.thread = threading.Thread(target=self._heartbeats, daemon=True, name="partition-heartbeat")
+        self.thread.start()
+        return self
+
+    def on_connect(self, client):
+        # QoS 0: a heartbeat needs no acknowledgement on the manual-ack client, and a
+        # persistent session must not queue old ones that would revive departed members
+        client.subscribe(self.membership_topic, qos=0)
+        with self.lock:
+            if self.joined_at is None:
+                self.joined_at = time.monotonic()
+
+    def _joined(self, now):
+        return self.joined_at is not None and now - self.joined_at >= 2 * self.heartbeat_interval
+
+    def _live(self, now):
+        return {member: state for member, state in self.members.items() if now - state["seen"] < self.member_timeout}
+
+    def _held_elsewhere(self, partition, now):
+        return any(partition in state["held"] for state in self._live(now).values())
+
+    def consuming(self, partition):
+        """True if messages of ``partition`` are to be scored; others are left unacknowledged for the next owner"""
+        with self.lock:
+            return partition in self.sessions and partition not in self.revoked
+
+    def revoking(self):
+        """True if a revoked partition's session is waiting to be closed by release_revoked()"""
+        with self.lock:
+            return bool(self.revoked)
+
+    def client_for(self, partition):
+        with self.lock:
+            return self.sessions.get(partition)
+
+    def received(self, partition):
+        with self.lock:
+            self.in_hand[partition] += 1
+
+    def done(self, partition):
+        with self.lock:
+            self.in_hand[partition] -= 1
+
+    def on_membership(self, client, userdata, msg):
+        try:
+            beat = json.loads(msg.payload)
+        except ValueError:
+            return
+        if beat.get("member") == self.member_id:
+            return
+        now = time.monotonic()
+        with self.lock:
+            known = beat["member"] in self._live(now)
+            if not known and beat.get("partitions") != self.partitions:
+                logging.warning(f"Member {beat['member']} uses {beat.get('partitions')} partitions, this one {self.partitions}")
+            self.members[beat["member"]] = {"seen": now, "held": set(beat.get("held", ())), "leaving": bool(beat.get("leaving"))}
+            self._rebalance(now)
+
+    def _rebalance(self, now):
+        """Recompute the assignment, mark revoked sessions for closing, and open gained ones that are free"""
+        if not self._joined(now):
+            return
+        active = [member for member, state in self._live(now).items() if not state["leaving"]]
+        if not self.leaving:
+            active.append(self.member_id)
+        owned = set(assign(active, self.partitions).get(self.member_id, ()))
+        if owned != self.owned:
+            self.rebalances += 1
+            revoked = (self.owned - owned) & set(self.sessions)
+            self.revoked = (self.revoked | revoked) - owned
+            self.owned = owned
+            message = (f"Partitions rebalanced across {len(active)} worker(s): own {sorted(owned)}"
+                       + (f", handing over {sorted(revoked)}" if revoked else ""))
+            print(f"🧩 {message}")
+            logging.info(message)
+        for partition in sorted(self.owned - set(self.sessions)):
+            # Stale messages of an earlier session must be discarded before it is reopened
+            if self.in_hand[partition] == 0 and not self._held_elsewhere(partition, now):
+                self.sessions[partition] = self._open(partition)
+
+    def _open(self, partition):
+        def on_connect(client, userdata, flags, rc, properties=None):
+            if rc == 0:
+                client.subscribe(partition_topic(self.topic, partition), qos=self.qos)
+
+        client = mqtt_io.create_client(on_connect=on_connect, on_message=self.on_message,
+                                       client_id=f"{self.session_prefix}{partition}", clean_session=False, manual_ack=True)
+        client.connect_async(self.broker, self.port, config.MQTT_KEEPALIVE)
+        client.loop_start()
+        return client
+
+    def release_revoked(self):
+        """Close the sessions of revoked partitions, after the acknowledgements already sent on them"""
+        with self.lock:
+            closing = [self.sessions.pop(partition) for partition in sorted(self.revoked)]
+            self.revoked.clear()
+        for client in closing:
+            client.disconnect()
+            client.loop_stop()
+        if closing:
+            self.heartbeat()  # the next owner may open them now
+
+    def heartbeat(self):
+        with self.lock:
+            now = time.monotonic()
+            for member in [member for member, state in self.members.items() if now - state["seen"] >= self.member_timeout]:
+                del self.members[member]
+                logging.warning(f"Member {member} timed out; its partitions are reassigned")
+            self._rebalance(now)
+            beat = {"member": self.member_id, "partitions": self.partitions, "held": sorted(self.sessions),
+                    "leaving": self.leaving}
+        if self.client is not None and self.joined_at is not None:
+            self.client.publish(self.membership_topic, json.dumps(beat), qos=0)
+
+    def _heartbeats(self):
+        while not self.stopped.is_set():
+            self.heartbeat()
+            self.stopped.wait(self.heartbeat_interval)
+
+    def leave(self, timeout=60.0):
+        """Give up every partition; True once all their sessions are handed over"""
+        with self.lock:
+            self.leaving = True
+            self._rebalance(time.monotonic())
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.lock:
+                if not self.sessions:
+                    return True
+            time.sleep(0.1)
+        return False
+
+    def stop(self):
+        """Stop heartbeating and disconnect the partition sessions; unacknowledged messages go to the next owner"""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+        with self.lock:
+            sessions, self.sessions = list(self.sessions.values()), {}
+        for client in sessions:
+            client.disconnect()
+            client.loop_stop()
+
+    def stats(self):
+        with self.lock:
+            now = time.monotonic()
+            return {
+                "member": self.member_id,
+                "partitions": self.partitions,
+                "owned": sorted(self.owned),
+                "consuming": sorted(set(self.sessions) - self.revoked),
+                "waiting_for_handover": sorted(self.owned - set(self.sessions)),
+                "members": sorted([self.member_id, *self._live(now)]),
+                "rebalances": self.rebalances,
+            }
@@ -0,0 +1,182 @@
+"""Sampling profiler that can be started in a running process.
+
+Nothing is installed on the hot path: a profile is a daemon thread that reads
+every other thread's stack with ``sys._current_frames()`` at a fixed interval
+for N seconds, then writes the stacks in the collapsed format read by
+flamegraph.pl, speedscope and inferno, and summarizes time per function.
+When no profile is running there is no thread and no tracing hook.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import math
+import logging
+import threading
+from collections import Counter
+
+# Functions always listed in the summary; matched against the end of each frame's qualified name
+FOCUS = (
+    "decode_transaction",
+    "engineer_features",
+    "FraudScorer.encode",
+    "FraudScorer.scale",
+    "predict_proba",
+    "handle_verdict",
+    "process_transaction",
+)
+# Leaf frames of threads that are blocked rather than working; left out of the summary's self time
+IDLE_LEAVES = ("Selector.select", "Condition.wait", "Event.wait", "_wait_for_tstate_lock")
+MAX_SECONDS = 600.0  # longest profile any trigger may request
+
+
+class SamplingProfiler:
+    """Wall-clock stack sampler; start() runs one profile at a time"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.thread = None
+        self.last_report = None
+        self._labels = {}
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, seconds=30.0, output_dir=".", on_done=None):
+        """Profile for ``seconds``; returns the output path, or None if a profile is already running"""
+        with self.lock:
+            if self.running:
+                return None
+            path = os.path.join(output_dir, f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.collapsed")
+            self.thread = threading.Thread(target=self._run, args=(seconds, path, on_done), daemon=True, name="sampling-profiler")
+            self.thread.start()
+            return path
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = self._labels[code] = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _run(self, seconds, path, on_done):
+        stacks = Counter()
+        own = threading.get_ident()
+        thread_names = {}
+        ticks = 0
+        started = time.monotonic()
+        deadline = started + seconds
+        while time.monotonic() < deadline:
+            frames = sys._current_frames()
+            if len(thread_names) != len(frames):
+                thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(thread_names.get(ident, f"thread-{ident}"))
+                stacks[";".join(reversed(stack))] += 1
+            del frames, frame
+            ticks += 1
+            time.sleep(self.interval)
+        elapsed = time.monotonic() - started
+
+        try:
+            with open(path, "w") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError as e:
+            logging.error(f"Could not write profile {path}: {e}")
+            path = None
+        self.last_report = summarize(stacks, ticks, elapsed, path)
+        if on_done is not None:
+            on_done(self.last_report)
+
+
+def summarize(stacks, ticks, elapsed, path=None, top=15):
+    """Per-function share of sampling ticks, self (leaf) and total (anywhere on the stack).
+
+    A share of 0.25 means some thread was in that function for about a quarter
+    of the profile's wall time. Threads blocked in a select or wait are left
+    out of the self-time ranking (they stay in the collapsed file).
+    """
+    self_counts, total_counts, focus_counts = Counter(), Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")[1:]  # the first entry is the thread name
+        if not frames:
+            continue
+        if not frames[-1].split(" (", 1)[0].endswith(IDLE_LEAVES):
+            self_counts[frames[-1]] += count
+        for frame in set(frames):
+            total_counts[frame] += count
+        names = [frame.split(" (", 1)[0] for frame in frames]
+        for focus in FOCUS:
+            if any(name.endswith(focus) for name in names):
+                focus_counts[focus] += count
+
+    def entry(count):
+        share = count / ticks if ticks else 0.0
+        return {"seconds": round(share * elapsed, 3), "share": round(share, 4)}
+
+    return {
+        "path": path,
+        "duration_s": round(elapsed, 2),
+        "samples": ticks,
+        "focus": {name: entry(focus_counts[name]) for name in FOCUS},
+        "top_self": [{"function": name, **entry(count)} for name, count in self_counts.most_common(top)],
+        "top_total": [{"function": name, **entry(count)} for name, count in total_counts.most_common(top)],
+    }
+
+
+def format_report(report, top=10):
+    lines = [f"Profile: {report['samples']} samples over {report['duration_s']}s -> {report['path']}"]
+    lines += [f"  {name:24} {stats['seconds']:8.3f}s {stats['share']:7.1%}" for name, stats in report["focus"].items() if stats["share"]]
+    lines.append("  top self time:")
+    lines += [f"    {item['share']:7.1%}  {item['function']}" for item in report["top_self"][:top]]
+    return "\n".join(lines)
+
+
+def install_signal_handler(profiler, seconds=30.0, output_dir=".", on_done=None, signum=None):
+    """Start a profile on ``signum`` (SIGUSR1 by default); False where the signal does not exist (Windows).
+
+    Must be called from the main thread.
+    """
+    signum = signum or getattr(signal, "SIGUSR1", None)
+    if signum is None:
+        return False
+    signal.signal(signum, lambda *_: profiler.start(seconds, output_dir, on_done))
+    return True
+
+
+def profile_seconds(value):
+    """Requested profile length as positive seconds capped at MAX_SECONDS; ValueError if it is not one"""
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"seconds must be a number, not {value!r}") from None
+    if not math.isfinite(seconds) or seconds <= 0:
+        raise ValueError(f"seconds must be positive and finite, not {value!r}")
+    return min(seconds, MAX_SECONDS)
+
+
+def handle_admin_message(profiler, payload, output_dir=".", on_done=None, default_seconds=30.0):
+    """Act on an admin MQTT message such as ``{"command": "profile", "seconds": 30}``"""
+    try:
+        command = json.loads(payload)
+    except ValueError:
+        logging.warning(f"Ignoring malformed admin message: {payload[:100]!r}")
+        return None
+    if not isinstance(command, dict) or command.get("command") != "profile":
+        return None
+    try:
+        seconds = profile_seconds(command.get("seconds", default_seconds))
+    except ValueError as e:
+        logging.warning(f"Ignoring admin profile command: {e}")
+        return None
+    return profiler.start(seconds, output_dir, on_done)
@@ -0,0 +1,428 @@
+import os
+import glob
+import time
+import queue
+import logging
+import argparse
+import threading
+from collections import deque
+import paho.mqtt.client as mqtt
+from . import config, mqtt_io, tracing
+from .pacing import ARRIVALS, ArrivalSchedule, RateProfile
+from .partitions import partition_of, partition_topic
+from .simulation import build_simulation_profile, generate_transaction
+from .spool import SpillQueue
+
+REPLAY_POLL = 0.005  # seconds the publish loop waits for a live message while the spool drains
+
+
+class TransactionPublisher:
+    """Generates simulated transactions into a bounded buffer and publishes them from a second thread.
+
+    Transactions are generated open-loop: one every ``interval`` seconds, or
+    following ``rate_profile`` (a pacing.RateProfile), on the monotonic clock
+    whatever generating and sending cost. Each is stamped with its due time.
+    How late it was generated (``issue_lag``) and sent (``send_lag``) against
+    that time is recorded in ``latency``; for a message replayed from the
+    spool, whose monotonic time may come from an earlier run, ``send_lag``
+    uses the wall-clock due time in its trace.
+
+    When the broker falls behind the buffer drops its oldest message rather than
+    blocking generation; a failed publish is put back at the end of the buffer.
+
+    With a ``spool`` (a SpillQueue), messages that cannot be sent now, because
+    the client is disconnected or ``max_inflight`` publishes are still
+    unacknowledged, are appended to disk instead. While anything is spooled,
+    new messages are spooled behind it, so order is kept. Once the connection
+    is back, the spool is replayed from its head as fast as the in-flight
+    windows free up (capped at ``replay_rate`` messages/s if set), so it
+    drains at the rate the broker acknowledges, not a fixed one. ``spool``
+    may also be a list of one SpillQueue per connection: each connection then
+    spools and replays on its own, so a connection that is down or slow holds
+    back only its own messages.
+
+    With ``partitions`` P > 0, each transaction goes to ``<topic>/<p>``,
+    p = crc32(cc_num) mod P, so that workers can divide the stream while
+    every card's transactions stay in order.
+
+    ``client`` may be a list of K clients, each with its own socket and network
+    loop, to publish over K connections at once. A partitioned message goes to
+    connection p mod K, so a card keeps to one connection and stays in order;
+    unpartitioned messages are dealt round-robin over the connections that can
+    take them, which does not keep order, and spooled only when none can.
+    Every connection has its own in-flight window of ``max_inflight``; the
+    published and acknowledged counts are totals over all of them.
+    """
+
+    def __init__(self, client, profile, topic=config.MQTT_TOPIC, qos=2, interval=0.1,
+                 fraud_probability=0.05, buffer_size=1000, csv_path='simulated_transactions.csv', csv_every=20,
+                 spool=None, max_inflight=100, replay_rate=0.0, partitions=0, rate_profile=None):
+        self.clients = list(client) if isinstance(client, (list, tuple)) else [client]
+        self.client = self.clients[0]
+        self.profile = profile
+        self.topic = topic
+        self.qos = qos
+        if rate_profile is None and not interval > 0:
+            raise ValueError(f"interval must be positive, not {interval}")
+        self.interval = interval
+        self.rate_profile = rate_profile or RateProfile.constant(1.0 / interval)
+        self.schedule = None
+        self.latency = tracing.LatencyTracker(("issue_lag", "send_lag"))
+        self.fraud_probability = fraud_probability
+        self.csv_path = csv_path
+        self.csv_every = csv_every
+        self.message_queue = queue.Queue(maxsize=buffer_size)  # (due monotonic ns, partition or None, message)
+        self.running = threading.Event()
+        self.threads = []
+        self.spools = list(spool) if isinstance(spool, (list, tuple)) else [spool] if spool is not None else []
+        if len(self.spools) not in (0, 1, len(self.clients)):
+            raise ValueError(f"give one spool, or one per connection ({len(self.clients)}), not {len(self.spools)}")
+        self.max_inflight = max_inflight
+        self.replay_rate = replay_rate
+        self.partitions = partitions
+        self.connected = [threading.Event() for _ in self.clients]
+        self.inflight = [deque() for _ in self.clients]  # MQTTMessageInfo of publishes not yet acknowledged
+        self.inflight_lock = threading.Lock()  # pruned from the publishing and the stats threads
+        self.next_connection = 0
+        self.published = 0
+        self.acknowledged = 0
+        self.dropped = 0  # oldest messages dropped from the full in-memory buffer
+        self.replay_tokens = 0.0
+        self.replay_checked = time.monotonic()
+
+    def _spool_for(self, connection):
+        """The spool holding messages bound for ``connection``, or None without spooling"""
+        if not self.spools:
+            return None
+        return self.spools[connection if len(self.spools) > 1 else 0]
+
+    def _spooled(self):
+        return sum(spool.pending for spool in self.spools)
+
+    def _connection_name(self, client):
+        return f" (connection {self.clients.index(client) + 1}/{len(self.clients)})" if len(self.clients) > 1 else ""
+
+    def on_connect(self, client, userdata, flags, rc, properties=None):
+        if rc == 0:
+            print(f"✅ Connected to MQTT Broker!{self._connection_name(client)}")
+            connection = self.clients.index(client)
+            self.connected[connection].set()
+            spool = self._spool_for(connection)
+            if spool is not None and spool.pending:
+                print(f"📼 Replaying {spool.pending} spooled messages"
+                      + (f" at up to {self.replay_rate:g}/s" if self.replay_rate else " as fast as the broker acknowledges"))
+        else:
+            print(f"❌ Connection failed with code {rc}")
+
+    def on_disconnect(self, client, userdata, flags, rc, properties=None):
+        # loop_forever() reconnects on its own
+        self.connected[self.clients.index(client)].clear()
+        if self.spools:
+            print(f"⚠️ Disconnected from MQTT Broker{self._connection_name(client)}. Spooling to disk until it is back...")
+        else:
+            print(f"⚠️ Disconnected from MQTT Broker{self._connection_name(client)}. Attempting to reconnect...")
+
+    def produce(self):
+        transaction_count = 0
+        columns = self.profile["columns"]
+        with open(self.csv_path, 'w') as csv_file:
+            csv_file.write(f"{','.join(columns)}\n")
+            csv_file.flush()
+            wall_offset = time.time_ns() - time.monotonic_ns()
+            while self.running.is_set():
+                due_ns = self.schedule.wait(self.running)
+                if due_ns is None:
+                    break
+                self.latency.record("issue_lag", time.monotonic_ns() - due_ns)
+                try:
+                    transaction = tracing.stamp(generate_transaction(self.profile, self.fraud_probability), transaction_count)
+                    # Stamped with the due time, so falling behind the schedule shows as latency downstream
+                    transaction[tracing.TRACE_KEY].update(mono_ns=due_ns, wall_ns=due_ns + wall_offset)
+                    message = mqtt_io.encode_transaction(transaction)
+                    # Known now, so publishing need not decode the message again
+                    partition = partition_of(transaction["cc_num"], self.partitions) if self.partitions else None
+                    try:
+                        self.message_queue.put_nowait((due_ns, partition, message))
+                    except queue.Full:
+                        self.message_queue.get_nowait()  # Drop oldest if buffer full
+                        self.message_queue.put_nowait((due_ns, partition, message))
+                        self.dropped += 1
+                    is_fraud_str = "🚨 FRAUD" if transaction["is_fraud"] == 1 else "✅ LEGITIMATE"
+                    print(f"📤 Queued: {is_fraud_str} - Amount: ${transaction['amt']:.2f} - {transaction['merchant']}")
+
+                    transaction_count += 1
+                    if self.csv_every and transaction_count % self.csv_every == 0:
+                        csv_file.write(f"{','.join(str(transaction.get(col, '')) for col in columns)}\n")
+                        csv_file.flush()
+                        print(f"💾 Logged transaction #{transaction_count} to CSV")
+                except Exception as e:
+                    print(f"⚠️ Error generating transaction: {e}")
+
+    def _prune(self, connection):
+        inflight = self.inflight[connection]
+        with self.inflight_lock:
+            while inflight and inflight[0].is_published():
+                inflight.popleft()
+                self.acknowledged += 1
+
+    def can_publish(self, connection=0):
+        """The connection is up, with room in its in-flight window"""
+        if not self.connected[connection].is_set():
+            return False
+        self._prune(connection)
+        return len(self.inflight[connection]) < self.max_inflight
+
+    def route(self, message, partition=None):
+        """(connection, topic) of a message; without ``partition`` it is taken from the payload.
+
+        Unpartitioned messages go to the next connection, in round-robin
+        order, that can publish now; only when none can is it the next one
+        regardless.
+        """
+        if not self.partitions:
+            count = len(self.clients)
+            connection = self.next_connection
+            if count > 1:
+                connection = next((c % count for c in range(connection, connection + count) if self.can_publish(c % count)),
+                                  connection)
+            self.next_connection = (connection + 1) % count
+            return connection, self.topic
+        if partition is None:  # spooled messages keep only the payload
+            partition = partition_of(mqtt_io.decode_transaction(message)["cc_num"], self.partitions)
+        return partition % len(self.clients), partition_topic(self.topic, partition)
+
+    def publish(self, message, route=None):
+        connection, topic = route or self.route(message)
+        result = self.clients[connection].publish(topic, message, qos=self.qos)
+        # paho keeps a QoS 1/2 message published while disconnected and sends it after reconnecting
+        if result.rc != 0 and not (self.qos and result.rc == mqtt.MQTT_ERR_NO_CONN):
+            return False
+        if self.qos:
+            self.inflight[connection].append(result)
+        else:
+            with self.inflight_lock:
+                self.acknowledged += 1
+        self.published += 1
+        logging.info(f"Published: {message}")
+        return True
+
+    def publish_loop(self):
+        while self.running.is_set():
+            replaying = self._spooled() > 0
+            try:
+                due_ns, partition, message = self.message_queue.get(timeout=REPLAY_POLL if replaying else 0.5)
+            except queue.Empty:
+                message = None
+            if message is not None:
+                route = self.route(message, partition)
+                spool = self._spool_for(route[0])
+                if spool is not None and (spool.pending or not self.can_publish(route[0])):
+                    spool.append(message)  # behind what is already spooled for this connection, to keep order
+                elif self.publish(message, route):
+                    self.latency.record("send_lag", time.monotonic_ns() - due_ns)
+                else:
+                    print("⚠️ Failed to publish message, spooling it" if spool is not None else "⚠️ Failed to publish message")
+                    if spool is not None:
+                        spool.append(message)
+                    else:
+                        self.message_queue.put((due_ns, partition, message))  # Re-queue if failed
+            if self._spooled():
+                self.replay()
+
+    def replay(self):
+        """Publish each spool from its head into the free in-flight windows, capped at ``replay_rate`` if set"""
+        tokens = None
+        if self.replay_rate:
+            now = time.monotonic()
+            self.replay_tokens = min(self.replay_tokens + (now - self.replay_checked) * self.replay_rate, max(self.replay_rate / 10, 1))
+            self.replay_checked = now
+            tokens = int(self.replay_tokens)
+        replayed = 0
+        for lane, spool in enumerate(self.spools):
+            connections = [lane] if len(self.spools) > 1 else range(len(self.clients))
+            budget = sum(self.max_inflight - len(self.inflight[connection]) for connection in connections if self.can_publish(connection))
+            if tokens is not None:
+                budget = min(budget, tokens - replayed)
+            if budget < 1 or not spool.pending:
+                continue
+            sent = []
+            for message in spool.peek(budget):
+                transaction = mqtt_io.decode_transaction(message)  # spooled messages keep only the payload
+                partition = partition_of(transaction["cc_num"], self.partitions) if self.partitions else None
+                route = self.route(message, partition)
+                if not self.can_publish(route[0]) or not self.publish(message, route):
+                    break
+                sent.append(message)
+                due_wall_ns = (transaction.get(tracing.TRACE_KEY) or {}).get("wall_ns")
+                if due_wall_ns is not None:
+                    self.latency.record("send_lag", time.time_ns() - due_wall_ns)
+            spool.commit(sent)
+            replayed += len(sent)
+        if self.replay_rate:
+            self.replay_tokens -= replayed
+        if replayed and not self._spooled():
+            print("✅ Spool replayed: publishing live again")
+
+    def stats(self):
+        for connection in range(len(self.clients)):
+            self._prune(connection)
+        stats = {"published": self.published, "acknowledged": self.acknowledged, "buffer_dropped": self.dropped,
+                 "inflight": sum(len(inflight) for inflight in self.inflight),
+                 "connected": all(connected.is_set() for connected in self.connected)}
+        if len(self.clients) > 1:
+            stats["connections"] = {"total": len(self.clients), "up": sum(c.is_set() for c in self.connected),
+                                    "inflight": [len(inflight) for inflight in self.inflight]}
+        if self.schedule is not None:
+            stats["schedule"] = {**self.schedule.stats(),
+                                 **{f"{stage}_ms": summary for stage, summary in self.latency.summary()["stages"].items()}}
+        if len(self.spools) == 1:
+            stats["spool"] = self.spools[0].stats()
+        elif self.spools:
+            per_connection = [spool.stats() for spool in self.spools]
+            stats["spool"] = {key: sum(spool[key] for spool in per_connection) for key in per_connection[0]}
+            stats["spool"]["pending_per_connection"] = [spool["pending"] for spool in per_connection]
+        return stats
+
+    def start(self):
+        self.running.set()
+        self.schedule = ArrivalSchedule(self.rate_profile)
+        self.threads = [
+            threading.Thread(target=self.produce, daemon=True, name="publisher-produce"),
+            threading.Thread(target=self.publish_loop, daemon=True, name="publisher-publish"),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.running.clear()
+        for thread in self.threads:
+            thread.join(timeout=5)
+        if self.spools:
+            while True:  # keep what was generated but never published for the next run
+                try:
+                    _, partition, message = self.message_queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._spool_for(self.route(message, partition)[0]).append(message)
+            for spool in self.spools:
+                spool.close()
+
+
+def main(argv=None, interval=0.1, qos=2):
+    parser = argparse.ArgumentParser(description="Stream simulated credit card transactions to MQTT")
+    parser.add_argument("--broker", default=config.MQTT_BROKER)
+    parser.add_argument("--port", type=int, default=config.MQTT_PORT)
+    parser.add_argument("--topic", default=config.MQTT_TOPIC)
+    parser.add_argument("--interval", type=float, default=interval, help="Seconds between generated transactions")
+    parser.add_argument("--arrivals", choices=ARRIVALS, default="fixed",
+                        help="evenly spaced transactions, or a Poisson process averaging one per --interval")
+    parser.add_argument("--burst", type=int, default=0,
+                        help="overdue transactions issued at once after falling behind; older ones are skipped as missed (0: none skipped)")
+    parser.add_argument("--rate-profile", help="JSON rate profile with ramps and bursts (see fraud_detection/pacing.py); overrides the three above")
+    parser.add_argument("--qos", type=int, choices=[0, 1, 2], default=qos)
+    parser.add_argument("--fraud-probability", type=float, default=0.05)
+    parser.add_argument("--buffer-size", type=int, default=1000)
+    parser.add_argument("--train-data", default=config.TRAIN_DATA_PATH)
+    parser.add_argument("--partitions", type=int, default=config.MQTT_PARTITIONS,
+                        help="publish to <topic>/<crc32(cc_num) mod N> instead of <topic> (0 disables)")
+    parser.add_argument("--spool-dir", default=config.SPOOL_DIR,
+                        help="spill messages here while the broker is unreachable or slow ('' disables)")
+    parser.add_argument("--spool-max-mb", type=float, default=256.0, help="disk bound of the spool; the oldest messages go first")
+    parser.add_argument("--connections", type=int, default=1,
+                        help="MQTT connections to publish over; with --partitions each card keeps to one, else round-robin")
+    parser.add_argument("--max-inflight", type=int, default=100,
+                        help="unacknowledged publishes per connection before messages are spooled")
+    parser.add_argument("--replay-rate", type=float, default=0.0,
+                        help="cap on messages/s replayed from the spool after an outage (0: as fast as the in-flight window allows)")
+    parser.add_argument("--stats-interval", type=float, default=30.0, help="seconds between publisher stats lines (0 disables)")
+    parser.add_argument("--metrics-port", type=int, default=0, help="serve the publisher stats as JSON at /metrics (0 disables)")
+    args = parser.parse_args(argv)
+    if not args.rate_profile and not args.interval > 0:
+        parser.error("--interval must be positive")
+    try:
+        rate_profile = (RateProfile.load(args.rate_profile) if args.rate_profile
+                        else RateProfile.constant(1.0 / args.interval, args.arrivals, args.burst))
+    except (OSError, KeyError, ValueError) as e:
+        parser.error(f"invalid rate profile: {e}")
+
+    logging.basicConfig(filename="mqtt_publisher.log", level=logging.INFO, format="%(asctime)s - %(message)s")
+    profile = build_simulation_profile(args.train_data)
+
+    spools = []
+    if args.spool_dir:
+        # Partitioned connections keep their own order, so each gets its own spool; the disk bound is shared out
+        lanes = args.connections if args.partitions and args.connections > 1 else 1
+        directories = [args.spool_dir] if lanes == 1 else [os.path.join(args.spool_dir, f"connection-{c}") for c in range(lanes)]
+        spools = [SpillQueue(directory, max_bytes=int(args.spool_max_mb * 2**20 / lanes)) for directory in directories]
+        pending = sum(spool.pending for spool in spools)
+        print(f"📼 Spooling to {args.spool_dir}/ during broker outages (up to {args.spool_max_mb:g} MB"
+              + (", one spool per connection)" if lanes > 1 else ")")
+              + (f", {pending} messages left from the last run" if pending else ""))
+        own = {os.path.normpath(directory) for directory in directories}
+        others = {os.path.normpath(os.path.dirname(path))
+                  for path in glob.glob(os.path.join(args.spool_dir, "**", "segment-*.log"), recursive=True)} - own
+        for directory in sorted(others):
+            leftover = SpillQueue(directory)
+            if leftover.pending:
+                print(f"⚠️ {leftover.pending} messages in {directory}/ were spooled with another --connections/--partitions "
+                      "layout; run with that layout to replay them")
+            leftover.close()
+    clients = [mqtt_io.create_client() for _ in range(max(args.connections, 1))]
+    for client in clients:
+        client.max_inflight_messages_set(args.max_inflight)
+    publisher = TransactionPublisher(clients, profile, topic=args.topic, qos=args.qos, interval=args.interval,
+                                     fraud_probability=args.fraud_probability, buffer_size=args.buffer_size,
+                                     spool=spools, max_inflight=args.max_inflight, replay_rate=args.replay_rate,
+                                     partitions=args.partitions, rate_profile=rate_profile)
+    for client in clients:
+        client.on_connect = publisher.on_connect
+        client.on_disconnect = publisher.on_disconnect
+        try:
+            mqtt_io.connect(client, args.broker, args.port)
+        except Exception as e:
+            if not spools:
+                print(f"❌ Failed to connect to MQTT Broker: {e}")
+                raise SystemExit(1)
+            print(f"⚠️ MQTT Broker unreachable ({e}); spooling until it is up")
+            client.connect_async(args.broker, args.port, config.MQTT_KEEPALIVE)
+
+    print("🔹 Streaming transactions to MQTT... (Press Ctrl+C to stop)")
+    if args.partitions:
+        print(f"🧩 Partitioned by card over {args.topic}/0..{args.partitions - 1}")
+    if len(clients) > 1:
+        print(f"🔀 Publishing over {len(clients)} connections"
+              + (", each card on one of them" if args.partitions else ", round-robin"))
+    print(f"⏱️ Pacing: {rate_profile.describe()}")
+    print(f"🔹 Every {publisher.csv_every}th transaction will be logged to CSV as well")
+    publisher.start()
+    if args.stats_interval > 0:
+        def report():
+            while True:
+                time.sleep(args.stats_interval)
+                if not publisher.running.is_set():
+                    return
+                line = f"Publisher stats: {publisher.stats()}"
+                print(f"📊 {line}")
+                logging.info(line)
+
+        threading.Thread(target=report, daemon=True, name="publisher-stats").start()
+    if args.metrics_port:
+        tracing.serve_metrics(publisher.latency, args.metrics_port, extra={"publisher": publisher.stats})
+        print(f"📈 Publisher stats at http://localhost:{args.metrics_port}/metrics")
+    for client in clients[1:]:  # every extra connection gets its own network thread
+        client.loop_start()
+    try:
+        clients[0].loop_forever(retry_first_connection=True)
+    except KeyboardInterrupt:
+        print("\n⛔ Stopping transaction stream...")
+    finally:
+        publisher.stop()
+        for client in clients:
+            client.disconnect()
+        for client in clients[1:]:
+            client.loop_stop()
+        print("✅ MQTT Client Disconnected. CSV file closed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import hashlib
+import shutil
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from .config import MODEL_PATH, TRAIN_DATA_PATH, ENCODER_SAMPLE_ROWS, FRAUD_THRESHOLD
+from .features import categorical_cols, selected_features, engineer_features
+
+
+def model_version(model_path):
+    """Short content hash of the model file, recorded with every archived verdict"""
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+class FraudScorer:
+    """Vectorized version of the subscriber's preprocess + predict path"""
+
+    def __init__(self, model_path=MODEL_PATH, train_data_path=TRAIN_DATA_PATH, nrows=ENCODER_SAMPLE_ROWS):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model file '{model_path}' not found! Run bigtrain.py first.")
+        if not os.path.exists(train_data_path):
+            raise FileNotFoundError(f"Training data file '{train_data_path}' not found!")
+        started = time.perf_counter()
+        from joblib import load  # with the pickled XGBClassifier this imports xgboost, sklearn and scipy
+        self.model = load(model_path)
+        self.model_version = model_version(model_path)
+        loaded = time.perf_counter()
+        self._fit_preprocessing(pd.read_csv(train_data_path, nrows=nrows))
+        self.timings = {"model": loaded - started, "encoders": time.perf_counter() - loaded}
+
+    def _fit_preprocessing(self, df):
+        # Same fitting as the original per-row subscriber, so probabilities match (see parity.py).
+        # LabelEncoder.fit is np.unique of the strings; calling it directly keeps sklearn out of this module.
+        df = engineer_features(df.dropna())
+        self.vocabularies = {}
+        for col in categorical_cols:
+            self.vocabularies[col] = pd.Index(np.unique(df[col].astype(str).to_numpy()))
+        self._label_encoders = None
+        X = self.encode(df)
+        self.mean_ = X.mean(axis=0)
+        scale = X.std(axis=0)
+        scale[scale == 0.0] = 1.0
+        self.scale_ = scale
+
+    @property
+    def label_encoders(self):
+        """Fitted sklearn LabelEncoders matching ``vocabularies``; imports scikit-learn on first use"""
+        if self._label_encoders is None:
+            from sklearn.preprocessing import LabelEncoder
+            self._label_encoders = {}
+            for col, vocabulary in self.vocabularies.items():
+                encoder = self._label_encoders[col] = LabelEncoder()
+                encoder.classes_ = vocabulary.to_numpy()
+        return self._label_encoders
+
+    def encode(self, df):
+        """Return the unscaled feature matrix; unknown categories map to -1 like the subscriber"""
+        missing = [col for col in selected_features if col not in df.columns]
+        if missing:
+            raise ValueError(f"Missing features: {', '.join(missing)}")
+        X = np.empty((len(df), len(selected_features)), dtype=np.float64)
+        for i, col in enumerate(selected_features):
+            if col in self.vocabularies:
+                X[:, i] = self.vocabularies[col].get_indexer(df[col].astype(str))
+            else:
+                X[:, i] = pd.to_numeric(df[col], errors='coerce')
+        return X
+
+    def scale(self, X):
+        """Standardize an encode() matrix in place"""
+        X -= self.mean_
+        X /= self.scale_
+        return X
+
+    def transform(self, df):
+        """Engineer, encode and scale a batch of raw transactions"""
+        return self.scale(self.encode(engineer_features(df)))
+
+    def predict_proba(self, df):
+        """Fraud probability for every row of ``df``"""
+        if len(df) == 0:
+            return np.empty(0, dtype=np.float64)
+        return self.model.predict_proba(self.transform(df))[:, 1]
+
+    def score_transaction(self, transaction):
+        """Fraud probability for one transaction dict; raises ValueError on missing features"""
+        return float(self.predict_proba(pd.DataFrame([transaction]))[0])
+
+
+_scorer = None
+_scorer_lock = threading.Lock()
+
+
+def get_scorer():
+    """Load the shared scorer once per process"""
+    global _scorer
+    if _scorer is None:
+        with _scorer_lock:
+            if _scorer is None:
+                _scorer = FraudScorer()
+    return _scorer
+
+
+def score_frame(scorer, df):
+    """Score the rows of ``df`` that carry every model feature.
+
+    Returns (probabilities, kept) where ``kept`` indexes the scored rows; rows
+    with a missing feature are skipped, as the subscriber skips such messages.
+    """
+    present = df.reindex(columns=selected_features)
+    kept = np.flatnonzero(present.notna().all(axis=1).to_numpy())
+    if len(kept) == 0:
+        return np.empty(0, dtype=np.float64), kept
+    if len(kept) < len(present):
+        present = present.iloc[kept]
+    return scorer.predict_proba(present), kept
+
+
+def score_records(scorer, transactions):
+    """score_frame() for a list of transaction dicts"""
+    return score_frame(scorer, pd.DataFrame.from_records(transactions))
+
+
+def iter_ndjson_chunks(stream, chunk_size):
+    """Yield DataFrames of ``chunk_size`` rows from a newline-delimited JSON stream"""
+    rows = []
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        rows.append(json.loads(line))
+        if len(rows) >= chunk_size:
+            yield pd.DataFrame(rows)
+            rows = []
+    if rows:
+        yield pd.DataFrame(rows)
+
+
+def iter_csv_chunks(stream, chunk_size):
+    """Yield DataFrames of ``chunk_size`` rows from a CSV file or stream"""
+    yield from pd.read_csv(stream, chunksize=chunk_size)
+
+
+def iter_arrow_chunks(stream, chunk_size):
+    """Yield DataFrames from an Arrow IPC stream one record batch at a time"""
+    import pyarrow as pa
+    reader = pa.ipc.open_stream(stream)
+    for batch in reader:
+        for offset in range(0, batch.num_rows, chunk_size):
+            yield batch.slice(offset, chunk_size).to_pandas()
+
+
+def iter_parquet_chunks(source, chunk_size, columns=None):
+    """Yield DataFrames from a Parquet file using its row groups"""
+    import pyarrow.parquet as pq
+    parquet_file = pq.ParquetFile(source)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+        yield batch.to_pandas()
+
+
+def iter_spooled_parquet_chunks(stream, chunk_size):
+    """Parquet needs a seekable file, so copy the stream to disk (not memory) first"""
+    with tempfile.TemporaryFile() as spool:
+        shutil.copyfileobj(stream, spool, 1024 * 1024)
+        spool.seek(0)
+        yield from iter_parquet_chunks(spool, chunk_size)
+
+
+CHUNK_READERS = {
+    "ndjson": iter_ndjson_chunks,
+    "csv": iter_csv_chunks,
+    "arrow": iter_arrow_chunks,
+    "parquet": iter_spooled_parquet_chunks,
+}
+
+CONTENT_TYPE_FORMATS = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json": "ndjson",
+    "text/csv": "csv",
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+}
+
+
+def score_chunk(scorer, chunk, row_offset=0):
+    """Score one chunk and return the output frame (row, [trans_num], probability, prediction)"""
+    probabilities = scorer.predict_proba(chunk)
+    result = pd.DataFrame({"row": np.arange(row_offset, row_offset + len(chunk))})
+    if "trans_num" in chunk.columns:
+        result["trans_num"] = chunk["trans_num"].to_numpy()
+    result["fraud_probability"] = probabilities.round(6)
+    result["is_fraud_predicted"] = (probabilities > FRAUD_THRESHOLD).astype(np.int8)
+    return result
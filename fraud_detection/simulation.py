@@ -0,0 +1,148 @@
+import os
+import random
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from .config import TRAIN_DATA_PATH
+
+# Columns of a published transaction beyond the fraudTrain.csv ones
+DERIVED_COLUMNS = ['geo_distance', 'transaction_hour', 'transaction_day', 'transaction_month', 'age']
+
+
+def build_simulation_profile(train_data_path=TRAIN_DATA_PATH, nrows=None):
+    """Vocabularies and value ranges that the generators sample from"""
+    if not os.path.exists(train_data_path):
+        raise FileNotFoundError(f"Training data file '{train_data_path}' not found!")
+    df = pd.read_csv(train_data_path, nrows=nrows)
+    geo_distance = np.sqrt((df['lat'] - df['merch_lat'])**2 + (df['long'] - df['merch_long'])**2)
+    age = pd.to_datetime(df['trans_date_trans_time']).dt.year - pd.to_datetime(df['dob']).dt.year
+    return {
+        "columns": df.columns.tolist(),
+        "merchants": df['merchant'].unique().tolist(),
+        "categories": df['category'].unique().tolist(),
+        "cities": df['city'].unique().tolist(),
+        "states": df['state'].unique().tolist(),
+        "jobs": df['job'].unique().tolist(),
+        "genders": df['gender'].unique().tolist(),
+        "amt": (float(df['amt'].min()), float(df['amt'].max())),
+        "city_pop": (int(df['city_pop'].min()), int(df['city_pop'].max())),
+        "lat": (float(df['lat'].min()), float(df['lat'].max())),
+        "long": (float(df['long'].min()), float(df['long'].max())),
+        "merch_lat": (float(df['merch_lat'].min()), float(df['merch_lat'].max())),
+        "merch_long": (float(df['merch_long'].min()), float(df['merch_long'].max())),
+        "geo_distance": (float(geo_distance.min()), float(geo_distance.max())),
+        "age": (int(age.min()), int(age.max())),
+    }
+
+
+def generate_transaction(profile, fraud_probability=0.05):
+    """One random transaction in the fraudTrain.csv layout plus the derived model features"""
+    is_fraud = random.random() < fraud_probability
+    current_time = datetime.now()
+    age_min, age_max = profile["age"]
+    dob = (current_time - timedelta(days=random.randint(age_min * 365, age_max * 365))).strftime("%Y-%m-%d")
+
+    # Fraudulent transactions tend to be larger
+    amt_min, amt_max = profile["amt"]
+    if is_fraud:
+        amt = round(random.uniform(amt_max * 0.7, amt_max), 2)
+    else:
+        amt = round(random.uniform(amt_min, amt_max * 0.7), 2)
+
+    lat = random.uniform(*profile["lat"])
+    long = random.uniform(*profile["long"])
+    merch_lat = random.uniform(*profile["merch_lat"])
+    merch_long = random.uniform(*profile["merch_long"])
+
+    # For fraud transactions, sometimes make the geo_distance very large
+    geo_distance = np.sqrt((lat - merch_lat)**2 + (long - merch_long)**2)
+    geo_max = profile["geo_distance"][1]
+    if is_fraud and random.random() < 0.7:
+        geo_distance = random.uniform(geo_max * 0.8, geo_max * 1.2)
+
+    return {
+        "trans_date_trans_time": current_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "cc_num": ''.join(str(random.randint(0, 9)) for _ in range(16)),
+        "merchant": random.choice(profile["merchants"]),
+        "category": random.choice(profile["categories"]),
+        "amt": amt,
+        "first": "SimFirst",
+        "last": "SimLast",
+        "gender": random.choice(profile["genders"]),
+        "street": "123 Sim Street",
+        "city": random.choice(profile["cities"]),
+        "state": random.choice(profile["states"]),
+        "zip": f"{random.randint(10000, 99999)}",
+        "lat": lat,
+        "long": long,
+        "city_pop": random.randint(*profile["city_pop"]),
+        "job": random.choice(profile["jobs"]),
+        "dob": dob,
+        "trans_num": f"{random.getrandbits(128):032x}",
+        "unix_time": int(current_time.timestamp()),
+        "merch_lat": merch_lat,
+        "merch_long": merch_long,
+        "is_fraud": int(is_fraud),
+        "geo_distance": geo_distance,
+        "transaction_hour": current_time.hour,
+        "transaction_day": current_time.day,
+        "transaction_month": current_time.month,
+        "age": current_time.year - int(dob[:4]),
+    }
+
+
+def generate_transactions(profile, count, fraud_probability=0.05, rng=None):
+    """Vectorized generate_transaction(): ``count`` transactions as one DataFrame"""
+    rng = rng if rng is not None else np.random.default_rng()
+    current_time = datetime.now()
+    is_fraud = rng.random(count) < fraud_probability
+    age_min, age_max = profile["age"]
+    dob = np.datetime64(current_time.date()) - rng.integers(age_min * 365, age_max * 365 + 1, count).astype("timedelta64[D]")
+
+    amt_min, amt_max = profile["amt"]
+    amt = np.where(is_fraud,
+                   rng.uniform(amt_max * 0.7, amt_max, count),
+                   rng.uniform(amt_min, amt_max * 0.7, count)).round(2)
+
+    lat = rng.uniform(*profile["lat"], count)
+    long = rng.uniform(*profile["long"], count)
+    merch_lat = rng.uniform(*profile["merch_lat"], count)
+    merch_long = rng.uniform(*profile["merch_long"], count)
+    geo_distance = np.sqrt((lat - merch_lat)**2 + (long - merch_long)**2)
+    geo_max = profile["geo_distance"][1]
+    far = is_fraud & (rng.random(count) < 0.7)
+    geo_distance = np.where(far, rng.uniform(geo_max * 0.8, geo_max * 1.2, count), geo_distance)
+
+    def pick(values):
+        return np.asarray(values, dtype=object)[rng.integers(0, len(values), count)]
+
+    return pd.DataFrame({
+        "trans_date_trans_time": current_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "cc_num": rng.integers(10**15, 10**16, count).astype(str),
+        "merchant": pick(profile["merchants"]),
+        "category": pick(profile["categories"]),
+        "amt": amt,
+        "first": "SimFirst",
+        "last": "SimLast",
+        "gender": pick(profile["genders"]),
+        "street": "123 Sim Street",
+        "city": pick(profile["cities"]),
+        "state": pick(profile["states"]),
+        "zip": rng.integers(10000, 100000, count).astype(str),
+        "lat": lat,
+        "long": long,
+        "city_pop": rng.integers(profile["city_pop"][0], profile["city_pop"][1] + 1, count),
+        "job": pick(profile["jobs"]),
+        "dob": dob.astype(str),
+        # uint8 rows, not "S16": NumPy byte strings drop trailing NUL bytes, which would shorten the id
+        "trans_num": [row.tobytes().hex() for row in np.frombuffer(rng.bytes(16 * count), dtype=np.uint8).reshape(count, 16)],
+        "unix_time": int(current_time.timestamp()),
+        "merch_lat": merch_lat,
+        "merch_long": merch_long,
+        "is_fraud": is_fraud.astype(np.int8),
+        "geo_distance": geo_distance,
+        "transaction_hour": current_time.hour,
+        "transaction_day": current_time.day,
+        "transaction_month": current_time.month,
+        "age": current_time.year - dob.astype("datetime64[Y]").astype(np.int64) - 1970,
+    })
@@ -0,0 +1,219 @@
+"""Disk-backed FIFO for messages the publisher cannot send.
+
+Messages are appended to numbered segment files in ``directory``:
+
+    <directory>/segment-000000000001.log
+    <directory>/cursor.json
+
+Each record is a 4-byte length, a 4-byte CRC32 and the payload. Records are
+only ever appended; replay reads from a cursor (segment and offset) and a
+segment is deleted once it has been read through. The cursor is saved at most
+every ``cursor_interval`` seconds and on close, so after a crash up to that
+much of the replay is sent again (the subscriber drops the duplicates by
+trans_num). A torn record at the end of the last segment is truncated on open.
+
+Disk use is bounded by ``max_bytes``: when an append would exceed it, the
+oldest segment is deleted and its unsent records are counted as dropped, the
+same drop-oldest policy as the publisher's in-memory buffer.
+"""
+import os
+import json
+import glob
+import time
+import zlib
+import struct
+import threading
+
+RECORD_HEADER = struct.Struct("!II")  # payload length, CRC32
+
+
+def _segment_path(directory, number):
+    return os.path.join(directory, f"segment-{number:012d}.log")
+
+
+def _segment_number(path):
+    return int(os.path.basename(path)[len("segment-"):-len(".log")])
+
+
+def _scan(path, offset=0):
+    """(records, end offset of the last whole record) from ``offset``"""
+    records = 0
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+            length, crc = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            records += 1
+            offset += RECORD_HEADER.size + length
+    return records, offset
+
+
+class SpillQueue:
+    """Append-only, size-bounded on-disk FIFO of message payloads; thread-safe"""
+
+    def __init__(self, directory, max_bytes=256 * 2**20, segment_bytes=8 * 2**20, cursor_interval=1.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = min(segment_bytes, max_bytes)
+        self.cursor_interval = cursor_interval
+        self.lock = threading.Lock()
+        self.spilled = 0
+        self.replayed = 0
+        self.dropped = 0
+        self._cursor_saved = 0.0
+        self.epoch = 0  # bumped when the segment being read is dropped
+        self._peeked_epoch = 0
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    def _recover(self):
+        """Rebuild the segment list, pending count and read cursor from the files left by a previous run"""
+        self.segments = {}  # number -> [bytes, records not yet read]
+        cursor = {"segment": 0, "offset": 0}
+        cursor_path = os.path.join(self.directory, "cursor.json")
+        if os.path.exists(cursor_path):
+            with open(cursor_path) as f:
+                cursor = json.load(f)
+        paths = sorted(glob.glob(os.path.join(self.directory, "segment-*.log")), key=_segment_number)
+        for index, path in enumerate(paths):
+            number = _segment_number(path)
+            if number < cursor["segment"]:
+                os.remove(path)  # read through before the last cursor save
+                continue
+            start = cursor["offset"] if number == cursor["segment"] else 0
+            records, end = _scan(path, start)
+            if index == len(paths) - 1 and end < os.path.getsize(path):
+                with open(path, "r+b") as f:
+                    f.truncate(end)  # torn final record
+            self.segments[number] = [os.path.getsize(path), records]
+        self.read_segment = min(self.segments, default=cursor["segment"])
+        self.read_offset = cursor["offset"] if self.read_segment == cursor["segment"] else 0
+        self.write_segment = max(self.segments, default=self.read_segment)
+        if not self.segments:
+            self.write_segment = self.read_segment = max(self.read_segment, 1)
+            self.read_offset = 0
+            self.segments[self.write_segment] = [0, 0]
+            open(_segment_path(self.directory, self.write_segment), "ab").close()
+        self.writer = open(_segment_path(self.directory, self.write_segment), "ab")
+        self.reader = None
+
+    @property
+    def pending(self):
+        return sum(records for _, records in self.segments.values())
+
+    def disk_bytes(self):
+        return sum(size for size, _ in self.segments.values())
+
+    def append(self, payload):
+        """Write one message at the tail, deleting the oldest segment first if the disk bound requires it"""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        record = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self.lock:
+            if self.segments[self.write_segment][0] + len(record) > self.segment_bytes and self.segments[self.write_segment][0]:
+                self._roll()
+            while self.disk_bytes() + len(record) > self.max_bytes and len(self.segments) > 1:
+                self._drop_oldest()
+            self.writer.write(record)
+            self.writer.flush()
+            self.segments[self.write_segment][0] += len(record)
+            self.segments[self.write_segment][1] += 1
+            self.spilled += 1
+
+    def _roll(self):
+        self.writer.close()
+        self.write_segment += 1
+        self.segments[self.write_segment] = [0, 0]
+        self.writer = open(_segment_path(self.directory, self.write_segment), "ab")
+
+    def _drop_oldest(self):
+        number = min(self.segments)
+        self.dropped += self.segments.pop(number)[1]
+        if number == self.read_segment:
+            self._close_reader()
+            self.read_segment, self.read_offset = min(self.segments), 0
+            self.epoch += 1
+        os.remove(_segment_path(self.directory, number))
+
+    def _close_reader(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+    def peek(self, limit):
+        """Up to ``limit`` payloads from the head, oldest first; they stay queued until commit()"""
+        payloads = []
+        with self.lock:
+            self.writer.flush()
+            segment, offset = self.read_segment, self.read_offset
+            while len(payloads) < limit and segment in self.segments:
+                path = _segment_path(self.directory, segment)
+                if self.reader is None or self.reader.name != path:
+                    self._close_reader()
+                    self.reader = open(path, "rb")
+                self.reader.seek(offset)
+                header = self.reader.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    if segment == self.write_segment:
+                        break
+                    segment, offset = segment + 1, 0
+                    continue
+                length, _ = RECORD_HEADER.unpack(header)
+                payloads.append(self.reader.read(length))
+                offset += RECORD_HEADER.size + length
+            self._peeked_epoch = self.epoch
+        return payloads
+
+    def commit(self, payloads):
+        """Remove the leading ``payloads`` of the last peek(), now that they have been sent"""
+        with self.lock:
+            if self.epoch != self._peeked_epoch:
+                # The head segment was dropped for space since peek(): those records are counted as dropped already
+                return
+            for payload in payloads:
+                while self.segments[self.read_segment][1] == 0:
+                    self._finish_read_segment()
+                self.read_offset += RECORD_HEADER.size + len(payload)
+                self.segments[self.read_segment][1] -= 1
+                self.replayed += 1
+            if self.segments[self.read_segment][1] == 0 and self.read_segment != self.write_segment:
+                self._finish_read_segment()
+            if time.monotonic() - self._cursor_saved >= self.cursor_interval:
+                self._save_cursor()
+
+    def _finish_read_segment(self):
+        self._close_reader()
+        number = self.read_segment
+        del self.segments[number]
+        os.remove(_segment_path(self.directory, number))
+        self.read_segment, self.read_offset = min(self.segments), 0
+
+    def _save_cursor(self):
+        temporary = os.path.join(self.directory, "cursor.json.tmp")
+        with open(temporary, "w") as f:
+            json.dump({"segment": self.read_segment, "offset": self.read_offset}, f)
+        os.replace(temporary, os.path.join(self.directory, "cursor.json"))
+        self._cursor_saved = time.monotonic()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "spilled": self.spilled,
+                "replayed": self.replayed,
+                "dropped": self.dropped,
+                "pending": self.pending,
+                "disk_bytes": self.disk_bytes(),
+                "max_bytes": self.max_bytes,
+                "segments": len(self.segments),
+            }
+
+    def close(self):
+        with self.lock:
+            self._save_cursor()
+            self._close_reader()
+            self.writer.close()
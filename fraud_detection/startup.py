@@ -0,0 +1,151 @@
+"""Startup-time profiling of the entry points.
+
+``imports`` runs an entry point's import in a fresh interpreter under
+``python -X importtime`` and reports the slowest modules and top-level
+packages. ``ready`` starts the subscriber against a bundled broker, times it
+from launch until it has subscribed, and exits 1 when the median exceeds the
+budget:
+
+    python -m fraud_detection.startup imports subscriber
+    python -m fraud_detection.startup ready --repeat 5 --budget 4.0
+
+Both measure a warm OS page cache, as when a crashed process is restarted on
+the same host.
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+import statistics
+from . import config
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# Entry point -> module, or script path relative to the repository root
+ENTRY_POINTS = {
+    "subscriber": "fraud_detection.subscriber",
+    "publisher": "fraud_detection.publisher",
+    "training": "fraud_detection.training",
+    "broker": "fraud_detection.broker",
+    "archive": "fraud_detection.archive",
+    "realtimeapp": "realtime/realtimeapp.PY",
+}
+SUBSCRIBER_BUDGET_SECONDS = 4.0
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _import_code(target):
+    if not target.endswith((".py", ".PY")):
+        return f"import {target}"
+    # Scripts import their neighbours (export, checkpoint, ...) like they do when run from their directory
+    path = os.path.abspath(os.path.join(ROOT, target))
+    return (f"import sys, importlib.machinery; sys.path.insert(0, {os.path.dirname(path)!r}); "
+            f"importlib.machinery.SourceFileLoader('entry_point', {path!r}).load_module()")
+
+
+def import_times(target, python=sys.executable):
+    """(wall seconds, [(module, self µs, cumulative µs, depth)]) for importing ``target`` in a new interpreter"""
+    with tempfile.TemporaryDirectory(prefix="startup-") as workdir:  # scripts may create logs in the cwd
+        started = time.perf_counter()
+        completed = subprocess.run([python, "-X", "importtime", "-c", _import_code(target)], cwd=workdir,
+                                   env={**os.environ, "PYTHONPATH": ROOT}, capture_output=True, text=True)
+        wall = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"importing {target} failed:\n{completed.stderr[-2000:]}")
+    modules = []
+    for line in completed.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            modules.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2))
+    return wall, modules
+
+
+def package_totals(modules):
+    """Self time summed per top-level package, slowest first"""
+    totals = {}
+    for name, self_us, _, _ in modules:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+def subscriber_ready_seconds(model_path, train_data_path, timeout=120.0, python=sys.executable):
+    """Seconds from launching the subscriber until it has subscribed, and its own startup line"""
+    from .broker import MQTTBroker
+    broker = MQTTBroker("127.0.0.1", 0).start()
+    with tempfile.TemporaryDirectory(prefix="startup-") as workdir:
+        command = [python, "-u", "-m", "fraud_detection.subscriber", "--broker", "127.0.0.1", "--port", str(broker.port),
+                   "--model", os.path.abspath(model_path), "--train-data", os.path.abspath(train_data_path),
+                   "--metrics-port", "0", "--summary-interval", "0", "--client-id", f"startup-{os.getpid()}", "--clean-session"]
+        started = time.perf_counter()
+        process = subprocess.Popen(command, cwd=workdir, env={**os.environ, "PYTHONPATH": ROOT},
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        ready, startup_line = None, ""
+        try:
+            for line in process.stdout:
+                if "Started in" in line:
+                    startup_line = line.strip()
+                if "Subscribed to topic" in line:
+                    ready = time.perf_counter() - started
+                    break
+                if time.perf_counter() - started > timeout:
+                    break
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            broker.stop()
+    if ready is None:
+        raise RuntimeError("the subscriber did not subscribe (is the model trained and the data present?)")
+    return ready, startup_line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the startup time of the entry points")
+    commands = parser.add_subparsers(dest="command", required=True)
+    imports_parser = commands.add_parser("imports", help="import time per module of an entry point")
+    imports_parser.add_argument("entry", nargs="?", default="subscriber",
+                                help=f"one of {', '.join(ENTRY_POINTS)}, 'all', or a module name")
+    imports_parser.add_argument("--top", type=int, default=15)
+    ready_parser = commands.add_parser("ready", help="subscriber cold start, from launch until subscribed")
+    ready_parser.add_argument("--repeat", type=int, default=5)
+    ready_parser.add_argument("--budget", type=float, default=SUBSCRIBER_BUDGET_SECONDS, help="median seconds allowed")
+    ready_parser.add_argument("--model", default=config.MODEL_PATH)
+    ready_parser.add_argument("--train-data", default=config.TRAIN_DATA_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "imports":
+        entries = list(ENTRY_POINTS) if args.entry == "all" else [args.entry]
+        for entry in entries:
+            wall, modules = import_times(ENTRY_POINTS.get(entry, entry))
+            total = sum(self_us for _, self_us, _, _ in modules)
+            print(f"⏱️ {entry}: {total / 1e6:.2f}s importing {len(modules)} modules ({wall:.2f}s with interpreter startup)")
+            if args.entry == "all":
+                continue
+            print("  slowest packages (self time):")
+            for package, self_us in package_totals(modules)[:args.top]:
+                print(f"    {package:32} {self_us / 1000:9.1f} ms")
+            print("  slowest modules (self time):")
+            for name, self_us, cumulative_us, _ in sorted(modules, key=lambda m: -m[1])[:args.top]:
+                print(f"    {name:48} {self_us / 1000:9.1f} ms  (cumulative {cumulative_us / 1000:.1f} ms)")
+        return
+
+    times = []
+    for run in range(args.repeat):
+        seconds, startup_line = subscriber_ready_seconds(args.model, args.train_data)
+        times.append(seconds)
+        print(f"  run {run + 1}: subscribed {seconds:.2f}s after launch  [{startup_line}]")
+    median = statistics.median(times)
+    print(f"⏱️ Subscriber cold start: median {median:.2f}s, max {max(times):.2f}s (budget {args.budget:g}s)")
+    if median > args.budget:
+        print("❌ Over budget: see `python -m fraud_detection.startup imports subscriber` for where the time goes")
+        raise SystemExit(1)
+    print("✅ Within budget")
+
+
+if __name__ == "__main__":
+    main()
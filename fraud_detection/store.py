@@ -0,0 +1,274 @@
+"""Persistent store of every scored transaction, for investigations.
+
+SQLite in WAL mode, so the subscriber keeps writing while the Flask app (or
+any other process) queries through a read-only TransactionStore.reader().
+Verdicts are buffered in memory and inserted in batches from a background
+thread. Each query shape has its own index:
+(cc_num, scored_at), (merchant, scored_at), (scored_at), and a partial index
+on scored_at for predicted frauds. "This card in the last 24 h" is therefore
+an index range scan whose cost depends on the rows returned, not on the table
+size. Rows older than the retention window are deleted in bounded batches.
+trans_num is unique, so a redelivered transaction that was already stored is
+ignored rather than stored twice.
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+import urllib.parse
+from datetime import datetime
+import pandas as pd
+from . import config
+
+COLUMNS = (
+    "scored_at", "trans_num", "trans_time", "cc_num", "merchant", "category", "amt",
+    "gender", "city", "state", "job", "is_fraud_actual", "fraud_probability", "is_fraud_predicted",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    scored_at REAL NOT NULL,
+    trans_num TEXT,
+    trans_time TEXT,
+    cc_num INTEGER,
+    merchant TEXT,
+    category TEXT,
+    amt REAL,
+    gender TEXT,
+    city TEXT,
+    state TEXT,
+    job TEXT,
+    is_fraud_actual INTEGER,
+    fraud_probability REAL NOT NULL,
+    is_fraud_predicted INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_card ON transactions (cc_num, scored_at);
+CREATE INDEX IF NOT EXISTS idx_transactions_merchant ON transactions (merchant, scored_at);
+CREATE INDEX IF NOT EXISTS idx_transactions_time ON transactions (scored_at);
+CREATE INDEX IF NOT EXISTS idx_transactions_frauds ON transactions (scored_at) WHERE is_fraud_predicted = 1;
+"""
+
+UNIQUE_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_trans_num ON transactions (trans_num)"
+# Stores written before trans_num was unique may hold repeats; the first copy is kept
+DELETE_REPEATS = "DELETE FROM transactions WHERE trans_num IS NOT NULL AND id NOT IN (SELECT MIN(id) FROM transactions GROUP BY trans_num)"
+
+INSERT = f"INSERT OR IGNORE INTO transactions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_time(value):
+    """Epoch seconds for a "YYYY-mm-dd HH:MM:SS" (local time) string, or None"""
+    return datetime.strptime(value, TIME_FORMAT).timestamp() if value else None
+
+
+class TransactionStore:
+    """Batched writer and indexed reader over one SQLite file.
+
+    Writers call add() and start() the flush thread; readers just call query()
+    or iter_chunks(), each thread using its own read connection. A row counts
+    as stored once a flush() that took it has returned; a failed flush puts
+    its rows back at the head of the queue for the next one.
+    """
+
+    def __init__(self, path=config.STORE_PATH, retention_seconds=config.STORE_RETENTION_SECONDS,
+                 batch_size=1000, flush_interval=1.0, compact_interval=3600.0, read_only=False):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.pending = []
+        self.pending_lock = threading.Lock()
+        self.flush_lock = threading.Lock()  # one flush at a time, so rows are written in the order they were added
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+        self.local = threading.local()
+        self.thread = None
+        self.written = 0
+        self.ignored = 0  # rows whose trans_num was already stored
+        self.deleted = 0
+        self.read_only = read_only
+        if read_only:
+            self.write_connection = None
+            return
+        self.write_connection = self._connect()
+        # auto_vacuum only takes effect before the first table exists
+        self.write_connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self.write_connection.executescript(SCHEMA)
+        try:
+            self.write_connection.execute(UNIQUE_INDEX)
+        except sqlite3.IntegrityError:
+            with self.write_connection:
+                removed = self.write_connection.execute(DELETE_REPEATS).rowcount
+            logging.warning(f"Transaction store: removed {removed} repeated trans_num rows before making it unique")
+            self.write_connection.execute(UNIQUE_INDEX)
+
+    @classmethod
+    def reader(cls, path=config.STORE_PATH, retention_seconds=config.STORE_RETENTION_SECONDS):
+        """Query-only view of a store written by another process: no schema migration, and no writes"""
+        return cls(path, retention_seconds=retention_seconds, read_only=True)
+
+    def _connect(self):
+        if self.read_only:
+            uri = f"file:{urllib.parse.quote(os.path.abspath(self.path))}?mode=ro"
+            return sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=30)
+        connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    def _reader(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = self.local.connection = self._connect()
+            connection.row_factory = sqlite3.Row
+        return connection
+
+    def add(self, transaction, fraud_probability, prediction):
+        """Queue one verdict; it is written by the next flush"""
+        row = (
+            time.time(),
+            transaction.get("trans_num"),
+            transaction.get("trans_date_trans_time"),
+            _int_or_none(transaction.get("cc_num")),
+            transaction.get("merchant"),
+            transaction.get("category"),
+            transaction.get("amt"),
+            transaction.get("gender"),
+            transaction.get("city"),
+            transaction.get("state"),
+            transaction.get("job"),
+            _int_or_none(transaction.get("is_fraud")),
+            float(fraud_probability),
+            int(prediction),
+        )
+        with self.pending_lock:
+            self.pending.append(row)
+            full = len(self.pending) >= self.batch_size
+        if full:
+            self.wake.set()
+
+    def flush(self):
+        """Write every queued row; once this returns they are committed, and on sqlite3.Error they are queued again"""
+        with self.flush_lock:
+            with self.pending_lock:
+                rows, self.pending = self.pending, []
+            if not rows:
+                return 0
+            try:
+                with self.write_connection:
+                    inserted = self.write_connection.executemany(INSERT, rows).rowcount
+            except sqlite3.Error:
+                with self.pending_lock:
+                    self.pending[:0] = rows
+                raise
+            self.written += inserted
+            self.ignored += len(rows) - inserted
+            return len(rows)
+
+    def compact(self, now=None, batch=50000):
+        """Delete rows older than the retention window, ``batch`` at a time so readers are never blocked for long"""
+        cutoff = (now or time.time()) - self.retention_seconds
+        deleted = 0
+        while True:
+            with self.write_connection:
+                cursor = self.write_connection.execute(
+                    "DELETE FROM transactions WHERE id IN "
+                    "(SELECT id FROM transactions WHERE scored_at < ? ORDER BY scored_at LIMIT ?)", (cutoff, batch))
+            deleted += cursor.rowcount
+            if cursor.rowcount < batch:
+                break
+        if deleted:
+            self.write_connection.execute("PRAGMA incremental_vacuum")
+            self.write_connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.deleted += deleted
+        return deleted
+
+    def _run(self):
+        next_compaction = time.monotonic()
+        while not self.stopped.is_set():
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            try:
+                self.flush()
+                if time.monotonic() >= next_compaction:
+                    deleted = self.compact()
+                    if deleted:
+                        logging.info(f"Transaction store: removed {deleted} rows past retention")
+                    next_compaction = time.monotonic() + self.compact_interval
+            except sqlite3.Error as e:
+                logging.error(f"Transaction store write failed: {e}")
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True, name="transaction-store")
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.stopped.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join(timeout=10)
+        if self.write_connection is not None:
+            self.flush()
+            self.write_connection.close()
+
+    def _where(self, cc_num=None, merchant=None, since=None, until=None, fraud_only=False):
+        clauses, params = [], []
+        if cc_num is not None:
+            clauses.append("cc_num = ?")
+            params.append(int(cc_num))
+        if merchant is not None:
+            clauses.append("merchant = ?")
+            params.append(merchant)
+        if since is not None:
+            clauses.append("scored_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("scored_at <= ?")
+            params.append(until)
+        if fraud_only:
+            clauses.append("is_fraud_predicted = 1")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, cc_num=None, merchant=None, since=None, until=None, fraud_only=False, limit=1000):
+        """Matching transactions, newest first; ``since``/``until`` are epoch seconds"""
+        where, params = self._where(cc_num, merchant, since, until, fraud_only)
+        rows = self._reader().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM transactions{where} ORDER BY scored_at DESC LIMIT ?", params + [int(limit)])
+        return [dict(row) for row in rows]
+
+    def iter_chunks(self, chunk_size, since=None, until=None, fraud_only=False):
+        """DataFrames of matching rows, oldest first, with ``scored_at`` also as a "timestamp" string"""
+        where, params = self._where(since=since, until=until, fraud_only=fraud_only)
+        cursor = self._reader().execute(f"SELECT {', '.join(COLUMNS)} FROM transactions{where} ORDER BY scored_at", params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            chunk = pd.DataFrame.from_records(rows, columns=COLUMNS)
+            chunk.insert(0, "timestamp", [time.strftime(TIME_FORMAT, time.localtime(t)) for t in chunk["scored_at"]])
+            yield chunk
+
+    def stats(self):
+        with self.pending_lock:
+            pending = len(self.pending)
+        size = sum(os.path.getsize(self.path + suffix) for suffix in ("", "-wal") if os.path.exists(self.path + suffix))
+        return {
+            "path": self.path,
+            "pending": pending,
+            "written": self.written,
+            "ignored_repeats": self.ignored,
+            "deleted": self.deleted,
+            "size_mb": round(size / 2**20, 1),
+            "retention_hours": round(self.retention_seconds / 3600, 1),
+        }
@@ -0,0 +1,574 @@
+import os
+import time
+import socket
+import queue
+import signal
+import logging
+import argparse
+import threading
+from collections import deque
+import pandas as pd
+from datetime import datetime
+from . import config, mqtt_io, profiling, scoring, tracing
+from .archive import TransactionArchiver
+from .dedup import DuplicateFilter, transaction_key
+from .features import engineer_features
+from .partitions import PartitionMember, topic_partition
+from .scoring import FraudScorer
+from .store import TransactionStore
+
+# Per-message stages, in pipeline order; end_to_end runs from tracing.stamp() in the publisher to the verdict
+STAGES = ("decode", "encode", "scale", "predict", "sink", "end_to_end")
+
+FRAUD_CSV_HEADER = "timestamp,merchant,category,amount,gender,city,state,job,is_fraud_actual,is_fraud_predicted,fraud_probability\n"
+
+
+class FraudDetectionService:
+    """Scores each MQTT transaction, logging verdicts and appending frauds to detected_frauds.csv.
+
+    With a ``store``, every verdict is also queued for the TransactionStore, and
+    with an ``archiver`` for the Parquet archive. With a ``dedup`` filter, a
+    transaction whose trans_num was already seen is dropped before scoring, so
+    a redelivery reaches none of the sinks. The filter is saved to
+    ``dedup_state`` at most every ``dedup_save_interval`` seconds, right after
+    the sinks were flushed, so a restart after a crash still recognises
+    exactly what the sinks already hold.
+
+    paho's network thread only queues messages; a worker thread scores them.
+    A scored message stays unacknowledged (the client must use manual_ack)
+    until settle() has flushed the store and the archive, so a message whose
+    verdict was still buffered in a sink when the process died is
+    redelivered. The worker settles once ``max_unacked`` scored messages wait
+    or the oldest has waited ``ack_interval`` seconds. The worker
+    takes one message at a time while it keeps up. When a message arrives more
+    than ``catchup_lag`` seconds after it was published (a backlog after a
+    restart, for instance), it switches to catch-up mode. In catch-up mode it
+    scores everything waiting, up to ``catchup_batch_size`` messages, in one
+    vectorized call, and returns to single messages once the lag is below half
+    the threshold.
+
+    With a ``membership`` (a PartitionMember), the service consumes the
+    partitions of ``topic`` assigned to it instead of ``topic`` itself, each
+    through the partition's own session. Messages of a partition handed over
+    to another worker before they were scored are dropped unacknowledged, so
+    the broker redelivers them to the new owner in order.
+    """
+
+    def __init__(self, scorer, topic=config.MQTT_TOPIC, fraud_csv_path='detected_frauds.csv', admin_topic=None, store=None,
+                 archiver=None, dedup=None, qos=1, catchup_lag=5.0, catchup_batch_size=4096, membership=None,
+                 dedup_state=None, dedup_save_interval=10.0, ack_interval=1.0, max_unacked=500):
+        self.scorer = scorer
+        self.topic = topic
+        self.admin_topic = admin_topic
+        self.store = store
+        self.archiver = archiver
+        self.dedup = dedup
+        self.dedup_state = dedup_state
+        self.dedup_save_interval = dedup_save_interval
+        self._dedup_saved = (time.monotonic(), 0)  # when, and the checked count then
+        self.qos = qos
+        self.ack_interval = ack_interval
+        self.max_unacked = max_unacked
+        self.unacked = []  # scored messages whose verdicts may still be buffered in a sink
+        self.unacked_since = None
+        self.catchup_lag = catchup_lag
+        self.catchup_batch_size = catchup_batch_size
+        self.membership = membership
+        self.latency = tracing.LatencyTracker(STAGES)
+        self.fraud_logger = logging.getLogger('fraud_logger')
+        self.fraud_csv = open(fraud_csv_path, 'w')
+        self.fraud_csv.write(FRAUD_CSV_HEADER)
+        self.fraud_csv.flush()
+        self.client = None
+        self.inbox = queue.Queue()
+        self.last_received = time.monotonic()
+        self.stopped = threading.Event()
+        self.worker = None
+        self.catching_up = False
+        self.processed = 0
+        self.lag_seconds = None
+        self.max_lag_seconds = 0.0
+        self.catchups = []  # finished catch-ups, newest last
+        self._catchup_start = None
+        self._progress = deque()  # (monotonic time, processed) over the last few seconds, for the drain rate
+
+    def on_connect(self, client, userdata, flags, rc, properties=None):
+        if rc == 0:
+            print("✅ Connected to MQTT Broker!")
+            if flags.session_present:
+                print("📬 Resumed persistent session: transactions queued while offline follow")
+            self.client = client
+            if self.membership is not None:
+                self.membership.on_connect(client)
+                print(f"✅ Subscribed to topic: {self.topic}/<partition> "
+                      f"({self.membership.partitions} partitions, divided among the workers on {self.membership.membership_topic})")
+            else:
+                client.subscribe(self.topic, qos=self.qos)
+                print(f"✅ Subscribed to topic: {self.topic}")
+            if self.admin_topic:
+                client.subscribe(self.admin_topic)
+        else:
+            print(f"❌ Connection failed with code {rc}")
+
+    def on_message(self, client, userdata, msg):
+        self.last_received = time.monotonic()
+        if self.membership is not None:
+            partition = self._partition(msg)
+            if partition is not None:
+                self.membership.received(partition)
+        self.inbox.put(msg)
+
+    def _partition(self, msg):
+        partition = topic_partition(msg.topic)
+        return partition if partition is not None and partition < self.membership.partitions else None
+
+    def drain(self, idle_seconds=1.0, timeout=60.0):
+        """Unsubscribe, then return once every message received has been scored and acknowledged.
+
+        Messages the broker had already sent keep arriving for a moment, so
+        this waits until nothing has arrived for ``idle_seconds``.
+        """
+        print(f"🚰 Draining: unsubscribing, finishing {self.inbox.unfinished_tasks} messages in hand")
+        deadline = time.monotonic() + timeout
+        if self.membership is not None:
+            self.membership.leave(timeout)  # hands the partitions over once their messages are done
+        elif self.client is not None:
+            self.client.unsubscribe(self.topic)
+        while time.monotonic() < deadline:
+            if self.inbox.unfinished_tasks == 0 and time.monotonic() - self.last_received >= idle_seconds:
+                return True
+            time.sleep(0.1)
+        return False
+
+    def start(self):
+        self.worker = threading.Thread(target=self._run, daemon=True, name="subscriber-worker")
+        self.worker.start()
+        return self
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                batch = [self.inbox.get(timeout=0.5)]
+            except queue.Empty:
+                batch = []
+            limit = self.catchup_batch_size if self.catching_up else 1
+            while batch and len(batch) < limit:
+                try:
+                    batch.append(self.inbox.get_nowait())
+                except queue.Empty:
+                    break
+            if self.membership is not None:
+                # Between batches: every acknowledgement so far is out before a revoked session closes
+                if self.membership.revoking():
+                    self.settle()
+                self.membership.release_revoked()
+                batch = self._consuming(batch)
+            if batch:
+                if len(batch) == 1:
+                    lag_ns = self.process_message(batch[0])
+                else:
+                    lag_ns = self.process_batch(batch)
+                if not self.unacked:
+                    self.unacked_since = time.monotonic()
+                self.unacked.extend(batch)
+                self._track(len(batch), lag_ns)
+            if self.unacked and (len(self.unacked) >= self.max_unacked
+                                 or time.monotonic() - self.unacked_since >= self.ack_interval):
+                self.settle()
+        self.settle()
+
+    def settle(self):
+        """Flush the sinks, then acknowledge every message scored since the last settle.
+
+        Returns False if a sink could not write; the messages then stay
+        unacknowledged and the next settle tries again.
+        """
+        if not self.unacked:
+            return True
+        try:
+            for sink in (self.store, self.archiver):
+                if sink is not None:
+                    sink.flush()
+        except Exception as e:
+            logging.error(f"Sink flush failed; {len(self.unacked)} scored messages stay unacknowledged: {e}")
+            self.unacked_since = time.monotonic()
+            return False
+        messages, self.unacked = self.unacked, []
+        # Every id in the filter now has its verdict in the sinks, so a crash after this save drops only true repeats
+        self.save_dedup()
+        self._ack(messages)
+        for msg in messages:
+            self.inbox.task_done()
+            if self.membership is not None:
+                partition = self._partition(msg)
+                if partition is not None:
+                    self.membership.done(partition)
+        return True
+
+    def save_dedup(self, force=False):
+        """Write the seen-set to ``dedup_state`` if it changed and the interval has passed (or ``force``).
+
+        Skipped while scored messages are unsettled: their ids are in the
+        filter, but their verdicts may not be in the sinks yet.
+        """
+        if self.dedup is None or not self.dedup_state or self.unacked:
+            return
+        now = time.monotonic()
+        saved_at, checked = self._dedup_saved
+        if self.dedup.checked == checked or not force and now - saved_at < self.dedup_save_interval:
+            return
+        try:
+            self.dedup.save(self.dedup_state)
+        except OSError as e:
+            logging.error(f"Could not save the duplicate filter to {self.dedup_state}: {e}")
+        self._dedup_saved = (now, self.dedup.checked)
+
+    def _consuming(self, batch):
+        """The messages of partitions still consumed here; the rest go unacknowledged to their new owner"""
+        kept = []
+        for msg in batch:
+            partition = self._partition(msg)
+            if partition is None or self.membership.consuming(partition):
+                kept.append(msg)
+            else:
+                self.inbox.task_done()
+                self.membership.done(partition)
+        return kept
+
+    def _ack(self, messages):
+        for msg in messages:
+            partition = self._partition(msg) if self.membership is not None else None
+            client = self.client if partition is None else self.membership.client_for(partition)
+            if msg.qos and client is not None:
+                client.ack(msg.mid, msg.qos)
+
+    def _track(self, count, lag_ns):
+        """Update lag and drain rate, and switch in or out of catch-up mode"""
+        now = time.monotonic()
+        self.processed += count
+        self._progress.append((now, self.processed))
+        while len(self._progress) > 2 and now - self._progress[0][0] > 5.0:
+            self._progress.popleft()
+        if lag_ns is None or not self.catchup_lag:
+            return
+        lag = lag_ns / 1e9
+        self.lag_seconds = lag
+        self.max_lag_seconds = max(self.max_lag_seconds, lag)
+        if not self.catching_up and lag > self.catchup_lag:
+            self.catching_up = True
+            self._catchup_start = (now, self.processed - count, lag)
+            message = f"Backlog detected (lag {lag:.1f}s): scoring in batches of up to {self.catchup_batch_size}"
+            print(f"⏩ {message}")
+            logging.warning(message)
+        elif self.catching_up and lag < self.catchup_lag / 2:
+            self.catching_up = False
+            started, processed, start_lag = self._catchup_start
+            seconds = max(now - started, 1e-9)
+            catchup = {
+                "messages": self.processed - processed,
+                "seconds": round(seconds, 2),
+                "drain_rate": round((self.processed - processed) / seconds, 1),
+                "start_lag_seconds": round(start_lag, 2),
+                "end_lag_seconds": round(lag, 3),
+            }
+            self.catchups = self.catchups[-9:] + [catchup]
+            message = (f"Caught up: {catchup['messages']} messages in {catchup['seconds']}s "
+                       f"({catchup['drain_rate']} msg/s), lag {lag:.2f}s")
+            print(f"✅ {message}")
+            logging.warning(message)
+
+    def consumer_stats(self):
+        """Lag, drain rate and catch-up history, served under "consumer" in /metrics"""
+        progress = list(self._progress)
+        rate = 0.0
+        if len(progress) > 1 and progress[-1][0] > progress[0][0]:
+            rate = (progress[-1][1] - progress[0][1]) / (progress[-1][0] - progress[0][0])
+        if progress and time.monotonic() - progress[-1][0] > 5.0:
+            rate = 0.0  # nothing processed recently
+        return {
+            "mode": "catch-up" if self.catching_up else "live",
+            "lag_seconds": None if self.lag_seconds is None else round(self.lag_seconds, 3),
+            "max_lag_seconds": round(self.max_lag_seconds, 3),
+            "drain_rate": round(rate, 1),
+            "processed": self.processed,
+            "waiting": self.inbox.qsize(),
+            "unacknowledged": len(self.unacked),
+            "catchups": self.catchups,
+        }
+
+    def _decode(self, msg):
+        """(transaction, trace), or None for a duplicate"""
+        with self.latency.time("decode"):
+            transaction = mqtt_io.decode_transaction(msg.payload)
+        trace = transaction.pop(tracing.TRACE_KEY, None)
+        key = transaction_key(transaction)
+        if self.dedup is not None and key is not None and self.dedup.seen(key):
+            print(f"♻️ Duplicate of {key} ignored")
+            return None
+        return transaction, trace
+
+    def process_message(self, msg):
+        """Score one message into the sinks; returns its publish-to-verdict time in ns, if traced"""
+        latency = self.latency
+        try:
+            decoded = self._decode(msg)
+            if decoded is None:
+                return None
+            transaction, trace = decoded
+            try:
+                with latency.time("encode"):
+                    X = self.scorer.encode(engineer_features(pd.DataFrame([transaction])))
+            except ValueError as e:
+                print(f"⚠️ {e}")
+                print("⚠️ Failed to process transaction, skipping...")
+                return None
+            with latency.time("scale"):
+                X = self.scorer.scale(X)
+            with latency.time("predict"):
+                fraud_probability = float(self.scorer.model.predict_proba(X)[0, 1])
+            with latency.time("sink"):
+                self.handle_verdict(transaction, fraud_probability)
+            elapsed = tracing.end_to_end_ns(trace)
+            if elapsed is not None:
+                latency.record("end_to_end", elapsed)
+            return elapsed
+        except Exception as e:
+            print(f"⚠️ Error processing message: {e}")
+            return None
+
+    def process_batch(self, messages):
+        """Score several messages in one vectorized call; returns the last one's publish-to-verdict time"""
+        latency = self.latency
+        started = time.perf_counter_ns()
+        transactions, traces = [], []
+        for msg in messages:
+            try:
+                decoded = self._decode(msg)
+            except Exception as e:
+                print(f"⚠️ Error processing message: {e}")
+                continue
+            if decoded is not None:
+                transactions.append(decoded[0])
+                traces.append(decoded[1])
+        if not transactions:
+            return None
+        elapsed = None
+        try:
+            probabilities, kept = scoring.score_frame(self.scorer, engineer_features(pd.DataFrame.from_records(transactions)))
+            for _ in range(len(transactions) - len(kept)):
+                print("⚠️ Failed to process transaction, skipping...")
+            for index, probability in zip(kept, probabilities):
+                with latency.time("sink"):
+                    self.handle_verdict(transactions[index], float(probability))
+                elapsed = tracing.end_to_end_ns(traces[index])
+                if elapsed is not None:
+                    latency.record("end_to_end", elapsed)
+        except Exception as e:
+            print(f"⚠️ Error processing batch: {e}")
+        latency.record("catchup_batch", time.perf_counter_ns() - started)
+        return elapsed
+
+    def handle_verdict(self, transaction, fraud_probability):
+        prediction = 1 if fraud_probability > config.FRAUD_THRESHOLD else 0
+        actual_fraud = transaction.get("is_fraud", "unknown")
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if self.store is not None:
+            self.store.add(transaction, fraud_probability, prediction)
+        if self.archiver is not None:
+            self.archiver.add(transaction, fraud_probability, prediction)
+
+        if prediction == 1:
+            print(f"🚨 FRAUD DETECTED: ${transaction['amt']:.2f} - {transaction['merchant']} - {fraud_probability:.4f} probability")
+            self.fraud_logger.warning(f"FRAUD: ${transaction['amt']:.2f} - {transaction['merchant']} - {fraud_probability:.4f} probability")
+            self.fraud_csv.write(f"{timestamp},{transaction['merchant']},{transaction['category']},{transaction['amt']},{transaction['gender']},{transaction['city']},{transaction['state']},{transaction['job']},{actual_fraud},{prediction},{fraud_probability:.4f}\n")
+            self.fraud_csv.flush()
+        else:
+            print(f"✅ LEGITIMATE: ${transaction['amt']:.2f} - {transaction['merchant']} - {fraud_probability:.4f} probability")
+            logging.info(f"OK: ${transaction['amt']:.2f} - {transaction['merchant']}")
+
+        # Check if our prediction matches actual fraud status (for testing)
+        if actual_fraud != "unknown":
+            if int(actual_fraud) == prediction:
+                print(f"✓ CORRECT PREDICTION: Actual={actual_fraud}, Predicted={prediction}")
+            else:
+                print(f"✗ INCORRECT PREDICTION: Actual={actual_fraud}, Predicted={prediction}")
+
+    def stop(self):
+        """Finish and settle the current message or batch; anything still queued stays unacknowledged and is redelivered"""
+        self.stopped.set()
+        if self.worker is not None:
+            self.worker.join(timeout=30)
+
+    def close(self):
+        self.stop()
+        self.save_dedup(force=True)
+        if self.membership is not None:
+            self.membership.stop()
+        self.fraud_csv.close()
+        if self.store is not None:
+            self.store.close()
+        if self.archiver is not None:
+            self.archiver.close()
+
+
+def setup_logging():
+    logging.basicConfig(filename="mqtt_subscriber.log", level=logging.INFO, format="%(asctime)s - %(message)s")
+    # Also log to a separate file for fraud events
+    fraud_logger = logging.getLogger('fraud_logger')
+    fraud_logger.setLevel(logging.WARNING)
+    fraud_handler = logging.FileHandler('fraud_events.log')
+    fraud_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    fraud_logger.addHandler(fraud_handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score MQTT transactions with the fraud model")
+    parser.add_argument("--broker", default=config.MQTT_BROKER)
+    parser.add_argument("--port", type=int, default=config.MQTT_PORT)
+    parser.add_argument("--topic", default=config.MQTT_TOPIC)
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--train-data", default=config.TRAIN_DATA_PATH)
+    parser.add_argument("--metrics-port", type=int, default=9108, help="serve latency percentiles at /metrics (0 disables)")
+    parser.add_argument("--summary-interval", type=float, default=10.0, help="seconds between latency summary lines")
+    parser.add_argument("--store", default=config.STORE_PATH, help="SQLite file receiving every verdict ('' disables)")
+    parser.add_argument("--store-retention-hours", type=float, default=config.STORE_RETENTION_SECONDS / 3600)
+    parser.add_argument("--archive", default=config.ARCHIVE_DIR, help="directory of the hourly Parquet archive ('' disables)")
+    parser.add_argument("--archive-compact-minutes", type=float, default=60.0,
+                        help="minutes between compactions of the archive (0: left to another process sharing it)")
+    parser.add_argument("--dedup-window-minutes", type=float, default=config.DEDUP_WINDOW_SECONDS / 60,
+                        help="drop transactions whose trans_num was seen this recently (0 disables)")
+    parser.add_argument("--dedup-state", default="dedup_state.bin",
+                        help="seen-set saved after the sinks are flushed and on exit, reloaded on start ('' disables)")
+    parser.add_argument("--dedup-save-seconds", type=float, default=10.0, help="least seconds between saves of --dedup-state")
+    parser.add_argument("--client-id", default=config.MQTT_CLIENT_ID,
+                        help="stable id of the persistent session: the broker queues transactions while the subscriber is down")
+    parser.add_argument("--clean-session", action="store_true", help="start a fresh session and drop it on disconnect")
+    parser.add_argument("--share-group", help="subscribe as a member of this shared subscription ($share/<group>/<topic>), "
+                                               "so that workers split the stream instead of each receiving all of it")
+    parser.add_argument("--partitions", type=int, default=config.MQTT_PARTITIONS,
+                        help="consume the <topic>/<p> partitions assigned to this worker; the workers on --membership-topic "
+                             "divide them among themselves (0: the single topic)")
+    parser.add_argument("--membership-topic", default=config.MQTT_MEMBERSHIP_TOPIC)
+    parser.add_argument("--member-timeout", type=float, default=10.0,
+                        help="seconds without a heartbeat before a worker's partitions are reassigned")
+    parser.add_argument("--qos", type=int, choices=[0, 1, 2], default=1, help="subscription QoS (0 is never queued for an offline subscriber)")
+    parser.add_argument("--ack-seconds", type=float, default=1.0,
+                        help="most seconds a scored message waits for the sinks to be flushed before it is acknowledged")
+    parser.add_argument("--max-unacked", type=int, default=500,
+                        help="flush the sinks and acknowledge once this many scored messages wait; keep it below the broker's in-flight window")
+    parser.add_argument("--catchup-lag-seconds", type=float, default=5.0,
+                        help="switch to batch scoring when messages arrive this late (0 disables)")
+    parser.add_argument("--catchup-batch-size", type=int, default=4096, help="most messages scored at once while catching up")
+    parser.add_argument("--admin-topic", default=config.MQTT_ADMIN_TOPIC, help="topic for runtime commands such as profiling ('' disables)")
+    parser.add_argument("--profile-dir", default=".", help="where sampled profiles (.collapsed) are written")
+    parser.add_argument("--profile-seconds", type=float, default=30.0, help="length of a profile started by SIGUSR1")
+    args = parser.parse_args(argv)
+    if args.partitions and args.share_group:
+        parser.error("--partitions and --share-group are two different ways to divide the stream; pick one")
+
+    started = time.perf_counter()
+    setup_logging()
+    print("🔧 Loading model and preparing encoders and scalers...")
+    try:
+        scorer = FraudScorer(args.model, args.train_data)
+    except Exception as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    print("✅ Fraud detection model and encoders ready!")
+    timings = dict(scorer.timings)
+    sinks_started = time.perf_counter()
+
+    store = None
+    if args.store:
+        store = TransactionStore(args.store, retention_seconds=args.store_retention_hours * 3600).start()
+        print(f"🗄️ Storing verdicts in {args.store} (retention {args.store_retention_hours:g} h)")
+    archiver = None
+    if args.archive:
+        try:
+            archiver = TransactionArchiver(args.archive, model_version=scorer.model_version,
+                                           compact_interval=args.archive_compact_minutes * 60).start()
+            print(f"📦 Archiving verdicts under {args.archive}/ (model {scorer.model_version})")
+        except ImportError:
+            print("⚠️ pyarrow is not installed; the Parquet archive is disabled")
+    dedup = None
+    if args.dedup_window_minutes > 0:
+        if args.dedup_state and os.path.exists(args.dedup_state):
+            dedup = DuplicateFilter.load(args.dedup_state)
+            dedup.window_seconds = args.dedup_window_minutes * 60
+        else:
+            dedup = DuplicateFilter(config.DEDUP_CAPACITY, config.DEDUP_ERROR_RATE, args.dedup_window_minutes * 60)
+        stats = dedup.stats()
+        print(f"♻️ Dropping duplicate trans_num seen in the last {args.dedup_window_minutes:g} min "
+              f"({stats['memory_bytes'] / 2**20:.1f} MB, false positives < {stats['configured_fp_rate']:g})")
+    subscription = f"$share/{args.share_group}/{args.topic}" if args.share_group else args.topic
+    membership = None
+    if args.partitions:
+        membership = PartitionMember(args.client_id or f"{socket.gethostname()}-{os.getpid()}", args.topic, args.partitions,
+                                     args.membership_topic, qos=args.qos, member_timeout=args.member_timeout)
+    service = FraudDetectionService(scorer, topic=subscription, admin_topic=args.admin_topic, store=store, archiver=archiver, dedup=dedup,
+                                    qos=args.qos, catchup_lag=args.catchup_lag_seconds, catchup_batch_size=args.catchup_batch_size,
+                                    membership=membership, dedup_state=args.dedup_state, dedup_save_interval=args.dedup_save_seconds,
+                                    ack_interval=args.ack_seconds, max_unacked=args.max_unacked).start()
+    timings["sinks"] = time.perf_counter() - sinks_started
+    # Profiling costs nothing until started by SIGUSR1, the admin topic or POST /profile
+    profiler = profiling.SamplingProfiler()
+
+    def report_profile(report):
+        summary = profiling.format_report(report)
+        print(f"🔬 {summary}")
+        logging.info(summary)
+
+    profiling.install_signal_handler(profiler, args.profile_seconds, args.profile_dir, on_done=report_profile)
+    if args.metrics_port:
+        tracing.serve_metrics(service.latency, args.metrics_port, profiler=profiler, profile_dir=args.profile_dir,
+                              extra={"consumer": service.consumer_stats, **({"dedup": dedup.stats} if dedup is not None else {}),
+                                     **({"partitions": membership.stats} if membership is not None else {})})
+        print(f"📈 Latency metrics at http://localhost:{args.metrics_port}/metrics")
+    if args.summary_interval > 0:
+        service.latency.start_reporter(args.summary_interval, emit=lambda line: (print(f"⏱️ {line}"), logging.info(line)))
+    # Without a client id the broker assigns a random one, which can only have a clean session
+    clean_session = args.clean_session or not args.client_id
+    client = mqtt_io.create_client(on_connect=service.on_connect, on_message=service.on_message,
+                                   client_id=args.client_id, clean_session=clean_session, manual_ack=True)
+    if membership is not None:
+        membership.start(client, service.on_message, args.broker, args.port)
+    if args.admin_topic:
+        client.message_callback_add(args.admin_topic, lambda client, userdata, msg: profiling.handle_admin_message(
+            profiler, msg.payload, args.profile_dir, on_done=report_profile, default_seconds=args.profile_seconds))
+    try:
+        connect_started = time.perf_counter()
+        mqtt_io.connect(client, args.broker, args.port)
+        timings["connect"] = time.perf_counter() - connect_started
+        print(f"🔌 Connecting to MQTT broker at {args.broker}:{args.port}...")
+        if not clean_session:
+            print(f"📬 Persistent session '{args.client_id}': transactions published while stopped are delivered on restart")
+    except Exception as e:
+        print(f"❌ Failed to connect to MQTT Broker: {e}")
+        raise SystemExit(1)
+
+    startup = f"Started in {time.perf_counter() - started:.2f}s after imports: " + ", ".join(
+        f"{phase} {seconds:.2f}s" for phase, seconds in timings.items())
+    print(f"🚀 {startup}")
+    logging.info(startup)
+    def drain_and_stop(signum, frame):
+        # SIGTERM (sent by the supervisor when scaling down or stopping): hand nothing back unscored
+        def drain():
+            service.drain()
+            client.disconnect()
+        threading.Thread(target=drain, daemon=True, name="subscriber-drain").start()
+
+    signal.signal(signal.SIGTERM, drain_and_stop)
+    print("📡 Fraud detection service is running... (Press Ctrl+C to stop)")
+    try:
+        client.loop_forever()
+    except KeyboardInterrupt:
+        print("\n⛔ Stopping fraud detection service...")
+    finally:
+        service.close()
+        if dedup is not None:
+            print(f"♻️ {dedup.duplicates} duplicate(s) ignored out of {dedup.checked} transactions")
+        print("✅ Fraud CSV file closed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,588 @@
+"""Headless supervisor for the broker, the publishers and the subscriber workers.
+
+Runs them as managed child processes instead of one terminal window each:
+
+    python -m fraud_detection.supervisor run --workers 2 --publishers 1 --embedded-broker
+    python -m fraud_detection.supervisor status
+    python -m fraud_detection.supervisor scale 4
+
+Workers subscribe as members of one shared subscription
+(``$share/<group>/<topic>``), so the broker hands each transaction to one of
+them. With ``--partitions`` the publishers partition the topic by card
+instead and the workers divide the partitions among themselves
+(fraud_detection/partitions.py), which keeps each card's transactions in
+order. Each worker keeps a persistent session under ``<MQTT_CLIENT_ID>-<index>``:
+a restarted or re-added worker resumes what was queued for it. Every worker
+writes the same store and archive. The first worker and publisher run in
+``--base-dir`` itself, where the single processes always ran, so the
+dashboards and exports find their files; further ones get
+``workers/worker-<i>/`` and ``publishers/publisher-<i>/``. The output of
+every child is appended to ``logs/<name>.log``.
+
+A child that exits is restarted after a backoff doubling from 1 s to 60 s,
+reset once it has run for 60 s. Workers and publishers serve /metrics; one
+that fails 3 consecutive checks after a 30 s startup grace is killed and
+restarted. The broker is checked with an MQTT connect.
+
+Ctrl+C, SIGTERM or POST /stop shuts down in order: the publishers (which
+spool what they have not sent), then the workers once they are idle (SIGTERM
+makes a worker unsubscribe and score and acknowledge what it holds before
+exiting), then the broker. Scaling down drains the highest-numbered workers
+the same way.
+"""
+import os
+import sys
+import json
+import time
+import shlex
+import signal
+import socket
+import logging
+import argparse
+import threading
+import subprocess
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from . import config, mqtt_io
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SHARE_GROUP = "fraud-workers"
+CONTROL_PORT = 9200
+INITIAL_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+STABLE_SECONDS = 60.0  # running this long resets the restart backoff
+STARTUP_GRACE = 30.0  # loading the model takes a few seconds before /metrics answers
+HEALTH_FAILURES = 3
+# Children get their own process group, so Ctrl+C reaches only the supervisor, which stops them in order
+SPAWN_OPTIONS = {"start_new_session": True} if os.name == "posix" else {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def process_usage(pid):
+    """CPU seconds, current and peak RSS of a running process from /proc (empty where /proc is unavailable)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status") as f:
+            status = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return {}
+    ticks = os.sysconf("SC_CLK_TCK")
+    return {
+        "cpu_seconds": round((int(fields[11]) + int(fields[12])) / ticks, 2),
+        "rss_mb": round(int(status["VmRSS"].split()[0]) / 1024, 1),
+        "peak_rss_mb": round(int(status["VmHWM"].split()[0]) / 1024, 1),
+    }
+
+
+def metrics_health(port, timeout=2.0):
+    """Health check returning the child's /metrics payload, or None when it does not answer"""
+    def health():
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=timeout) as response:
+                return json.load(response)
+        except (OSError, ValueError):
+            return None
+    return health
+
+
+def broker_health(host, port, timeout=2.0):
+    """Health check connecting an MQTT client to the broker"""
+    def health():
+        try:
+            return {} if mqtt_io.probe_broker(host, port, timeout) else None
+        except OSError:
+            return None
+    return health
+
+
+class ManagedProcess:
+    """One supervised child: started, health-checked, and restarted with exponential backoff.
+
+    ``health()`` returns the child's metrics (a dict) or None when it is
+    unhealthy; ``counter(metrics)`` extracts the messages it has handled so far.
+    """
+
+    def __init__(self, name, command, cwd, log_path, health=None, counter=None):
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.log_path = log_path
+        self.health = health
+        self.counter = counter
+        self.process = None
+        self.state = "stopped"  # starting, running, backoff, draining or stopped
+        self.restarts = 0
+        self.backoff = INITIAL_BACKOFF
+        self.started_at = None
+        self.restart_at = None
+        self.health_failures = 0
+        self.last_exit = None
+        self.metrics = {}
+        self.usage = {}
+        self.sample = None  # (monotonic time, CPU seconds, messages) of the last check
+
+    def start(self):
+        os.makedirs(self.cwd, exist_ok=True)
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")]))}
+        with open(self.log_path, "a") as log:
+            self.process = subprocess.Popen(self.command, cwd=self.cwd, env=env, stdin=subprocess.DEVNULL,
+                                            stdout=log, stderr=subprocess.STDOUT, **SPAWN_OPTIONS)
+        self.state = "starting"
+        self.started_at = time.monotonic()
+        self.health_failures = 0
+        self.usage, self.sample = {}, None
+        return self
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process is not None else None
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def send(self, sig):
+        """Deliver ``sig`` (SIGINT or SIGTERM); on Windows the child is terminated instead"""
+        if self.alive():
+            if os.name == "posix":
+                self.process.send_signal(sig)
+            else:
+                self.process.terminate()
+
+    def wait(self, timeout):
+        """True once the child has exited, False if it is still running after ``timeout`` seconds"""
+        if self.process is None:
+            return True
+        try:
+            self.process.wait(timeout=timeout)
+            return True
+        except subprocess.TimeoutExpired:
+            return False
+
+    def kill(self):
+        if self.alive():
+            self.process.kill()
+            self.process.wait()
+
+    def check(self, now):
+        """Restart the child if it exited or keeps failing health checks; refresh its usage and throughput"""
+        if self.state == "backoff":
+            if now >= self.restart_at:
+                self.restarts += 1
+                _event(f"🔁 Restarting {self.name} (restart #{self.restarts})")
+                self.start()
+            return
+        if self.process is None or self.state in ("stopped", "draining"):
+            return
+        code = self.process.poll()
+        if code is not None:
+            self.last_exit = code
+            self.state = "backoff"
+            self.restart_at = now + self.backoff
+            _event(f"⚠️ {self.name} exited with code {code}; restarting in {self.backoff:g}s")
+            self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+            return
+        if now - self.started_at >= STABLE_SECONDS:
+            self.backoff = INITIAL_BACKOFF
+        metrics = self.health() if self.health is not None else {}
+        if metrics is None:
+            if self.state == "starting" and now - self.started_at < STARTUP_GRACE:
+                return
+            self.health_failures += 1
+            if self.health_failures >= HEALTH_FAILURES:
+                _event(f"💀 {self.name} failed {self.health_failures} health checks in a row; killing it")
+                self.kill()  # restarted with backoff on the next check
+            return
+        self.state = "running"
+        self.health_failures = 0
+        self.metrics = metrics
+        self._sample(now, metrics)
+
+    def _sample(self, now, metrics):
+        self.usage = process_usage(self.pid)
+        messages = self.counter(metrics) if self.counter is not None else None
+        sample = (now, self.usage.get("cpu_seconds"), messages)
+        if self.sample is not None and now > self.sample[0]:
+            elapsed = now - self.sample[0]
+            if sample[1] is not None and self.sample[1] is not None:
+                self.usage["cpu_percent"] = round((sample[1] - self.sample[1]) / elapsed * 100, 1)
+            if messages is not None and self.sample[2] is not None:
+                self.usage["messages_per_second"] = round((messages - self.sample[2]) / elapsed, 1)
+        self.sample = sample
+
+    def status(self, now=None):
+        now = time.monotonic() if now is None else now
+        running = self.alive()
+        return {
+            "name": self.name,
+            "pid": self.pid if running else None,
+            "state": self.state,
+            "uptime_seconds": round(now - self.started_at, 1) if running else 0.0,
+            "restarts": self.restarts,
+            "last_exit": self.last_exit,
+            "cpu_percent": self.usage.get("cpu_percent") if running else None,
+            "rss_mb": self.usage.get("rss_mb") if running else None,
+            "messages_per_second": self.usage.get("messages_per_second") if running else None,
+            "log": self.log_path,
+        }
+
+
+def _event(message):
+    print(message, flush=True)
+    logging.info(message)
+
+
+class Supervisor:
+    """Starts, watches, scales and stops the broker, publishers and workers"""
+
+    def __init__(self, base_dir=".", broker=config.MQTT_BROKER, port=config.MQTT_PORT, embedded_broker=False,
+                 topic=config.MQTT_TOPIC, share_group=SHARE_GROUP, model=config.MODEL_PATH,
+                 train_data=config.TRAIN_DATA_PATH, partitions=config.MQTT_PARTITIONS, worker_args=(), publisher_args=(),
+                 check_interval=2.0):
+        self.base_dir = os.path.abspath(base_dir)
+        self.host = "127.0.0.1" if embedded_broker else broker
+        self.port = port
+        self.topic = topic
+        self.share_group = share_group
+        self.model = os.path.abspath(model)
+        self.train_data = os.path.abspath(train_data)
+        self.partitions = partitions
+        self.worker_args = list(worker_args)
+        self.publisher_args = list(publisher_args)
+        self.check_interval = check_interval
+        self.lock = threading.RLock()
+        self.stopping = threading.Event()
+        self.thread = None
+        self.broker = None
+        if embedded_broker:
+            self.broker = ManagedProcess(
+                "broker", [sys.executable, "-u", "-m", "fraud_detection.broker", "--host", self.host, "--port", str(port)],
+                self.base_dir, self._log_path("broker"), health=broker_health(self.host, port))
+        self.workers = {}  # index -> ManagedProcess
+        self.publishers = {}
+        self.retiring = []  # (ManagedProcess, deadline) of workers draining after a scale-down
+
+    def _log_path(self, name):
+        return os.path.join(self.base_dir, "logs", f"{name}.log")
+
+    def _workdir(self, kind, index):
+        return self.base_dir if index == 0 else os.path.join(self.base_dir, f"{kind}s", f"{kind}-{index}")
+
+    def _worker(self, index):
+        name, metrics_port = f"worker-{index}", free_port()
+        command = [sys.executable, "-u", "-m", "fraud_detection.subscriber", "--broker", self.host, "--port", str(self.port),
+                   "--topic", self.topic, *(["--partitions", str(self.partitions)] if self.partitions else
+                                            ["--share-group", self.share_group]),
+                   "--client-id", f"{config.MQTT_CLIENT_ID}-{index}", "--metrics-port", str(metrics_port),
+                   "--model", self.model, "--train-data", self.train_data,
+                   "--store", os.path.join(self.base_dir, config.STORE_PATH),
+                   "--archive", os.path.join(self.base_dir, config.ARCHIVE_DIR),
+                   # All workers share the archive; compaction is not safe to run concurrently, so only worker 0 does it
+                   *([] if index == 0 else ["--archive-compact-minutes", "0"]), *self.worker_args]
+        return ManagedProcess(name, command, self._workdir("worker", index), self._log_path(name),
+                              health=metrics_health(metrics_port), counter=lambda metrics: metrics["consumer"]["processed"])
+
+    def _publisher(self, index):
+        name, metrics_port = f"publisher-{index}", free_port()
+        command = [sys.executable, "-u", "-m", "fraud_detection.publisher", "--broker", self.host, "--port", str(self.port),
+                   "--topic", self.topic, "--train-data", self.train_data, "--metrics-port", str(metrics_port),
+                   "--partitions", str(self.partitions), *self.publisher_args]
+        return ManagedProcess(name, command, self._workdir("publisher", index), self._log_path(name),
+                              health=metrics_health(metrics_port), counter=lambda metrics: metrics["publisher"]["published"])
+
+    def _processes(self):
+        return ([self.broker] if self.broker is not None else []) + list(self.publishers.values()) + list(self.workers.values())
+
+    def start(self, workers=1, publishers=1, broker_timeout=30.0):
+        """Start the broker (if embedded), then the workers, then the publishers"""
+        with self.lock:
+            if self.broker is not None:
+                self.broker.start()
+                _event(f"🛰️ Started the embedded broker on {self.host}:{self.port} (pid {self.broker.pid})")
+            self._wait_for_broker(broker_timeout)
+            self.scale(workers)
+            if self.partitions and workers and publishers:
+                self._wait_for_partitions(broker_timeout + STARTUP_GRACE)
+            for index in range(publishers):
+                self.publishers[index] = self._publisher(index).start()
+                _event(f"📤 Started publisher-{index} (pid {self.publishers[index].pid})")
+        return self
+
+    def _wait_for_broker(self, timeout):
+        check = broker_health(self.host, self.port)
+        deadline = time.monotonic() + timeout
+        while check() is None:
+            if time.monotonic() > deadline:
+                _event(f"⚠️ MQTT broker at {self.host}:{self.port} is not answering; children will retry with backoff")
+                return
+            time.sleep(0.5)
+
+    def _wait_for_partitions(self, timeout):
+        """Wait until every partition has an owner: a partition's first session must exist before anything is published to it"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            consuming = set()
+            for process in self.workers.values():
+                metrics = process.health()
+                consuming.update((metrics or {}).get("partitions", {}).get("consuming", ()))
+            if len(consuming) == self.partitions:
+                _event(f"🧩 All {self.partitions} partitions have an owner")
+                return
+            time.sleep(0.5)
+        _event("⚠️ Not every partition has an owner yet; starting the publishers anyway")
+
+    def scale(self, workers):
+        """Start or drain workers until ``workers`` are active; returns the active worker names"""
+        with self.lock:
+            if self.stopping.is_set():
+                raise RuntimeError("the supervisor is stopping")
+            draining = {process.name for process, _ in self.retiring}
+            index = 0
+            while len(self.workers) < workers:
+                if index not in self.workers and f"worker-{index}" not in draining:
+                    self.workers[index] = self._worker(index).start()
+                    _event(f"📡 Started worker-{index} (pid {self.workers[index].pid})")
+                index += 1
+            for index in sorted(self.workers, reverse=True)[:max(len(self.workers) - workers, 0)]:
+                process = self.workers.pop(index)
+                self._drain(process)
+                self.retiring.append((process, time.monotonic() + STARTUP_GRACE * 2))
+            return [process.name for process in self.workers.values()]
+
+    def _drain(self, process):
+        if process.alive():
+            process.state = "draining"
+            process.send(signal.SIGTERM)
+            _event(f"🚰 Draining {process.name}")
+        else:
+            process.state = "stopped"
+
+    def check(self):
+        now = time.monotonic()
+        with self.lock:
+            for process in self._processes():
+                process.check(now)
+            for process, deadline in list(self.retiring):
+                if process.alive() and now < deadline:
+                    continue
+                if process.alive():
+                    _event(f"⚠️ {process.name} did not finish draining; killing it")
+                    process.kill()
+                else:
+                    _event(f"👋 {process.name} drained and stopped (exit code {process.process.returncode})")
+                process.state = "stopped"
+                self.retiring.remove((process, deadline))
+
+    def status(self):
+        now = time.monotonic()
+        with self.lock:
+            rows = [process.status(now) for process in self._processes()]
+            rows += [process.status(now) for process, _ in self.retiring]
+        return {"workers": len(self.workers), "publishers": len(self.publishers), "broker": f"{self.host}:{self.port}",
+                "processes": rows}
+
+    def run(self, status_interval=10.0):
+        """Check the children every ``check_interval`` seconds until stop() or Ctrl+C, then shut down in order"""
+        last_status = time.monotonic()
+        try:
+            while not self.stopping.wait(self.check_interval):
+                self.check()
+                if status_interval > 0 and time.monotonic() - last_status >= status_interval:
+                    last_status = time.monotonic()
+                    print(format_status(self.status()), flush=True)
+        except KeyboardInterrupt:
+            print()
+        finally:
+            self.shutdown()
+
+    def run_in_background(self, status_interval=0):
+        """run() from a daemon thread, for embedding in another program such as the dashboards"""
+        self.thread = threading.Thread(target=self.run, args=(status_interval,), daemon=True, name="supervisor")
+        self.thread.start()
+        return self
+
+    def stop(self, wait=False):
+        """Ask run() to shut down; with ``wait``, return once everything has stopped"""
+        self.stopping.set()
+        if wait and self.thread is not None:
+            self.thread.join()
+
+    def shutdown(self, timeout=60.0):
+        """Publishers first, then the workers once idle (drained by SIGTERM), then the broker"""
+        self.stopping.set()
+        with self.lock:
+            _event("⛔ Stopping: publishers first, then draining the workers")
+            for process in self.publishers.values():
+                process.state = "stopped"
+                process.send(signal.SIGINT)
+            for process in self.publishers.values():
+                if not process.wait(15):
+                    process.kill()
+            self._wait_idle(timeout)
+            for process in self.workers.values():
+                self._drain(process)
+            deadline = time.monotonic() + timeout
+            for process in list(self.workers.values()) + [process for process, _ in self.retiring]:
+                if not process.wait(max(deadline - time.monotonic(), 0)):
+                    _event(f"⚠️ {process.name} did not finish draining; killing it")
+                    process.kill()
+                process.state = "stopped"
+            if self.broker is not None:
+                self.broker.state = "stopped"
+                self.broker.send(signal.SIGINT)
+                if not self.broker.wait(10):
+                    self.broker.kill()
+        _event("✅ All processes stopped")
+
+    def _wait_idle(self, timeout):
+        """Wait until no worker has transactions waiting to be scored"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            waiting = 0
+            for process in self.workers.values():
+                metrics = process.health() if process.alive() else None
+                waiting += metrics["consumer"]["waiting"] if metrics else 0
+            if not waiting:
+                return
+            time.sleep(0.5)
+
+
+def format_status(status):
+    lines = [f"📋 {status['workers']} worker(s), {status['publishers']} publisher(s), broker {status['broker']}",
+             f"  {'name':14} {'pid':>7} {'state':9} {'uptime':>8} {'restarts':>8} {'cpu %':>6} {'rss MB':>7} {'msg/s':>8}"]
+    for row in status["processes"]:
+        values = [row["pid"], row["cpu_percent"], row["rss_mb"], row["messages_per_second"]]
+        pid, cpu, rss, rate = ("-" if value is None else value for value in values)
+        lines.append(f"  {row['name']:14} {pid:>7} {row['state']:9} {row['uptime_seconds']:>7.0f}s {row['restarts']:>8} "
+                     f"{cpu:>6} {rss:>7} {rate:>8}")
+    return "\n".join(lines)
+
+
+def serve_control(supervisor, port, host="127.0.0.1"):
+    """GET /status, POST /scale?workers=N and POST /stop from a daemon thread"""
+
+    class ControlHandler(BaseHTTPRequestHandler):
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.split("?")[0] == "/status":
+                self.send_json(200, supervisor.status())
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            url = urllib.parse.urlsplit(self.path)
+            if url.path == "/scale":
+                try:
+                    workers = int(urllib.parse.parse_qs(url.query)["workers"][0])
+                    if workers < 0:
+                        raise ValueError
+                except (KeyError, ValueError):
+                    self.send_error(400, "workers must be a non-negative integer")
+                    return
+                try:
+                    self.send_json(200, {"workers": supervisor.scale(workers)})
+                except RuntimeError as e:
+                    self.send_json(409, {"error": str(e)})
+            elif url.path == "/stop":
+                supervisor.stop()
+                self.send_json(202, {"stopping": True})
+            else:
+                self.send_error(404)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), ControlHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="supervisor-control").start()
+    return server
+
+
+def _control_request(port, path, method="GET"):
+    request = urllib.request.Request(f"http://127.0.0.1:{port}{path}", method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as e:
+        print(f"❌ {e.code}: {e.read().decode(errors='replace')}")
+    except OSError as e:
+        print(f"❌ No supervisor answering on port {port}: {e}")
+    raise SystemExit(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the broker, publishers and subscriber workers as supervised processes")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="start everything and supervise it until Ctrl+C")
+    run_parser.add_argument("--workers", type=int, default=1)
+    run_parser.add_argument("--publishers", type=int, default=1)
+    run_parser.add_argument("--embedded-broker", action="store_true", help="run fraud_detection.broker instead of using --broker")
+    run_parser.add_argument("--broker", default=config.MQTT_BROKER)
+    run_parser.add_argument("--port", type=int, default=config.MQTT_PORT)
+    run_parser.add_argument("--topic", default=config.MQTT_TOPIC)
+    run_parser.add_argument("--share-group", default=SHARE_GROUP, help="shared subscription group of the workers")
+    run_parser.add_argument("--partitions", type=int, default=config.MQTT_PARTITIONS,
+                            help="partition the topic by card and divide the partitions among the workers, instead of "
+                                 "sharing one subscription (keeps each card in order)")
+    run_parser.add_argument("--model", default=config.MODEL_PATH)
+    run_parser.add_argument("--train-data", default=config.TRAIN_DATA_PATH)
+    run_parser.add_argument("--base-dir", default=".", help="where the store, archive, logs and per-process directories go")
+    run_parser.add_argument("--worker-args", default="", help="extra subscriber arguments, e.g. \"--catchup-batch-size 1024\"")
+    run_parser.add_argument("--publisher-args", default="", help="extra publisher arguments, e.g. \"--interval 0.5 --qos 1\"")
+    run_parser.add_argument("--check-interval", type=float, default=2.0, help="seconds between health checks")
+    run_parser.add_argument("--status-interval", type=float, default=10.0, help="seconds between status tables (0 disables)")
+    run_parser.add_argument("--control-port", type=int, default=CONTROL_PORT, help="HTTP port for status/scale/stop (0 disables)")
+    for name, help_text in (("status", "print the process table of a running supervisor"),
+                            ("scale", "change the number of workers of a running supervisor"),
+                            ("stop", "stop a running supervisor gracefully")):
+        command_parser = commands.add_parser(name, help=help_text)
+        if name == "scale":
+            command_parser.add_argument("workers", type=int)
+        command_parser.add_argument("--control-port", type=int, default=CONTROL_PORT)
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        print(format_status(_control_request(args.control_port, "/status")))
+        return
+    if args.command == "scale":
+        workers = _control_request(args.control_port, f"/scale?workers={args.workers}", method="POST")["workers"]
+        print(f"✅ Scaled to {len(workers)} worker(s): {', '.join(workers) or 'none'}")
+        return
+    if args.command == "stop":
+        _control_request(args.control_port, "/stop", method="POST")
+        print("⛔ Supervisor stopping")
+        return
+
+    os.makedirs(args.base_dir, exist_ok=True)
+    logging.basicConfig(filename=os.path.join(args.base_dir, "supervisor.log"), level=logging.INFO,
+                        format="%(asctime)s - %(message)s")
+    supervisor = Supervisor(args.base_dir, broker=args.broker, port=args.port, embedded_broker=args.embedded_broker,
+                            topic=args.topic, share_group=args.share_group, model=args.model, train_data=args.train_data,
+                            partitions=args.partitions, worker_args=shlex.split(args.worker_args), publisher_args=shlex.split(args.publisher_args),
+                            check_interval=args.check_interval)
+    signal.signal(signal.SIGTERM, lambda signum, frame: supervisor.stop())
+    supervisor.start(args.workers, args.publishers)
+    if args.control_port:
+        serve_control(supervisor, args.control_port)
+        print(f"🎛️ Control at http://127.0.0.1:{args.control_port}/status "
+              f"(python -m fraud_detection.supervisor scale N | status | stop)")
+    print(f"🧭 Supervising; logs in {os.path.join(supervisor.base_dir, 'logs')}/ (Press Ctrl+C to stop)")
+    supervisor.run(args.status_interval)
+
+
+if __name__ == "__main__":
+    main()
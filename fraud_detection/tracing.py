@@ -0,0 +1,232 @@
+import json
+import time
+import urllib.parse
+import socket
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from contextlib import contextmanager
+import numpy as np
+from . import profiling
+
+TRACE_KEY = "_trace"
+HOSTNAME = socket.gethostname()
+PERCENTILES = (50.0, 99.0, 99.9)
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of nanosecond latencies.
+
+    Values below 2**significant_bits get their own bucket; above that each
+    power of two is split into 2**(significant_bits - 1) buckets, so any
+    recorded value is reported within 1 / 2**(significant_bits - 1) of its
+    true value (<1.6% with the default 7 bits) in a few KB of counters.
+    """
+
+    def __init__(self, significant_bits=7, max_value_ns=3600 * 10**9):
+        self.significant_bits = significant_bits
+        self.half = 1 << (significant_bits - 1)
+        self.max_value_ns = max_value_ns
+        self.counts = np.zeros(self._index(max_value_ns) + 1, dtype=np.int64)
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.sum = 0
+
+    def _index(self, value):
+        shift = max(int(value).bit_length() - self.significant_bits, 0)
+        return shift * self.half + (int(value) >> shift)
+
+    def _indices(self, values):
+        _, exponent = np.frexp(values.astype(np.float64))
+        shift = np.maximum(exponent - self.significant_bits, 0)
+        return shift * self.half + (values >> shift)
+
+    def _bucket_value(self, index):
+        """Midpoint of the values that land in ``index``"""
+        if index < 2 * self.half:
+            return float(index)
+        shift = index // self.half - 1
+        low = (index - shift * self.half) << shift
+        return low + ((1 << shift) - 1) / 2
+
+    def record(self, value_ns):
+        value_ns = min(max(int(value_ns), 0), self.max_value_ns)
+        self.counts[self._index(value_ns)] += 1
+        self.total += 1
+        self.sum += value_ns
+        self.max = max(self.max, value_ns)
+        self.min = value_ns if self.min is None else min(self.min, value_ns)
+
+    def record_many(self, values_ns):
+        values = np.clip(np.asarray(values_ns, dtype=np.int64), 0, self.max_value_ns)
+        if values.size == 0:
+            return
+        np.add.at(self.counts, self._indices(values), 1)
+        self.total += int(values.size)
+        self.sum += int(values.sum())
+        self.max = max(self.max, int(values.max()))
+        low = int(values.min())
+        self.min = low if self.min is None else min(self.min, low)
+
+    def percentile(self, q):
+        if self.total == 0:
+            return None
+        rank = max(int(np.ceil(q / 100.0 * self.total)), 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(self._bucket_value(index), self.max)
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def summary(self, percentiles=PERCENTILES):
+        """Count plus percentiles, mean and max in milliseconds"""
+        result = {"count": self.total}
+        if self.total:
+            for q in percentiles:
+                result[f"p{q:g}".replace(".", "")] = round(self.percentile(q) / 1e6, 4)
+            result["mean"] = round(self.sum / self.total / 1e6, 4)
+            result["max"] = round(self.max / 1e6, 4)
+        return result
+
+
+class LatencyTracker:
+    """Named LatencyHistograms (one per pipeline stage) behind a lock"""
+
+    def __init__(self, stages=()):
+        self.lock = threading.Lock()
+        self.histograms = {stage: LatencyHistogram() for stage in stages}
+        self.started = time.time()
+
+    def record(self, stage, value_ns):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = LatencyHistogram()
+            histogram.record(value_ns)
+
+    @contextmanager
+    def time(self, stage):
+        started = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter_ns() - started)
+
+    def summary(self):
+        with self.lock:
+            return {
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "stages": {stage: histogram.summary() for stage, histogram in self.histograms.items()},
+            }
+
+    def summary_line(self):
+        parts = []
+        for stage, stats in self.summary()["stages"].items():
+            if stats["count"]:
+                parts.append(f"{stage} n={stats['count']} p50={stats['p50']:.3f} p99={stats['p99']:.3f} p999={stats['p999']:.3f}")
+        return "latency ms: " + (" | ".join(parts) if parts else "no samples yet")
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {stage: LatencyHistogram() for stage in self.histograms}
+            self.started = time.time()
+
+    def start_reporter(self, interval=10.0, emit=None):
+        """Emit summary_line() every ``interval`` seconds from a daemon thread"""
+        emit = emit or logging.info
+        stopped = threading.Event()
+
+        def report():
+            while not stopped.wait(interval):
+                emit(self.summary_line())
+
+        threading.Thread(target=report, daemon=True, name="latency-reporter").start()
+        return stopped
+
+
+def stamp(transaction, seq):
+    """Attach the trace context (sequence id, publish-side clocks) to an outgoing transaction"""
+    transaction[TRACE_KEY] = {
+        "seq": seq,
+        "mono_ns": time.monotonic_ns(),
+        "wall_ns": time.time_ns(),
+        "host": HOSTNAME,
+    }
+    return transaction
+
+
+def end_to_end_ns(trace):
+    """Nanoseconds since the transaction was stamped, or None without a trace.
+
+    The monotonic clock is only comparable on the same machine; across hosts the
+    wall clocks are compared instead, so the result includes their skew.
+    """
+    if not trace:
+        return None
+    if trace.get("host") == HOSTNAME and "mono_ns" in trace:
+        return time.monotonic_ns() - trace["mono_ns"]
+    return time.time_ns() - trace["wall_ns"]
+
+
+def serve_metrics(tracker, port, host="0.0.0.0", profiler=None, profile_dir=".", extra=None):
+    """Serve ``tracker.summary()`` as JSON at GET /metrics from a daemon thread.
+
+    ``extra`` maps further keys of the payload to functions returning their
+    current value, e.g. ``{"dedup": dedup.stats}``. POST /metrics/reset clears
+    the histograms, e.g. between load-test runs. With a ``profiler``, POST
+    /profile?seconds=N starts a profile and GET /profile returns the last report.
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path == "/metrics":
+                summary = tracker.summary()
+                for key, value in (extra or {}).items():
+                    summary[key] = value()
+                self.send_json(200, summary)
+            elif path == "/profile" and profiler is not None:
+                self.send_json(200, {"running": profiler.running, "last_report": profiler.last_report})
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            url = urllib.parse.urlsplit(self.path)
+            if url.path == "/metrics/reset":
+                tracker.reset()
+                self.send_response(204)
+                self.end_headers()
+            elif url.path == "/profile" and profiler is not None:
+                try:
+                    seconds = profiling.profile_seconds(urllib.parse.parse_qs(url.query).get("seconds", ["30"])[0])
+                except ValueError as e:
+                    self.send_error(400, str(e))
+                    return
+                output = profiler.start(seconds, profile_dir)
+                if output is None:
+                    self.send_json(409, {"error": "a profile is already running"})
+                else:
+                    self.send_json(202, {"seconds": seconds, "path": output})
+            else:
+                self.send_error(404)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    return server
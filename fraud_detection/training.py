@@ -0,0 +1,118 @@
+import joblib
+import argparse
+import pandas as pd
+from . import config
+from .features import categorical_cols, selected_features, prepare_training_frame
+
+
+def load_archive(archive_dir, start=None, end=None):
+    """Labelled history from the Parquet archive in the fraudTrain.csv layout.
+
+    Only the raw and engineered columns are read, and partitions outside
+    ``start``/``end`` are skipped; rows without an ``is_fraud`` label are dropped.
+    """
+    import pyarrow.dataset as ds
+    from .archive import RAW_COLUMNS, FEATURE_COLUMNS, read_archive
+    return read_archive(archive_dir, start, end, columns=RAW_COLUMNS + FEATURE_COLUMNS, filter=ds.field("is_fraud").is_valid())
+
+
+def main(train_data_path=config.TRAIN_DATA_PATH, model_path=config.MODEL_PATH, archive_dir=None, start=None, end=None, plot=True):
+    # Heavy, training-only dependencies (matplotlib is imported for the final plot only)
+    import xgboost as xgb
+    from imblearn.over_sampling import SMOTE
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+    from sklearn.metrics import classification_report, roc_auc_score
+    from sklearn.model_selection import train_test_split, RandomizedSearchCV
+
+    # Load the dataset
+    if archive_dir:
+        df = load_archive(archive_dir, start, end)
+    else:
+        df = pd.read_csv(train_data_path)
+
+    # Data Cleaning and Preprocessing
+    print("Initial Data Info:")
+    print(df.info())
+
+    # Drop missing values, engineer features and drop identifier columns
+    df = prepare_training_frame(df)
+
+    # Label Encoding for Categorical Variables
+    label_encoders = {}
+    for col in categorical_cols:
+        label_encoders[col] = LabelEncoder()
+        df[col] = label_encoders[col].fit_transform(df[col])
+
+    # Define Features and Target
+    X = df.drop(columns=['is_fraud'])
+    y = df['is_fraud']
+
+    # Train-Test Split
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    # Apply SMOTE for Class Balancing
+    smote = SMOTE(sampling_strategy=0.3, k_neighbors=5, random_state=42)
+    X_resampled, y_resampled = smote.fit_resample(X_train, y_train)
+    print(f"Class distribution after SMOTE: {pd.Series(y_resampled).value_counts()}")
+
+    # Feature Selection
+    X_resampled_selected = X_resampled[selected_features]
+    X_test_selected = X_test[selected_features]
+
+    # Apply Feature Scaling *after* feature selection
+    scaler = StandardScaler()
+    X_resampled_selected = scaler.fit_transform(X_resampled_selected)
+    X_test_selected = scaler.transform(X_test_selected)
+
+    # Hyperparameter Tuning with Randomized Search
+    param_grid = {
+        'n_estimators': [200, 400, 600],
+        'learning_rate': [0.01, 0.05, 0.1],
+        'max_depth': [4, 6, 8],
+        'subsample': [0.6, 0.8, 1.0],
+        'colsample_bytree': [0.6, 0.8, 1.0],
+        'reg_alpha': [0.1, 0.5, 1.0],
+        'reg_lambda': [0.1, 0.5, 1.0]
+    }
+    xgb_model = xgb.XGBClassifier(scale_pos_weight=7500/1289169, eval_metric="logloss", random_state=42)
+
+    random_search = RandomizedSearchCV(xgb_model, param_grid, cv=3, n_iter=10, n_jobs=-1, scoring='roc_auc', random_state=42)
+    random_search.fit(X_resampled_selected, y_resampled)
+
+    best_model = random_search.best_estimator_
+    print(f"Best Hyperparameters: {random_search.best_params_}")
+
+    # Model Training
+    best_model.fit(X_resampled_selected, y_resampled)
+
+    # Predict and Evaluate
+    y_pred_proba = best_model.predict_proba(X_test_selected)[:, 1]
+    y_test_pred = best_model.predict(X_test_selected)
+    print("Classification Report:")
+    print(classification_report(y_test, y_test_pred))
+    print(f"AUC: {roc_auc_score(y_test, y_pred_proba)}")
+
+    # Save the Final Model (only the model, not the encoders)
+    joblib.dump(best_model, model_path)
+    print("✅ Model saved successfully!")
+
+    # Plot Feature Importance
+    if plot:
+        import matplotlib.pyplot as plt
+        xgb.plot_importance(best_model)
+        plt.show()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the fraud model")
+    parser.add_argument("--train-data", dest="train_data_path", default=config.TRAIN_DATA_PATH)
+    parser.add_argument("--model", dest="model_path", default=config.MODEL_PATH)
+    parser.add_argument("--archive", dest="archive_dir", help="train on the scored-transaction archive instead of the CSV")
+    parser.add_argument("--start", help="first archived hour to use (UTC, e.g. 2026-09-01)")
+    parser.add_argument("--end", help="end of the archived range (UTC, exclusive)")
+    parser.add_argument("--no-plot", dest="plot", action="store_false", help="skip the feature-importance plot (headless runs)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
@@ -0,0 +1,175 @@
+import os
+import sys
+import time
+import glob
+import argparse
+import resource
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fraud_detection import config, scoring  # noqa: E402
+
+# Worker-local scorer, loaded once per process by the pool initializer
+_worker_scorer = None
+
+
+def init_worker(model_path, train_data_path):
+    global _worker_scorer
+    _worker_scorer = scoring.FraudScorer(model_path, train_data_path)
+    # Parallelism comes from the pool; one XGBoost thread per worker avoids oversubscription
+    _worker_scorer.model.get_booster().set_param({"nthread": 1})
+
+
+def score_in_worker(chunk, row_offset):
+    return scoring.score_chunk(_worker_scorer, chunk, row_offset)
+
+
+def peak_rss_mb(workers):
+    """Upper bound on peak memory: this process plus ``workers`` copies of the largest finished child, in MB"""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss if workers > 1 else 0
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return (own + children * workers) / scale
+
+
+def read_chunks(path, chunk_size):
+    if path.endswith(".parquet"):
+        return scoring.iter_parquet_chunks(path, chunk_size)
+    return scoring.iter_csv_chunks(path, chunk_size)
+
+
+class ScoredWriter:
+    """Append scored chunks to a Parquet (row group per chunk) or CSV file"""
+
+    def __init__(self, path, output_format):
+        self.path = path
+        self.output_format = output_format
+        self.writer = None
+
+    def write(self, result):
+        if self.output_format == "csv":
+            result.to_csv(self.path, mode="w" if self.writer is None else "a", header=self.writer is None, index=False)
+            self.writer = True
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(result, preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema, compression="zstd")
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None and self.writer is not True:
+            self.writer.close()
+
+
+def with_labels(result, chunk):
+    # Keep the ground truth next to the prediction when the input has it (fraudTest.csv does)
+    if "is_fraud" in chunk.columns:
+        result["is_fraud"] = chunk["is_fraud"].to_numpy()
+    return result
+
+
+def score_file(path, args, pool, max_in_flight):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    out_path = os.path.join(args.output_dir, f"{stem}.scored.{args.output_format}")
+    writer = ScoredWriter(out_path, args.output_format)
+    local_scorer = None if pool else scoring.FraudScorer(args.model, args.train_data)
+    pending = deque()
+    rows = 0
+    frauds = 0
+
+    def drain(limit):
+        nonlocal frauds
+        while len(pending) > limit:
+            future, chunk = pending.popleft()
+            result = with_labels(future.result(), chunk)
+            frauds += int(result["is_fraud_predicted"].sum())
+            writer.write(result)
+
+    try:
+        for chunk in read_chunks(path, args.chunk_size):
+            if pool:
+                pending.append((pool.submit(score_in_worker, chunk, rows), chunk))
+                drain(max_in_flight)
+            else:
+                result = with_labels(scoring.score_chunk(local_scorer, chunk, rows), chunk)
+                frauds += int(result["is_fraud_predicted"].sum())
+                writer.write(result)
+            rows += len(chunk)
+        drain(0)
+    finally:
+        writer.close()
+    return out_path, rows, frauds
+
+
+def estimate_chunk_mb(path, chunk_size):
+    # Rough in-memory size of one raw chunk plus its feature matrix
+    chunk = next(read_chunks(path, min(chunk_size, 1000)), None)
+    if chunk is None or len(chunk) == 0:
+        return 1.0
+    per_row = chunk.memory_usage(deep=True).sum() / len(chunk)
+    per_row += len(scoring.selected_features) * np.dtype(np.float64).itemsize
+    return per_row * chunk_size / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score fraudTest.csv-shaped CSV/Parquet files offline")
+    parser.add_argument("inputs", nargs="+", help="CSV or Parquet files (globs allowed)")
+    parser.add_argument("--output-dir", default="scored")
+    parser.add_argument("--output-format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="scoring processes (1 = in-process)")
+    parser.add_argument("--max-memory-mb", type=float, default=None,
+                        help="memory ceiling; bounds chunks in flight and fails the run if peak RSS exceeds it")
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--train-data", default=config.TRAIN_DATA_PATH)
+    args = parser.parse_args()
+
+    paths = sorted(p for pattern in args.inputs for p in (glob.glob(pattern) or [pattern]))
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        print(f"❌ Input file(s) not found: {', '.join(missing)}")
+        sys.exit(1)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    max_in_flight = 2 * args.workers
+    if args.max_memory_mb:
+        chunk_mb = estimate_chunk_mb(paths[0], args.chunk_size)
+        # Every worker holds a model copy too, so leave room for that before counting chunks
+        model_mb = os.path.getsize(args.model) / (1024 * 1024) * 4
+        budget = args.max_memory_mb - model_mb * max(args.workers, 1)
+        max_in_flight = max(1, min(max_in_flight, int(budget // max(chunk_mb * 3, 1e-6))))
+        print(f"📏 ~{chunk_mb:.1f} MB per chunk, {max_in_flight} chunk(s) in flight under {args.max_memory_mb:.0f} MB")
+
+    pool = None
+    if args.workers > 1:
+        pool = ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                                   initargs=(args.model, args.train_data))
+
+    started = time.perf_counter()
+    total_rows = 0
+    try:
+        for path in paths:
+            file_started = time.perf_counter()
+            out_path, rows, frauds = score_file(path, args, pool, max_in_flight)
+            elapsed = time.perf_counter() - file_started
+            total_rows += rows
+            print(f"✅ {path}: {rows:,} rows, {frauds:,} flagged -> {out_path} ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    finally:
+        if pool:
+            pool.shutdown()
+
+    elapsed = time.perf_counter() - started
+    peak_mb = peak_rss_mb(args.workers)
+    print(f"📊 Scored {total_rows:,} rows in {elapsed:.2f}s = {total_rows / max(elapsed, 1e-9):,.0f} rows/s "
+          f"({args.workers} worker(s), chunk {args.chunk_size:,}), peak RSS {peak_mb:.0f} MB")
+    if args.max_memory_mb and peak_mb > args.max_memory_mb:
+        print(f"❌ Peak RSS {peak_mb:.0f} MB exceeded the {args.max_memory_mb:.0f} MB ceiling")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
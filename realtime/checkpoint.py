@@ -0,0 +1,77 @@
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+
+CHECKPOINT_PATH = "dashboard_state.json"
+CHECKPOINT_INTERVAL = 30  # seconds
+CHECKPOINT_VERSION = 2
+
+
+def save_checkpoint(state, path=CHECKPOINT_PATH):
+    """Atomically write the dashboard state (temp file + rename, so a crash never leaves half a file)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".checkpoint-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump({"version": CHECKPOINT_VERSION, "saved_at": time.time(), "state": state}, f, default=str)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_checkpoint(path=CHECKPOINT_PATH):
+    """Return the saved state, or None if there is no usable checkpoint"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            payload = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.error(f"Ignoring unreadable checkpoint {path}: {e}")
+        return None
+    if payload.get("version") != CHECKPOINT_VERSION:
+        logging.warning(f"Ignoring checkpoint {path} with version {payload.get('version')}")
+        return None
+    return payload["state"]
+
+
+class CheckpointWriter(threading.Thread):
+    """Periodically save ``snapshot_fn()`` when ``generation_fn()`` says the state changed"""
+
+    def __init__(self, snapshot_fn, generation_fn, path=CHECKPOINT_PATH, interval=CHECKPOINT_INTERVAL):
+        super().__init__(daemon=True, name="checkpoint-writer")
+        self.snapshot_fn = snapshot_fn
+        self.generation_fn = generation_fn
+        self.path = path
+        self.interval = interval
+        self.saved_generation = None
+        self.stopped = threading.Event()
+        self.save_lock = threading.Lock()
+
+    def save(self, force=False):
+        with self.save_lock:
+            generation = self.generation_fn()
+            if not force and generation == self.saved_generation:
+                return False
+            started = time.perf_counter()
+            save_checkpoint(self.snapshot_fn(), self.path)
+            self.saved_generation = generation
+            logging.info(f"Checkpoint saved to {self.path} in {(time.perf_counter() - started) * 1000:.1f} ms")
+            return True
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.save()
+            except Exception as e:
+                logging.error(f"Checkpoint save failed: {e}")
+
+    def stop(self):
+        """Stop the timer and write a final checkpoint"""
+        self.stopped.set()
+        self.save()
@@ -0,0 +1,138 @@
+import os
+import zlib
+import pandas as pd
+from fraud_detection.store import parse_time
+
+# Where each export source keeps its timestamp and fraud flag
+TIME_COLUMNS = ["timestamp", "trans_date_trans_time"]
+FRAUD_COLUMNS = ["is_fraud", "is_fraud_predicted"]
+PERSISTED_SOURCES = {
+    "frauds": "detected_frauds.csv",
+    "simulated": "simulated_transactions.csv",
+}
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "csv.gz": ("application/gzip", "csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def filter_chunk(df, start=None, end=None, fraud_only=False):
+    """Apply the time-range and fraud-only filters to one chunk"""
+    time_col = next((c for c in TIME_COLUMNS if c in df.columns), None)
+    if time_col is not None and (start or end):
+        # "%Y-%m-%d %H:%M:%S" strings sort the same way as the times they encode
+        times = df[time_col].astype(str)
+        if start:
+            df = df[times >= start]
+            times = times[times >= start]
+        if end:
+            df = df[times <= end]
+    if fraud_only:
+        fraud_col = next((c for c in FRAUD_COLUMNS if c in df.columns), None)
+        if fraud_col is None:
+            return df.iloc[0:0]
+        df = df[pd.to_numeric(df[fraud_col], errors='coerce') == 1]
+    return df
+
+
+def iter_snapshot_chunks(snapshot, chunk_size, start=None, end=None, fraud_only=False):
+    """Chunk a snapshot (tuple of dicts) of the in-memory store with a stable column order"""
+    columns = list(dict.fromkeys(key for transaction in snapshot for key in transaction))
+    for offset in range(0, len(snapshot), chunk_size):
+        chunk = pd.DataFrame.from_records(snapshot[offset:offset + chunk_size], columns=columns)
+        yield filter_chunk(chunk, start, end, fraud_only)
+
+
+def iter_persisted_chunks(source, chunk_size, start=None, end=None, fraud_only=False):
+    """Chunk one of the CSV logs on disk without loading the whole file"""
+    path = PERSISTED_SOURCES[source]
+    if not os.path.exists(path):
+        return
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        yield filter_chunk(chunk, start, end, fraud_only)
+
+
+def iter_store_chunks(store, chunk_size, start=None, end=None, fraud_only=False):
+    """Chunk the subscriber's SQLite store; the time range and fraud filter run as indexed SQL"""
+    yield from store.iter_chunks(chunk_size, since=parse_time(start), until=parse_time(end), fraud_only=fraud_only)
+
+
+def encode_csv(chunks):
+    header = True
+    for chunk in chunks:
+        if len(chunk) == 0 and not header:
+            continue
+        yield chunk.to_csv(index=False, header=header).encode()
+        header = False
+
+
+def gzip_stream(byte_chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for data in byte_chunks:
+        compressed = compressor.compress(data)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class _StreamSink:
+    """Write-only file object for pyarrow that hands finished bytes to a generator"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def encode_parquet(chunks):
+    """Stream a Parquet file: one row group per chunk, footer written at the end"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    sink = _StreamSink()
+    writer = None
+    schema = None
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            # Columns that are empty in the first chunk would otherwise be stuck with a null type
+            schema = pa.schema([f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in table.schema])
+            table = table.cast(schema)
+            writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema, compression='zstd')
+        else:
+            table = table.cast(schema, safe=False)
+        writer.write_table(table)
+        yield sink.drain()
+    if writer is None:
+        writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), pa.schema([]))
+    writer.close()
+    yield sink.drain()
+
+
+def encode_export(chunks, export_format):
+    if export_format == "parquet":
+        return encode_parquet(chunks)
+    if export_format == "csv.gz":
+        return gzip_stream(encode_csv(chunks))
+    return encode_csv(chunks)
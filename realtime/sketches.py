@@ -0,0 +1,154 @@
+import math
+import heapq
+import base64
+import hashlib
+
+
+class SpaceSaving:
+    """Heavy hitters (Metwally et al. Space-Saving) in at most ``capacity`` counters.
+
+    With N items seen, every reported count overestimates the true count by at most
+    ``error(item) <= N / capacity``, and every item whose true count is above
+    N / capacity is guaranteed to be tracked. Memory is O(capacity) whatever the
+    number of distinct keys, and ``top(n)`` costs O(capacity log n) instead of
+    sorting every key ever seen. Two summaries merge into one with the same bound
+    over the combined stream, so each subscriber worker can keep its own.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        self._heap = []  # (count, item) min-heap with lazy deletion of stale entries
+
+    def __len__(self):
+        return len(self.counts)
+
+    def update(self, item, count=1):
+        self.total += count
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+        else:
+            # Replace the smallest counter; the newcomer inherits its count as error
+            floor, victim = self._pop_min()
+            del self.counts[victim]
+            del self.errors[victim]
+            self.counts[item] = floor + count
+            self.errors[item] = floor
+        heapq.heappush(self._heap, (self.counts[item], item))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c, i) for i, c in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def update_counts(self, counts):
+        for item, count in counts.items():
+            self.update(item, int(count))
+
+    def _pop_min(self):
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self.counts.get(item) == count:
+                return count, item
+
+    def min_count(self):
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def top(self, n=10):
+        """The ``n`` heaviest items as (item, estimated_count) pairs"""
+        return heapq.nlargest(n, self.counts.items(), key=lambda pair: pair[1])
+
+    def error_bound(self):
+        return self.total / self.capacity
+
+    def merge(self, other):
+        """Fold ``other`` into this summary (Agarwal et al. mergeable summaries)"""
+        own_floor, other_floor = self.min_count(), other.min_count()
+        counts, errors = {}, {}
+        for item in set(self.counts) | set(other.counts):
+            counts[item] = self.counts.get(item, own_floor) + other.counts.get(item, other_floor)
+            errors[item] = self.errors.get(item, own_floor) + other.errors.get(item, other_floor)
+        kept = heapq.nlargest(self.capacity, counts.items(), key=lambda pair: pair[1])
+        self.counts = dict(kept)
+        self.errors = {item: errors[item] for item in self.counts}
+        self.total += other.total
+        self._heap = [(c, i) for i, c in self.counts.items()]
+        heapq.heapify(self._heap)
+        return self
+
+    def to_dict(self):
+        return {"capacity": self.capacity, "total": self.total,
+                "items": [[item, count, self.errors[item]] for item, count in self.counts.items()]}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["capacity"])
+        sketch.total = data["total"]
+        for item, count, error in data["items"]:
+            sketch.counts[item] = count
+            sketch.errors[item] = error
+        sketch._heap = [(c, i) for i, c in sketch.counts.items()]
+        heapq.heapify(sketch._heap)
+        return sketch
+
+
+class HyperLogLog:
+    """Distinct-count estimate (Flajolet et al.) in 2**precision one-byte registers.
+
+    The relative standard error is 1.04 / sqrt(2**precision): precision 14 uses
+    16 KB and is within about 0.8% (1 sigma, 2.4% at 3 sigma) for any cardinality.
+    Small cardinalities use linear counting, so counts below a few thousand are
+    close to exact. Merging takes the register-wise maximum and is lossless.
+    """
+
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+        self._cached_count = 0
+
+    def add(self, item):
+        x = int.from_bytes(hashlib.blake2b(str(item).encode(), digest_size=8).digest(), "big")
+        index = x >> (64 - self.precision)
+        remaining = x & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            self._cached_count = None
+
+    def count(self):
+        if self._cached_count is not None:
+            return self._cached_count
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        self._cached_count = int(round(estimate))
+        return self._cached_count
+
+    def relative_error(self):
+        return 1.04 / math.sqrt(self.m)
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLogs with different precision")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        self._cached_count = None
+        return self
+
+    def to_dict(self):
+        return {"precision": self.precision, "registers": base64.b64encode(bytes(self.registers)).decode()}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["precision"])
+        sketch.registers = bytearray(base64.b64decode(data["registers"]))
+        sketch._cached_count = None
+        return sketch
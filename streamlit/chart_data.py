@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+MAX_SCATTER_POINTS = 2000
+
+
+class ProbabilityHistogram:
+    """Fixed-bin histogram of fraud probabilities, updated on ingest"""
+
+    def __init__(self, bins=20):
+        self.bins = bins
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    def add(self, probabilities):
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if probabilities.size == 0:
+            return
+        index = np.clip((probabilities * self.bins).astype(np.int64), 0, self.bins - 1)
+        self.counts += np.bincount(index, minlength=self.bins)
+
+    def total(self):
+        return int(self.counts.sum())
+
+    def frame(self):
+        edges = np.linspace(0.0, 1.0, self.bins + 1)
+        return pd.DataFrame({"probability": (edges[:-1] + edges[1:]) / 2, "count": self.counts})
+
+
+class BucketedSeries:
+    """Per-class count/sum/max per time bucket over the whole uptime in fixed memory.
+
+    When a point falls past the last bucket, neighbouring buckets are merged
+    pairwise and the bucket width doubles, so ``max_buckets`` always covers
+    everything since the first point.
+    """
+
+    def __init__(self, bucket_seconds=1.0, max_buckets=1024):
+        self.bucket_seconds = bucket_seconds
+        self.max_buckets = max_buckets
+        self.origin = None
+        self.counts = np.zeros((2, max_buckets), dtype=np.int64)
+        self.sums = np.zeros((2, max_buckets), dtype=np.float64)
+        self.maxes = np.zeros((2, max_buckets), dtype=np.float32)
+
+    def _coarsen(self):
+        self.counts = self._pairwise(self.counts, np.add)
+        self.sums = self._pairwise(self.sums, np.add)
+        self.maxes = self._pairwise(self.maxes, np.maximum)
+        self.bucket_seconds *= 2
+
+    def _pairwise(self, values, combine):
+        merged = combine(values[:, 0::2], values[:, 1::2])
+        return np.concatenate([merged, np.zeros_like(merged)], axis=1)
+
+    def add(self, times, amounts, fraud):
+        times = np.asarray(times, dtype=np.float64)
+        if times.size == 0:
+            return
+        if self.origin is None:
+            self.origin = float(np.floor(times.min()))
+        while (times.max() - self.origin) // self.bucket_seconds >= self.max_buckets:
+            self._coarsen()
+        index = np.clip(((times - self.origin) // self.bucket_seconds).astype(np.int64), 0, self.max_buckets - 1)
+        fraud = np.asarray(fraud, dtype=np.int64).clip(0, 1)
+        amounts = np.asarray(amounts, dtype=np.float64)
+        np.add.at(self.counts, (fraud, index), 1)
+        np.add.at(self.sums, (fraud, index), amounts)
+        np.maximum.at(self.maxes, (fraud, index), amounts.astype(np.float32))
+
+    def points(self, before=None):
+        """(time, max amount, fraud) per non-empty bucket, optionally only buckets ending before ``before``"""
+        if self.origin is None:
+            return np.empty(0), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int8)
+        starts = self.origin + np.arange(self.max_buckets) * self.bucket_seconds
+        times, amounts, fraud = [], [], []
+        for cls in (0, 1):
+            mask = self.counts[cls] > 0
+            if before is not None:
+                mask &= starts + self.bucket_seconds <= before
+            times.append(starts[mask] + self.bucket_seconds / 2)
+            amounts.append(self.maxes[cls][mask])
+            fraud.append(np.full(mask.sum(), cls, dtype=np.int8))
+        return np.concatenate(times), np.concatenate(amounts), np.concatenate(fraud)
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling; returns the indices to keep"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        kept[i + 1] = previous
+    return kept
+
+
+class ChartData:
+    """Everything the dashboard's charts need, with memory independent of uptime"""
+
+    def __init__(self, bins=20, max_buckets=1024):
+        self.histogram = ProbabilityHistogram(bins)
+        self.buckets = BucketedSeries(max_buckets=max_buckets)
+
+    def add(self, times, amounts, fraud, probabilities):
+        """``times`` are epoch seconds; all arguments are equal-length arrays"""
+        self.histogram.add(probabilities)
+        self.buckets.add(times, amounts, fraud)
+
+    def __len__(self):
+        return self.histogram.total()
+
+    def nbytes(self):
+        buckets = self.buckets
+        return self.histogram.counts.nbytes + buckets.counts.nbytes + buckets.sums.nbytes + buckets.maxes.nbytes
+
+    def scatter_frame(self, times, amounts, fraud, max_points=MAX_SCATTER_POINTS):
+        """Amount-vs-time points capped at ``max_points``: LTTB over the recent raw points
+        passed in, plus per-bucket maxima for anything older than them"""
+        amounts = np.asarray(amounts, dtype=np.float32)
+        fraud = np.asarray(fraud, dtype=np.int8)
+        old_times, old_amounts, old_fraud = self.buckets.points(before=times.min() if len(times) else None)
+        old_budget = max_points // 4 if len(old_times) else 0
+        parts = []
+        # Fraud points are rare but are what people look for, so they get a quarter of each budget
+        for cls, share in ((1, 0.25), (0, 0.75)):
+            for t, a, budget in ((old_times[old_fraud == cls], old_amounts[old_fraud == cls], old_budget),
+                                 (times[fraud == cls], amounts[fraud == cls], max_points - old_budget)):
+                order = np.argsort(t, kind="stable")
+                keep = order[lttb(t[order], a[order], max(int(budget * share), 3))]
+                parts.append((t[keep], a[keep], np.full(len(keep), cls, dtype=np.int8)))
+        frame = pd.DataFrame({
+            "timestamp": from_seconds(np.concatenate([p[0] for p in parts])),
+            "amount": np.concatenate([p[1] for p in parts]),
+            "fraud": np.concatenate([p[2] for p in parts]),
+        })
+        return frame.sort_values("timestamp")
+
+
+def to_seconds(timestamps):
+    """Naive local timestamps -> float seconds; from_seconds() gives back the same wall-clock times"""
+    return np.asarray((pd.to_datetime(timestamps) - pd.Timestamp(0)) / pd.Timedelta(seconds=1), dtype=np.float64)
+
+
+def now_seconds():
+    """The current local wall-clock time on the to_seconds() scale (not the epoch seconds of time.time())"""
+    return float(to_seconds([pd.Timestamp.now()])[0])
+
+
+def from_seconds(seconds):
+    return pd.Timestamp(0) + pd.to_timedelta(seconds, unit="s")
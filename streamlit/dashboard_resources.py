@@ -0,0 +1,25 @@
+import os
+from fraud_detection import config, simulation
+from fraud_detection.scoring import FraudScorer
+
+MODEL_PATH = config.MODEL_PATH
+TRAIN_DATA_PATH = config.TRAIN_DATA_PATH
+SAMPLE_ROWS = config.ENCODER_SAMPLE_ROWS
+
+
+def file_version(path):
+    """Cache key that changes whenever the file is replaced or rewritten"""
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def build_scoring_resources(model_path=MODEL_PATH, train_data_path=TRAIN_DATA_PATH):
+    """The model plus encoders/scaler fitted exactly like the MQTT subscriber's"""
+    return FraudScorer(model_path, train_data_path, nrows=SAMPLE_ROWS)
+
+
+def build_simulation_profile(train_data_path=TRAIN_DATA_PATH):
+    """Vocabularies and value ranges for the transaction generators, from a sample of the training data"""
+    return simulation.build_simulation_profile(train_data_path, nrows=SAMPLE_ROWS)
@@ -1,18 +1,20 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import joblib
 import json
 import time
-import paho.mqtt.client as mqtt
-import threading
 import plotly.express as px
 import plotly.graph_objects as go
-from sklearn.preprocessing import LabelEncoder, StandardScaler
 from datetime import datetime, timedelta
 import os
-import random
-from collections import deque
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fraud_detection import config, simulation, scoring
+from fraud_detection.dedup import DuplicateFilter
+import dashboard_resources
+import ingestion
+import rolling_store
 
 # Set page configuration
 st.set_page_config(
@@ -21,40 +23,17 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize session state variables
+# Initialize session state variables. Transaction histories and aggregates live in the
+# process-wide rolling store (get_dashboard_state), not per session.
 def initialize_session_state():
-    if 'transactions' not in st.session_state:
-        st.session_state.transactions = deque(maxlen=100)  # Store last 100 transactions
-    if 'fraud_count' not in st.session_state:
-        st.session_state.fraud_count = 0
-    if 'legitimate_count' not in st.session_state:
-        st.session_state.legitimate_count = 0
-    if 'mqtt_client' not in st.session_state:
-        st.session_state.mqtt_client = None
     if 'processing_active' not in st.session_state:
         st.session_state.processing_active = False
-    if 'last_update_time' not in st.session_state:
-        st.session_state.last_update_time = datetime.now()
-    if 'transaction_history' not in st.session_state:
-        st.session_state.transaction_history = []
-    if 'fraud_probabilities' not in st.session_state:
-        st.session_state.fraud_probabilities = []
-    if 'amounts_by_category' not in st.session_state:
-        st.session_state.amounts_by_category = {}
-    if 'fraud_by_category' not in st.session_state:
-        st.session_state.fraud_by_category = {}
-    if 'transactions_by_hour' not in st.session_state:
-        st.session_state.transactions_by_hour = {hour: 0 for hour in range(24)}
     if 'model_loaded' not in st.session_state:
         st.session_state.model_loaded = False
-    if 'model' not in st.session_state:
-        st.session_state.model = None
-    if 'label_encoders' not in st.session_state:
-        st.session_state.label_encoders = None
-    if 'scaler' not in st.session_state:
-        st.session_state.scaler = None
-    if 'selected_features' not in st.session_state:
-        st.session_state.selected_features = None
+    if 'scorer' not in st.session_state:
+        st.session_state.scorer = None
+    if 'last_bulk_run' not in st.session_state:
+        st.session_state.last_bulk_run = None
 
 initialize_session_state()
 
@@ -131,196 +110,62 @@ st.markdown('</div>', unsafe_allow_html=True)
 st.markdown('<h1 class="dashboard-title">Real-Time Fraud Detection Dashboard</h1>', unsafe_allow_html=True)
 st.markdown('<p class="dashboard-subtitle">Done by Prithwin & Akshay</p>', unsafe_allow_html=True)
 
+# Process-wide caches shared by every browser session and rerun. The file versions are
+# part of the key, so replacing fraud_model.pkl or fraudTrain.csv loads fresh copies.
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_scoring_resources(model_version, data_version):
+    return dashboard_resources.build_scoring_resources()
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_simulation_profile(data_version):
+    return dashboard_resources.build_simulation_profile()
+
+def clear_resource_caches():
+    """Drop the cached model/encoders and simulation profile"""
+    get_scoring_resources.clear()
+    get_simulation_profile.clear()
+
 # Helper functions for model loading and preprocessing
 def load_model_and_encoders():
     """Load the fraud detection model and prepare encoders"""
     try:
-        if not os.path.exists("fraud_model.pkl"):
+        if not os.path.exists(dashboard_resources.MODEL_PATH):
             st.error("Model file 'fraud_model.pkl' not found! Run bigtrain.py first.")
             return False
         
-        if not os.path.exists("fraudTrain.csv"):
+        if not os.path.exists(dashboard_resources.TRAIN_DATA_PATH):
             st.error("Training data file 'fraudTrain.csv' not found!")
             return False
         
-        model = joblib.load("fraud_model.pkl")
-        df = pd.read_csv("fraudTrain.csv", nrows=10000)
-        df = df.dropna()
-        df['trans_date_trans_time'] = pd.to_datetime(df['trans_date_trans_time'])
-        df['dob'] = pd.to_datetime(df['dob'])
-        
-        df['transaction_hour'] = df['trans_date_trans_time'].dt.hour
-        df['transaction_day'] = df['trans_date_trans_time'].dt.day
-        df['transaction_month'] = df['trans_date_trans_time'].dt.month
-        df['age'] = df['trans_date_trans_time'].dt.year - df['dob'].dt.year
-        df['geo_distance'] = np.sqrt((df['lat'] - df['merch_lat'])**2 + (df['long'] - df['merch_long'])**2)
-        
-        drop_cols = ['trans_date_trans_time', 'dob', 'Unnamed: 0', 'first', 'last', 'street', 'trans_num', 'unix_time', 'cc_num']
-        df = df.drop(columns=drop_cols, errors='ignore')
-        
-        categorical_cols = ['merchant', 'category', 'gender', 'city', 'state', 'job']
-        label_encoders = {}
-        for col in categorical_cols:
-            label_encoders[col] = LabelEncoder()
-            label_encoders[col].fit(df[col].astype(str))
-        
-        selected_features = ['amt', 'geo_distance', 'transaction_hour', 'transaction_day', 
-                            'transaction_month', 'age', 'city_pop', 'merchant', 'category', 
-                            'gender', 'city', 'state', 'job']
-        
-        df_encoded = df.copy()
-        for col in categorical_cols:
-            df_encoded[col] = label_encoders[col].transform(df_encoded[col].astype(str))
-        
-        scaler = StandardScaler()
-        scaler.fit(df_encoded[selected_features])
+        resources = get_scoring_resources(
+            dashboard_resources.file_version(dashboard_resources.MODEL_PATH),
+            dashboard_resources.file_version(dashboard_resources.TRAIN_DATA_PATH)
+        )
         
-        st.session_state.model = model
-        st.session_state.label_encoders = label_encoders
-        st.session_state.scaler = scaler
-        st.session_state.selected_features = selected_features
+        st.session_state.scorer = resources
         st.session_state.model_loaded = True
+        get_ingestion_service().set_resources(resources)
         return True
     
     except Exception as e:
         st.error(f"Error loading model and encoders: {e}")
         return False
 
-def preprocess_transaction(transaction):
-    """Process a transaction for prediction"""
-    if not st.session_state.model_loaded:
-        return None
-    
-    try:
-        data = {}
-        for key in st.session_state.selected_features:
-            if key in transaction:
-                data[key] = [transaction[key]]
-            else:
-                return None
-        
-        df_trans = pd.DataFrame(data)
-        
-        categorical_cols = ['merchant', 'category', 'gender', 'city', 'state', 'job']
-        for col in categorical_cols:
-            if col in df_trans.columns:
-                try:
-                    df_trans[col] = st.session_state.label_encoders[col].transform(df_trans[col].astype(str))
-                except ValueError:
-                    df_trans[col] = -1
-        
-        X_scaled = st.session_state.scaler.transform(df_trans[st.session_state.selected_features])
-        df_scaled = pd.DataFrame(X_scaled, columns=st.session_state.selected_features)
-        
-        return df_scaled
-    
-    except Exception as e:
-        st.error(f"Error preprocessing transaction: {e}")
-        return None
 
 def generate_transaction(fraud_probability=0.05):
     """Generate a random transaction"""
-    if not os.path.exists("fraudTrain.csv"):
+    if not os.path.exists(dashboard_resources.TRAIN_DATA_PATH):
         st.error("Training data file 'fraudTrain.csv' not found!")
         return None
     
     try:
-        df = pd.read_csv("fraudTrain.csv", nrows=10000)
-        
-        MERCHANTS = df['merchant'].unique().tolist()
-        CATEGORIES = df['category'].unique().tolist()
-        CITIES = df['city'].unique().tolist()
-        STATES = df['state'].unique().tolist()
-        JOBS = df['job'].unique().tolist()
-        GENDERS = df['gender'].unique().tolist()
-        
-        AMT_MIN, AMT_MAX = df['amt'].min(), df['amt'].max()
-        CITY_POP_MIN, CITY_POP_MAX = df['city_pop'].min(), df['city_pop'].max()
-        LAT_MIN, LAT_MAX = df['lat'].min(), df['lat'].max()
-        LONG_MIN, LONG_MAX = df['long'].min(), df['long'].max()
-        MERCH_LAT_MIN, MERCH_LAT_MAX = df['merch_lat'].min(), df['merch_lat'].max()
-        MERCH_LONG_MIN, MERCH_LONG_MAX = df['merch_long'].min(), df['merch_long'].max()
-        
-        df['geo_distance'] = np.sqrt((df['lat'] - df['merch_lat'])**2 + (df['long'] - df['merch_long'])**2)
-        GEO_DISTANCE_MIN, GEO_DISTANCE_MAX = df['geo_distance'].min(), df['geo_distance'].max()
-        
-        df['trans_date_trans_time'] = pd.to_datetime(df['trans_date_trans_time'])
-        df['dob'] = pd.to_datetime(df['dob'])
-        df['age'] = df['trans_date_trans_time'].dt.year - df['dob'].dt.year
-        AGE_MIN, AGE_MAX = df['age'].min(), df['age'].max()
-        
-        is_fraud = random.random() < fraud_probability
-        current_time = datetime.now()
-        
-        merchant = random.choice(MERCHANTS)
-        category = random.choice(CATEGORIES)
-        gender = random.choice(GENDERS)
-        city = random.choice(CITIES)
-        state = random.choice(STATES)
-        job = random.choice(JOBS)
-        
-        if is_fraud:
-            amt = round(random.uniform(AMT_MAX * 0.7, AMT_MAX), 2)
-        else:
-            amt = round(random.uniform(AMT_MIN, AMT_MAX * 0.7), 2)
-        
-        lat = random.uniform(LAT_MIN, LAT_MAX)
-        long = random.uniform(LONG_MIN, LONG_MAX)
-        merch_lat = random.uniform(MERCH_LAT_MIN, MERCH_LAT_MAX)
-        merch_long = random.uniform(MERCH_LONG_MIN, MERCH_LONG_MAX)
-        
-        geo_distance = np.sqrt((lat - merch_lat)**2 + (long - merch_long)**2)
-        if is_fraud and random.random() < 0.7:
-            geo_distance = random.uniform(GEO_DISTANCE_MAX * 0.8, GEO_DISTANCE_MAX * 1.2)
-        
-        transaction_hour = current_time.hour
-        transaction_day = current_time.day
-        transaction_month = current_time.month
-        age = random.randint(int(AGE_MIN), int(AGE_MAX))
-        city_pop = random.randint(int(CITY_POP_MIN), int(CITY_POP_MAX))
-        
-        transaction = {
-            "merchant": merchant,
-            "category": category,
-            "amt": amt,
-            "gender": gender,
-            "city": city,
-            "state": state,
-            "city_pop": city_pop,
-            "job": job,
-            "lat": lat,
-            "long": long,
-            "merch_lat": merch_lat,
-            "merch_long": merch_long,
-            "is_fraud": int(is_fraud),
-            "geo_distance": geo_distance,
-            "transaction_hour": transaction_hour,
-            "transaction_day": transaction_day,
-            "transaction_month": transaction_month,
-            "age": age,
-            "timestamp": current_time.strftime("%Y-%m-%d %H:%M:%S")
-        }
-        
-        return transaction
+        profile = get_simulation_profile(dashboard_resources.file_version(dashboard_resources.TRAIN_DATA_PATH))
+        return simulation.generate_transaction(profile, fraud_probability)
     
     except Exception as e:
         st.error(f"Error generating transaction: {e}")
         return None
 
-# MQTT callbacks
-def on_connect(client, userdata, flags, rc, properties=None):
-    if rc == 0:
-        st.session_state.mqtt_connected = True
-    else:
-        st.session_state.mqtt_connected = False
-
-def on_message(client, userdata, msg):
-    try:
-        transaction = json.loads(msg.payload.decode())
-        process_transaction(transaction)
-    except Exception as e:
-        st.error(f"Error processing message: {e}")
-
 def process_transaction(transaction):
     """Process a transaction for the dashboard"""
     if not st.session_state.model_loaded:
@@ -329,43 +174,43 @@ def process_transaction(transaction):
     if "timestamp" not in transaction:
         transaction["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    processed_transaction = preprocess_transaction(transaction)
-    if processed_transaction is None:
+    try:
+        fraud_probability = st.session_state.scorer.score_transaction(transaction)
+    except Exception as e:
+        st.error(f"Error preprocessing transaction: {e}")
         return
     
-    fraud_probability = st.session_state.model.predict_proba(processed_transaction)[0, 1]
-    prediction = 1 if fraud_probability > 0.5 else 0
-    
-    transaction["fraud_probability"] = fraud_probability
-    transaction["fraud_predicted"] = prediction
-    
-    st.session_state.transactions.append(transaction)
-    
-    if prediction == 1:
-        st.session_state.fraud_count += 1
-    else:
-        st.session_state.legitimate_count += 1
-    
-    category = transaction["category"]
-    if category not in st.session_state.amounts_by_category:
-        st.session_state.amounts_by_category[category] = 0
-        st.session_state.fraud_by_category[category] = 0
-    
-    st.session_state.amounts_by_category[category] += transaction["amt"]
-    if prediction == 1:
-        st.session_state.fraud_by_category[category] += 1
-    
-    hour = transaction["transaction_hour"]
-    st.session_state.transactions_by_hour[hour] += 1
-    
-    st.session_state.transaction_history.append({
-        "timestamp": datetime.strptime(transaction["timestamp"], "%Y-%m-%d %H:%M:%S"),
-        "amount": transaction["amt"],
-        "fraud": prediction
-    })
-    
-    st.session_state.fraud_probabilities.append(fraud_probability)
-    st.session_state.last_update_time = datetime.now()
+    get_dashboard_state().add_scored(pd.DataFrame([transaction]), np.array([fraud_probability]))
+
+def current_resources():
+    return get_scoring_resources(
+        dashboard_resources.file_version(dashboard_resources.MODEL_PATH),
+        dashboard_resources.file_version(dashboard_resources.TRAIN_DATA_PATH)
+    )
+
+def simulate_bulk(count, chunk_size=50000, fraud_probability=0.1):
+    """Generate and score ``count`` transactions in vectorized chunks"""
+    if not st.session_state.model_loaded:
+        st.error("Please load the model first!")
+        return
+    resources = current_resources()
+    profile = get_simulation_profile(dashboard_resources.file_version(dashboard_resources.TRAIN_DATA_PATH))
+    rng = np.random.default_rng()
+    progress = st.progress(0.0, text="Starting bulk simulation...")
+    started = time.perf_counter()
+    done = 0
+    while done < count:
+        size = min(chunk_size, count - done)
+        chunk = simulation.generate_transactions(profile, size, fraud_probability, rng)
+        chunk["timestamp"] = chunk["trans_date_trans_time"]
+        probabilities, _ = scoring.score_frame(resources, chunk)
+        get_dashboard_state().add_scored(chunk, probabilities)
+        done += size
+        rate = done / max(time.perf_counter() - started, 1e-9)
+        progress.progress(done / count, text=f"{done:,} / {count:,} transactions · {rate:,.0f} tx/s")
+    elapsed = time.perf_counter() - started
+    st.session_state.last_bulk_run = {"count": done, "seconds": elapsed, "rate": done / max(elapsed, 1e-9)}
+    st.rerun()
 
 def simulate_transactions(count, interval):
     """Simulate a batch of transactions"""
@@ -380,50 +225,61 @@ def simulate_transactions(count, interval):
             time.sleep(interval)
     st.rerun()
 
+@st.cache_resource(show_spinner=False)
+def get_dashboard_state():
+    """Bounded transaction history and aggregates, one copy per server process"""
+    return rolling_store.DashboardState()
+
+@st.cache_resource(show_spinner=False)
+def get_ingestion_service():
+    """One MQTT consumer per server process, shared by every session"""
+    dedup = DuplicateFilter(config.DEDUP_CAPACITY, config.DEDUP_ERROR_RATE, config.DEDUP_WINDOW_SECONDS)
+    return ingestion.IngestionService(sink=get_dashboard_state().add_scored, dedup=dedup)
+
 def start_mqtt_client():
-    """Initialize and connect the MQTT client"""
-    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
-    client.on_connect = on_connect
-    client.on_message = on_message
-    
+    """Start the shared MQTT ingestion service"""
+    if not st.session_state.model_loaded:
+        st.error("Please load the model first!")
+        return False
     try:
-        client.connect("localhost", 1883, 60)
-        client.subscribe("credit_card/transactions")
-        client.loop_start()
-        st.session_state.mqtt_client = client
-        return True
+        return get_ingestion_service().start(current_resources())
     except Exception as e:
         st.error(f"Failed to connect to MQTT broker: {e}")
         return False
 
 def stop_mqtt_client():
-    """Stop and disconnect the MQTT client"""
-    if st.session_state.mqtt_client:
-        st.session_state.mqtt_client.loop_stop()
-        st.session_state.mqtt_client.disconnect()
-        st.session_state.mqtt_client = None
+    """Stop the shared MQTT ingestion service"""
+    get_ingestion_service().stop()
+
+# Pick up a replaced model file on the next rerun (a cache hit otherwise)
+if st.session_state.model_loaded:
+    load_model_and_encoders()
+
+dashboard_state = get_dashboard_state()
 
 # Top row metrics
+view = dashboard_state.snapshot()
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
     st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-    st.metric("Transactions Processed", len(st.session_state.transactions))
+    st.metric("Transactions Processed", view["fraud_count"] + view["legitimate_count"])
     st.markdown('</div>', unsafe_allow_html=True)
 
 with col2:
     st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-    st.metric("Fraudulent Transactions", st.session_state.fraud_count)
+    st.metric("Fraudulent Transactions", view["fraud_count"])
     st.markdown('</div>', unsafe_allow_html=True)
 
 with col3:
     st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-    st.metric("Legitimate Transactions", st.session_state.legitimate_count)
+    st.metric("Legitimate Transactions", view["legitimate_count"])
     st.markdown('</div>', unsafe_allow_html=True)
 
 with col4:
     st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-    fraud_rate = 0 if len(st.session_state.transactions) == 0 else (st.session_state.fraud_count / len(st.session_state.transactions) * 100)
+    processed = view["fraud_count"] + view["legitimate_count"]
+    fraud_rate = 0 if processed == 0 else (view["fraud_count"] / processed * 100)
     st.metric("Fraud Rate", f"{fraud_rate:.2f}%")
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -441,6 +297,12 @@ if setup_button:
             else:
                 st.error("Failed to load model and encoders!")
 
+if st.sidebar.button("Reload Model"):
+    clear_resource_caches()
+    with st.sidebar:
+        if load_model_and_encoders():
+            st.success("Model reloaded from disk!")
+
 st.sidebar.subheader("Connection")
 mqtt_button = st.sidebar.button("Connect to MQTT Broker")
 
@@ -452,39 +314,70 @@ if mqtt_button:
             else:
                 st.error("Failed to connect to MQTT broker!")
 
+if st.sidebar.button("Disconnect from MQTT Broker"):
+    stop_mqtt_client()
+    st.sidebar.success("Disconnected from MQTT broker!")
+
 st.sidebar.subheader("Simulation")
-col1, col2 = st.sidebar.columns(2)
-with col1:
-    num_transactions = st.number_input("Number of transactions", min_value=1, max_value=100, value=10)
-with col2:
-    interval = st.number_input("Interval (seconds)", min_value=0.1, max_value=5.0, value=0.5, step=0.1)
+simulation_mode = st.sidebar.radio("Mode", ["Paced", "Bulk"], horizontal=True,
+                                   help="Paced scores one transaction at a time with a delay; Bulk generates and scores in vectorized chunks")
+if simulation_mode == "Paced":
+    col1, col2 = st.sidebar.columns(2)
+    with col1:
+        num_transactions = st.number_input("Number of transactions", min_value=1, max_value=100, value=10)
+    with col2:
+        interval = st.number_input("Interval (seconds)", min_value=0.1, max_value=5.0, value=0.5, step=0.1)
+else:
+    col1, col2 = st.sidebar.columns(2)
+    with col1:
+        num_transactions = st.number_input("Number of transactions", min_value=1000, max_value=10_000_000, value=100_000, step=10_000)
+    with col2:
+        bulk_chunk_size = st.number_input("Chunk size", min_value=1000, max_value=500_000, value=50_000, step=10_000)
 
 simulate_button = st.sidebar.button("Generate Transactions")
 
 if simulate_button:
     with st.sidebar:
-        with st.spinner(f"Generating {num_transactions} transactions..."):
-            simulate_transactions(num_transactions, interval)
-            st.success(f"Generated {num_transactions} transactions!")
-
-if st.sidebar.button("Reset Dashboard"):
-    st.session_state.transactions = deque(maxlen=100)
-    st.session_state.fraud_count = 0
-    st.session_state.legitimate_count = 0
-    st.session_state.transaction_history = []
-    st.session_state.fraud_probabilities = []
-    st.session_state.amounts_by_category = {}
-    st.session_state.fraud_by_category = {}
-    st.session_state.transactions_by_hour = {hour: 0 for hour in range(24)}
+        if simulation_mode == "Paced":
+            with st.spinner(f"Generating {num_transactions} transactions..."):
+                simulate_transactions(num_transactions, interval)
+                st.success(f"Generated {num_transactions} transactions!")
+        else:
+            simulate_bulk(int(num_transactions), int(bulk_chunk_size))
+
+if st.session_state.last_bulk_run:
+    run = st.session_state.last_bulk_run
+    st.sidebar.caption(f"Last bulk run: {run['count']:,} transactions in {run['seconds']:.1f}s ({run['rate']:,.0f} tx/s)")
+
+st.sidebar.subheader("Memory")
+retention_hours = st.sidebar.number_input(
+    "Retention (hours)", min_value=0.1, max_value=24.0 * 30,
+    value=dashboard_state.retention_seconds / 3600, step=1.0,
+    help="How far back the raw points behind the amount-vs-time chart are kept; older points are shown as per-bucket maxima"
+)
+if retention_hours * 3600 != dashboard_state.retention_seconds:
+    dashboard_state.set_retention(retention_hours * 3600)
+memory = dashboard_state.memory_usage()
+st.sidebar.caption(
+    f"Shared store: {sum(memory.values()) / 2**20:.1f} MiB · "
+    f"{view['points_in_window']:,} of {dashboard_state.capacity:,} points in window"
+)
+with st.sidebar.expander("Memory breakdown"):
+    for component, size in memory.items():
+        st.caption(f"{component}: {size / 2**20:.2f} MiB")
+
+if st.sidebar.button("Reset Dashboard", help="Clears the history shared by every open dashboard"):
+    dashboard_state.reset()
     st.sidebar.success("Dashboard reset!")
+    view = dashboard_state.snapshot()
 
 # Visualizations
 col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Recent Transactions")
-    if len(st.session_state.transactions) > 0:
-        recent_df = pd.DataFrame(list(st.session_state.transactions)[-10:])
+    if view["recent"]:
+        recent_df = pd.DataFrame(view["recent"])
         if not recent_df.empty and 'amt' in recent_df.columns and 'fraud_predicted' in recent_df.columns:
             recent_df = recent_df[['timestamp', 'merchant', 'category', 'amt', 'fraud_probability', 'fraud_predicted']]
             recent_df.columns = ['Timestamp', 'Merchant', 'Category', 'Amount', 'Fraud Probability', 'Fraud Predicted']
@@ -501,17 +394,18 @@ with col1:
 
 with col2:
     st.subheader("Fraud Probability Distribution")
-    if len(st.session_state.fraud_probabilities) > 0:
-        fig = px.histogram(
-            x=st.session_state.fraud_probabilities,
-            nbins=20,
-            color_discrete_sequence=['#003087'],
+    if processed > 0:
+        histogram_df = view["histogram"]
+        fig = go.Figure(go.Bar(
+            x=histogram_df["probability"],
+            y=histogram_df["count"],
+            width=1.0 / len(histogram_df) * 0.9,
+            marker_color='#003087',
             opacity=0.8
-        )
+        ))
         fig.update_layout(
             xaxis_title="Fraud Probability",
             yaxis_title="Count",
-            bargap=0.1,
             height=300,
         )
         st.plotly_chart(fig, use_container_width=True)
@@ -522,8 +416,9 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Transaction Amount vs Time")
-    if len(st.session_state.transaction_history) > 0:
-        time_df = pd.DataFrame(st.session_state.transaction_history)
+    if processed > 0:
+        # At most chart_data.MAX_SCATTER_POINTS points, however long the dashboard has run
+        time_df = view["scatter"]
         fig = px.scatter(
             time_df,
             x="timestamp",
@@ -546,13 +441,8 @@ with col1:
 
 with col2:
     st.subheader("Fraud by Category")
-    if st.session_state.fraud_by_category:
-        category_df = pd.DataFrame({
-            'Category': list(st.session_state.fraud_by_category.keys()),
-            'Fraud Count': list(st.session_state.fraud_by_category.values()),
-            'Total Amount': list(st.session_state.amounts_by_category.values())
-        })
-        category_df = category_df.sort_values('Fraud Count', ascending=False).head(10)
+    if not view["category"].empty:
+        category_df = view["category"].sort_values('Fraud Count', ascending=False).head(10)
         fig = px.bar(
             category_df,
             x='Category',
@@ -576,7 +466,7 @@ with col1:
     st.subheader("Live Fraud Detection Feed")
     live_container = st.container()
     with live_container:
-        for tx in list(st.session_state.transactions)[-5:]:
+        for tx in view["recent"][-5:]:
             if 'fraud_predicted' in tx and tx['fraud_predicted'] == 1:
                 st.markdown(f"""
                 <div class="fraud-alert">
@@ -596,8 +486,8 @@ with col1:
 
 with col2:
     st.subheader("Transactions by Hour")
-    hours = list(st.session_state.transactions_by_hour.keys())
-    counts = list(st.session_state.transactions_by_hour.values())
+    hours = list(range(24))
+    counts = view["transactions_by_hour"]
     fig = px.line(
         x=hours,
         y=counts,
@@ -613,8 +503,36 @@ with col2:
     fig.update_xaxes(tickmode='linear', tick0=0, dtick=2)
     st.plotly_chart(fig, use_container_width=True)
 
+@st.fragment(run_every="2s")
+def render_mqtt_feed(window=10):
+    """Live MQTT panel; reads a snapshot of the shared buffer, sized to the window shown"""
+    snapshot = get_ingestion_service().snapshot(window)
+    counters = snapshot["counters"]
+    st.subheader("MQTT Live Feed")
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Status", "Connected" if counters["connected"] else "Disconnected")
+    col2.metric("Scored", counters["scored"])
+    col3.metric("Fraudulent", counters["fraud"])
+    col4.metric("Backlog", counters["backlog"])
+    col5.metric("Dropped", counters["dropped"])
+    if counters["duplicates"]:
+        st.caption(f"{counters['duplicates']:,} redelivered duplicates ignored")
+    end_to_end = counters["latency"]["end_to_end"]
+    if end_to_end["count"]:
+        st.caption(f"Publish-to-verdict latency: p50 {end_to_end['p50']:.1f} ms · p99 {end_to_end['p99']:.1f} ms · "
+                   f"p99.9 {end_to_end['p999']:.1f} ms over {end_to_end['count']:,} messages")
+    if snapshot["recent"]:
+        feed_df = pd.DataFrame(snapshot["recent"])[['timestamp', 'merchant', 'category', 'amt', 'fraud_probability', 'fraud_predicted']]
+        feed_df.columns = ['Timestamp', 'Merchant', 'Category', 'Amount', 'Fraud Probability', 'Fraud Predicted']
+        st.dataframe(feed_df.iloc[::-1], use_container_width=True)
+    else:
+        st.info("No MQTT transactions yet. Connect to the broker to start the feed.")
+
+render_mqtt_feed()
+
+last_update_time = datetime.fromtimestamp(view["last_update_time"]) if view["last_update_time"] else datetime.now()
 st.markdown(f"""
 <div style="text-align: center; padding: 10px; color: #555555;">
-    Last updated: {st.session_state.last_update_time.strftime("%Y-%m-%d %H:%M:%S")}
+    Last updated: {last_update_time.strftime("%Y-%m-%d %H:%M:%S")}
 </div>
 """, unsafe_allow_html=True)
\ No newline at end of file
@@ -1,26 +1,22 @@
 import os
-import time
 import subprocess
 import sys
+import importlib.util
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
 
 def check_requirements():
     """Check that all required files and libraries are available"""
     print("🔍 Checking requirements...")
     
-    # Check if Python packages are installed
-    try:
-        import pandas
-        import numpy
-        import joblib
-        import paho.mqtt.client
-        import xgboost
-        import sklearn
-        import matplotlib
-        print("✅ All required Python packages are installed.")
-    except ImportError as e:
-        print(f"❌ Missing Python package: {e}")
+    # Check if Python packages are installed (located, not imported: importing them all takes seconds)
+    missing = [module for module in ("pandas", "numpy", "joblib", "paho.mqtt", "xgboost", "sklearn", "matplotlib")
+               if importlib.util.find_spec(module) is None]
+    if missing:
+        print(f"❌ Missing Python package: {', '.join(missing)}")
         print("Try running: pip install pandas numpy joblib paho-mqtt xgboost scikit-learn matplotlib")
         return False
+    print("✅ All required Python packages are installed.")
     
     # Check if training data exists
     if not os.path.exists("fraudTrain.csv"):
@@ -75,21 +71,12 @@ def start_mqtt_broker():
     
     # Try to check if broker is running
     try:
-        import paho.mqtt.client as mqtt
+        from fraud_detection import config, mqtt_io
         
-        def on_connect(client, userdata, flags, rc, properties=None):
-            if rc == 0:
-                print("✅ MQTT broker is running!")
-            else:
-                print(f"❌ MQTT broker connection failed with code {rc}")
-        
-        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
-        client.on_connect = on_connect
-        client.connect("localhost", 1883, 5)
-        client.loop_start()
-        time.sleep(2)
-        client.loop_stop()
-        client.disconnect()
+        if mqtt_io.probe_broker(config.MQTT_BROKER, config.MQTT_PORT):
+            print("✅ MQTT broker is running!")
+        else:
+            print("❌ MQTT broker did not accept the connection")
         
         return True
     except Exception as e:
@@ -115,36 +102,20 @@ def run_fraud_detection_system():
         return
     
     print("\n🚀 Starting Fraud Detection System...")
-    print("This will start two processes in separate terminals:")
+    print("This runs two supervised processes, restarted if they die (logs in logs/):")
     print("1. Transaction Publisher - Generates simulated transactions")
     print("2. Fraud Detector - Processes transactions and detects fraud")
-    
+    print("Run `python -m fraud_detection.supervisor scale N` from another terminal to add detectors.")
+
     try:
-        # Start the subscriber in a new terminal
-        if sys.platform.startswith('win'):
-            subscriber_cmd = f'start cmd /k "{sys.executable} mqtt_subscriber.py"'
-        else:  # Linux/macOS
-            subscriber_cmd = f"gnome-terminal -- {sys.executable} mqtt_subscriber.py"
-        
-        print(f"\n📡 Starting Fraud Detection Service...")
-        os.system(subscriber_cmd)
-        
-        # Give the subscriber time to initialize
-        time.sleep(2)
-        
-        # Start the publisher in a new terminal
-        if sys.platform.startswith('win'):
-            publisher_cmd = f'start cmd /k "{sys.executable} mqtt_publisher.py"'
-        else:  # Linux/macOS
-            publisher_cmd = f"gnome-terminal -- {sys.executable} mqtt_publisher.py"
-        
-        print(f"\n📤 Starting Transaction Generator...")
-        os.system(publisher_cmd)
-        
-        print("\n✅ Fraud Detection System is now running!")
-        print("Check the separate terminal windows to see the system in action.")
-        print("Press Ctrl+C in each terminal to stop the processes.")
-        
+        from fraud_detection import config, supervisor
+
+        system = supervisor.Supervisor(".", broker=config.MQTT_BROKER, port=config.MQTT_PORT,
+                                       publisher_args=["--interval", "0.5", "--qos", "1"])
+        system.start(workers=1, publishers=1)
+        supervisor.serve_control(system, supervisor.CONTROL_PORT)
+        print("\n✅ Fraud Detection System is now running! (Press Ctrl+C to stop)")
+        system.run(status_interval=30.0)
     except Exception as e:
         print(f"❌ Error starting system: {e}")
 
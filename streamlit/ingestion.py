@@ -0,0 +1,194 @@
+import time
+import queue
+import logging
+import threading
+from itertools import islice
+from collections import deque
+from datetime import datetime
+import pandas as pd
+from fraud_detection import config, mqtt_io, scoring, tracing
+from fraud_detection.dedup import transaction_key
+
+MQTT_BROKER = config.MQTT_BROKER
+MQTT_PORT = config.MQTT_PORT
+MQTT_TOPIC = config.MQTT_TOPIC
+
+
+class IngestionService:
+    """Process-wide MQTT consumer for the dashboard.
+
+    paho's network thread only enqueues raw payloads. A scorer thread drains them
+    in micro-batches, scores each batch in one vectorized call and folds the
+    results into a lock-protected ring buffer plus running counters, so the UI
+    only ever copies a snapshot of the window it shows. Scored batches are also
+    handed to ``sink`` (the dashboard's shared rolling store) as DataFrames.
+    Redelivered transactions (a trans_num already seen by ``dedup``) are
+    counted as duplicates and reach neither the counters nor the sink.
+    """
+
+    def __init__(self, broker=MQTT_BROKER, port=MQTT_PORT, topic=MQTT_TOPIC,
+                 capacity=100, batch_size=512, inbox_size=20000, sink=None, dedup=None):
+        self.broker = broker
+        self.port = port
+        self.topic = topic
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.recent = deque(maxlen=capacity)
+        self.inbox = queue.Queue(maxsize=inbox_size)
+        self.resources = None
+        self.sink = sink
+        self.dedup = dedup
+        self.client = None
+        self.worker = None
+        self.running = threading.Event()
+        self.connected = False
+        self.latency = tracing.LatencyTracker(("score_batch", "end_to_end"))
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.counters = {
+            "received": 0,
+            "scored": 0,
+            "skipped": 0,
+            "dropped": 0,
+            "duplicates": 0,
+            "fraud": 0,
+            "legitimate": 0,
+            "amount_total": 0.0,
+        }
+        self.last_update_time = None
+
+    def set_resources(self, resources):
+        """Swap in a (possibly reloaded) FraudScorer; picked up by the next batch"""
+        self.resources = resources
+
+    def start(self, resources):
+        self.set_resources(resources)
+        if self.running.is_set():
+            return True
+        self.running.set()
+        self.worker = threading.Thread(target=self._score_loop, daemon=True, name="dashboard-ingestion")
+        self.worker.start()
+        self.client = mqtt_io.create_client(on_connect=self._on_connect, on_message=self._on_message,
+                                            on_disconnect=self._on_disconnect)
+        try:
+            mqtt_io.connect(self.client, self.broker, self.port)
+        except Exception:
+            self.running.clear()
+            self.client = None
+            raise
+        self.client.loop_start()
+        return True
+
+    def stop(self):
+        self.running.clear()
+        if self.client is not None:
+            self.client.loop_stop()
+            self.client.disconnect()
+            self.client = None
+        if self.worker is not None:
+            self.worker.join(timeout=5)
+            self.worker = None
+
+    def reset(self):
+        with self.lock:
+            self.recent.clear()
+            self._reset_counters()
+        self.latency.reset()
+
+    def _on_connect(self, client, userdata, flags, rc, properties=None):
+        self.connected = rc == 0
+        if self.connected:
+            client.subscribe(self.topic)
+            client.subscribe(f"{self.topic}/+")  # partitioned publishers (MQTT_PARTITIONS)
+        else:
+            logging.error(f"Dashboard ingestion failed to connect: {rc}")
+
+    def _on_disconnect(self, client, userdata, flags, rc, properties=None):
+        self.connected = False
+
+    def _on_message(self, client, userdata, msg):
+        try:
+            self.inbox.put_nowait(msg.payload)
+        except queue.Full:
+            with self.lock:
+                self.counters["dropped"] += 1
+
+    def _next_batch(self):
+        try:
+            batch = [self.inbox.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.inbox.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _score_loop(self):
+        while self.running.is_set():
+            payloads = self._next_batch()
+            if not payloads or self.resources is None:
+                continue
+            try:
+                self.ingest([mqtt_io.decode_transaction(payload) for payload in payloads])
+            except Exception as e:
+                logging.error(f"Dashboard ingestion batch failed: {e}")
+
+    def ingest(self, transactions):
+        """Score a batch of transaction dicts and fold them into the buffer and counters"""
+        traces = [transaction.pop(tracing.TRACE_KEY, None) for transaction in transactions]
+        received = len(transactions)
+        if self.dedup is not None:
+            fresh = []
+            for index, transaction in enumerate(transactions):
+                key = transaction_key(transaction)
+                if key is None or not self.dedup.seen(key):
+                    fresh.append(index)
+            if len(fresh) < received:
+                transactions = [transactions[index] for index in fresh]
+                traces = [traces[index] for index in fresh]
+        probabilities, kept = [], []
+        if transactions:
+            with self.latency.time("score_batch"):
+                probabilities, kept = scoring.score_records(self.resources, transactions)
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        scored = []
+        for index, probability in zip(kept, probabilities):
+            transaction = transactions[index]
+            transaction.setdefault("timestamp", now)
+            transaction["fraud_probability"] = float(probability)
+            transaction["fraud_predicted"] = 1 if probability > config.FRAUD_THRESHOLD else 0
+            scored.append(transaction)
+
+        with self.lock:
+            counters = self.counters
+            counters["received"] += received
+            counters["duplicates"] += received - len(transactions)
+            counters["skipped"] += len(transactions) - len(scored)
+            counters["scored"] += len(scored)
+            for transaction in scored:
+                counters["fraud" if transaction["fraud_predicted"] else "legitimate"] += 1
+                counters["amount_total"] += transaction["amt"]
+            self.recent.extend(scored)
+            self.last_update_time = time.time()
+        if self.sink is not None and scored:
+            self.sink(pd.DataFrame.from_records(scored), probabilities)
+        for trace in traces:
+            elapsed = tracing.end_to_end_ns(trace)
+            if elapsed is not None:
+                self.latency.record("end_to_end", elapsed)
+        return scored
+
+    def snapshot(self, window=10):
+        """Counters plus the newest ``window`` transactions, copied under the lock"""
+        with self.lock:
+            counters = dict(self.counters)
+            recent = list(islice(reversed(self.recent), window))[::-1]
+            last_update_time = self.last_update_time
+        counters["backlog"] = self.inbox.qsize()
+        counters["connected"] = self.connected
+        counters["last_update_time"] = last_update_time
+        counters["latency"] = self.latency.summary()["stages"]
+        return {"counters": counters, "recent": recent}
@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+import chart_data
+from fraud_detection import config
+
+DASHBOARD_CAPACITY = int(os.environ.get("DASHBOARD_CAPACITY", 1_000_000))
+DASHBOARD_RETENTION_SECONDS = float(os.environ.get("DASHBOARD_RETENTION_SECONDS", 24 * 3600))
+MAX_CATEGORIES = 256
+OTHER_CATEGORY = "(other)"
+
+
+class RollingStore:
+    """Fixed-capacity ring buffers of scored points.
+
+    Per point: float32 timestamp (seconds since ``epoch``, ~10 ms resolution over
+    a day), float32 amount and probability, int8 verdict and int16 category code,
+    i.e. 15 bytes. Points older than ``retention_seconds`` are hidden from
+    ``window()`` and overwritten as the ring wraps.
+    """
+
+    def __init__(self, capacity=DASHBOARD_CAPACITY, retention_seconds=DASHBOARD_RETENTION_SECONDS):
+        self.capacity = capacity
+        self.retention_seconds = retention_seconds
+        self.epoch = None
+        self.timestamps = np.zeros(capacity, dtype=np.float32)
+        self.amounts = np.zeros(capacity, dtype=np.float32)
+        self.probabilities = np.zeros(capacity, dtype=np.float32)
+        self.fraud = np.zeros(capacity, dtype=np.int8)
+        self.categories = np.zeros(capacity, dtype=np.int16)
+        self.size = 0
+        self.head = 0
+
+    def append(self, seconds, amounts, probabilities, fraud, category_codes):
+        seconds = np.asarray(seconds, dtype=np.float64)
+        if seconds.size == 0:
+            return
+        if self.epoch is None:
+            self.epoch = float(np.floor(seconds.min()))
+        columns = [seconds - self.epoch, amounts, probabilities, fraud, category_codes]
+        if len(seconds) > self.capacity:
+            columns = [np.asarray(column)[-self.capacity:] for column in columns]
+        count = len(columns[0])
+        index = (self.head + np.arange(count)) % self.capacity
+        for array, column in zip((self.timestamps, self.amounts, self.probabilities, self.fraud, self.categories), columns):
+            array[index] = column
+        self.head = (self.head + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+
+    def window(self, now=None):
+        """Oldest-to-newest copies of the points inside the retention window; ``now`` is on the to_seconds() scale"""
+        order = (self.head - self.size + np.arange(self.size)) % self.capacity
+        if self.size and self.retention_seconds:
+            now = chart_data.now_seconds() if now is None else now
+            cutoff = now - self.epoch - self.retention_seconds
+            order = order[self.timestamps[order] >= cutoff]
+        return {
+            "seconds": self.timestamps[order].astype(np.float64) + (self.epoch or 0.0),
+            "amounts": self.amounts[order],
+            "probabilities": self.probabilities[order],
+            "fraud": self.fraud[order],
+            "categories": self.categories[order],
+        }
+
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.timestamps, self.amounts, self.probabilities, self.fraud, self.categories))
+
+
+class DashboardState:
+    """Process-wide dashboard aggregates shared by every browser session"""
+
+    def __init__(self, capacity=DASHBOARD_CAPACITY, retention_seconds=DASHBOARD_RETENTION_SECONDS, recent=100):
+        self.lock = threading.RLock()
+        self.capacity = capacity
+        self.retention_seconds = retention_seconds
+        self.recent_size = recent
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.store = RollingStore(self.capacity, self.retention_seconds)
+            self.charts = chart_data.ChartData()
+            self.recent = deque(maxlen=self.recent_size)
+            self.fraud_count = 0
+            self.legitimate_count = 0
+            self.transactions_by_hour = np.zeros(24, dtype=np.int64)
+            self.category_names = []
+            self.category_codes = {}
+            self.amounts_by_category = np.zeros(MAX_CATEGORIES, dtype=np.float64)
+            self.fraud_by_category = np.zeros(MAX_CATEGORIES, dtype=np.int64)
+            self.last_update_time = None
+
+    def set_retention(self, retention_seconds):
+        with self.lock:
+            self.retention_seconds = retention_seconds
+            self.store.retention_seconds = retention_seconds
+
+    def _category_code(self, category):
+        code = self.category_codes.get(category)
+        if code is None:
+            # Bounded vocabulary: past MAX_CATEGORIES - 1 names everything shares one bucket
+            if len(self.category_names) >= MAX_CATEGORIES - 1:
+                return self._category_code(OTHER_CATEGORY) if category != OTHER_CATEGORY else MAX_CATEGORIES - 1
+            code = len(self.category_names)
+            self.category_names.append(category)
+            self.category_codes[category] = code
+        return code
+
+    def add_scored(self, df, probabilities):
+        """Fold a scored DataFrame (timestamp, amt, category, transaction_hour, ...) into the state"""
+        if len(df) == 0:
+            return
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        predicted = (probabilities > config.FRAUD_THRESHOLD).astype(np.int8)
+        seconds = chart_data.to_seconds(df["timestamp"])
+        amounts = df["amt"].to_numpy(dtype=np.float64)
+        hours = df["transaction_hour"].to_numpy(dtype=np.int64) % 24
+
+        tail = df.tail(self.recent_size).copy()
+        tail["fraud_probability"] = probabilities[-len(tail):]
+        tail["fraud_predicted"] = predicted[-len(tail):]
+        tail_records = tail.to_dict("records")
+
+        with self.lock:
+            names, inverse = np.unique(df["category"].astype(str).to_numpy(), return_inverse=True)
+            codes = np.array([self._category_code(name) for name in names], dtype=np.int16)[inverse]
+            np.add.at(self.amounts_by_category, codes, amounts)
+            np.add.at(self.fraud_by_category, codes, predicted)
+            fraud_total = int(predicted.sum())
+            self.fraud_count += fraud_total
+            self.legitimate_count += len(predicted) - fraud_total
+            self.transactions_by_hour += np.bincount(hours, minlength=24)
+            self.store.append(seconds, amounts, probabilities, predicted, codes)
+            self.charts.add(seconds, amounts, predicted, probabilities)
+            self.recent.extend(tail_records)
+            self.last_update_time = time.time()
+
+    def snapshot(self, recent=10):
+        """Copies of what one render needs; the scatter is already downsampled"""
+        with self.lock:
+            window = self.store.window()
+            used = len(self.category_names)
+            return {
+                "fraud_count": self.fraud_count,
+                "legitimate_count": self.legitimate_count,
+                "recent": list(self.recent)[-recent:],
+                "histogram": self.charts.histogram.frame(),
+                "scatter": self.charts.scatter_frame(window["seconds"], window["amounts"], window["fraud"]),
+                "category": pd.DataFrame({
+                    "Category": self.category_names,
+                    "Fraud Count": self.fraud_by_category[:used],
+                    "Total Amount": self.amounts_by_category[:used],
+                }),
+                "transactions_by_hour": self.transactions_by_hour.tolist(),
+                "points_in_window": len(window["seconds"]),
+                "last_update_time": self.last_update_time,
+            }
+
+    def memory_usage(self):
+        """Approximate bytes held, by component"""
+        with self.lock:
+            recent_bytes = sum(sys.getsizeof(r) + sum(sys.getsizeof(v) for v in r.values()) for r in self.recent)
+            return {
+                "ring buffers": self.store.nbytes(),
+                "chart bins": self.charts.nbytes(),
+                "category totals": self.amounts_by_category.nbytes + self.fraud_by_category.nbytes,
+                "recent transactions": recent_bytes,
+            }